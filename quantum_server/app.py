@@ -6,17 +6,86 @@ Ce module implémente une API Flask pour exposer les services du module QML
 """
 
 import os
+import io
 import json
+import time
+import functools
 import numpy as np
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_file, send_from_directory, stream_with_context
 from flask_cors import CORS
 
-from qml_service import quantum_service
+from qml_service import quantum_service, STREAM_BATCH_SIZE
+from connection_batch import ConnectionBatch
+from artifact_cache import STATIC_DIR
+from render_pipeline import render_pipeline, ImageOptions, DEFAULT_IMAGE_STORAGE, image_mimetype
+from scoring_pool import sharded_scorer
+import server_metrics
+from server_metrics import StageTimer
+
+# Attente maximale (en secondes) d'un artefact en cours de rendu
+MAX_ARTIFACT_WAIT = 60.0
+
+# Taille des blocs lus dans le corps d'une requête en flux
+STREAM_READ_SIZE = 64 * 1024
+
+# Durée de cache (secondes) des images: leur nom est le condensé de leurs entrées, elles ne changent jamais
+IMAGE_MAX_AGE = 365 * 24 * 3600
 
 # Initialiser l'application Flask
-app = Flask(__name__, static_folder='static')
+app = Flask(__name__, static_folder=STATIC_DIR)
 CORS(app)  # Autoriser les requêtes CORS
 
+# Nombre de processus servant l'API (fixé par serve.py avant le fork). Avec
+# plusieurs processus, l'état en mémoire (registre des rendus, images en
+# mémoire, graphe vivant, configuration) n'est pas partagé entre eux
+app.config['SERVE_WORKERS'] = 1
+
+def multiprocess() -> bool:
+    """Indique si l'API est servie par plusieurs processus (serve.py --workers > 1)."""
+    return app.config['SERVE_WORKERS'] > 1
+
+def single_process(view):
+    """
+    Réserve une route au service mono-processus.
+    
+    Son état reste dans le processus qui traite la requête: avec plusieurs
+    processus, la requête suivante du client en atteindrait un autre.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if multiprocess():
+            return jsonify({
+                "status": "error",
+                "message": "Indisponible avec plusieurs processus de service: état propre à chaque processus "
+                           "(serve.py --workers 1, ou configuration au démarrage avec --config)"
+            }), 409
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.before_request
+def track_request_start():
+    """Compte la requête parmi les requêtes en cours de sa route."""
+    g.request_started = time.perf_counter()
+    g.request_endpoint = request.endpoint or "unknown"
+    server_metrics.registry.inc(server_metrics.REQUESTS_IN_FLIGHT, {"endpoint": g.request_endpoint})
+
+@app.after_request
+def track_request_status(response):
+    g.request_status = response.status_code
+    return response
+
+@app.teardown_request
+def track_request_end(error=None):
+    """Enregistre la durée et le code de statut de la requête."""
+    if not hasattr(g, "request_started"):
+        return
+    endpoint = g.request_endpoint
+    status = getattr(g, "request_status", 500)
+    server_metrics.registry.inc(server_metrics.REQUESTS_IN_FLIGHT, {"endpoint": endpoint}, -1)
+    server_metrics.registry.inc(server_metrics.REQUESTS_TOTAL, {"endpoint": endpoint, "status": str(status)})
+    server_metrics.registry.observe(server_metrics.REQUEST_DURATION, time.perf_counter() - g.request_started,
+                                    {"endpoint": endpoint})
+
 # Configurer le service QML avec la clé API IBM Quantum
 if 'IBM_QUANTUM_API_KEY' in os.environ:
     quantum_service.set_api_token(os.environ['IBM_QUANTUM_API_KEY'])
@@ -67,24 +136,40 @@ def generate_synthetic_network_data(num_connections=50):
 @app.route('/api/quantum/status', methods=['GET'])
 def get_status():
     """Retourne le statut du service QML."""
+    config = quantum_service.config
     return jsonify({
         "status": "operational",
-        "qubits": quantum_service.num_qubits,
-        "feature_map": quantum_service.feature_map_name,
-        "ansatz": quantum_service.ansatz_name,
-        "shots": quantum_service.shots,
-        "model_type": quantum_service.model_type,
-        "ibm_connected": quantum_service.ibm_service is not None
+        "config_version": config.version,
+        "qubits": config.num_qubits,
+        "feature_map": config.feature_map,
+        "ansatz": config.ansatz,
+        "shots": config.shots,
+        "model_type": config.model_type,
+        "ibm_connected": quantum_service.ibm_service is not None,
+        "score_cache": quantum_service.score_cache.stats(),
+        "execution_mode": config.execution_mode,
+        "sampler": quantum_service.batched_sampler.stats(),
+        "scoring_pool": sharded_scorer.stats(),
+        "model": quantum_service.model_info()
     })
 
+@app.route('/api/quantum/model/reload', methods=['POST'])
+@single_process
+def reload_model():
+    """Recharge le modèle entraîné depuis son fichier (model_training.py)."""
+    result = quantum_service.load_model()
+    return jsonify(result)
+
 @app.route('/api/quantum/configure', methods=['POST'])
+@single_process
 def configure_service():
     """Configure le service QML."""
     config = request.json
     result = quantum_service.configure(config)
-    return jsonify(result)
+    return jsonify(result), 400 if result["status"] == "error" else 200
 
 @app.route('/api/quantum/ibm-connect', methods=['POST'])
+@single_process
 def ibm_connect():
     """Connecte au service IBM Quantum."""
     data = request.json
@@ -99,36 +184,254 @@ def ibm_connect():
     result = quantum_service.set_api_token(token)
     return jsonify(result)
 
+def request_image_options():
+    """
+    Lit les options d'image de la requête.
+    
+    Paramètres optionnels: ?format=png|webp|svg, ?dpi=<n>, ?storage=file|memory
+    (memory: rendu en mémoire, sans fichier) et ?inline=1 (images incluses
+    dans la réponse JSON, rendues en mémoire).
+    
+    Returns:
+        (options, inline); lève ValueError si une option est invalide
+    """
+    inline = request.args.get('inline') in ('1', 'true')
+    dpi = request.args.get('dpi')
+    if dpi is not None and not dpi.isdigit():
+        raise ValueError("La résolution doit être un nombre entier de dpi")
+    storage = request.args.get('storage', 'file' if multiprocess() else DEFAULT_IMAGE_STORAGE)
+    if storage == 'memory' and multiprocess() and not inline:
+        raise ValueError("storage=memory est indisponible avec plusieurs processus de service (utiliser inline=1)")
+    options = ImageOptions(
+        format=request.args.get('format', 'png').lower(),
+        dpi=int(dpi) if dpi is not None else None,
+        storage='memory' if inline else storage
+    )
+    return options, inline
+
+def inline_images(result):
+    """
+    Attend les rendus du résultat et remplace les URL de ses images par des data URL.
+    
+    Chaque artefact reçoit son contenu (data_url); les champs <artefact>_image_url
+    pointent alors sur ce contenu, la réponse se suffit à elle-même.
+    """
+    for name, artifact in result.get("artifacts", {}).items():
+        job = render_pipeline.wait(artifact["id"], timeout=MAX_ARTIFACT_WAIT)
+        if job is None:
+            continue
+        artifact.update(job.to_dict())
+        data_url = render_pipeline.data_url(job)
+        if data_url is not None:
+            artifact["data_url"] = data_url
+            if result.get(f"{name}_image_url"):
+                result[f"{name}_image_url"] = data_url
+    return result
+
+def wait_images(result):
+    """
+    Attend les rendus du résultat avant de répondre (service multi-processus).
+    
+    Les images sont alors des fichiers terminés, servis par n'importe quel
+    processus; les URL du registre des rendus, propre à chaque processus,
+    sont retirées.
+    """
+    for artifact in result.get("artifacts", {}).values():
+        job = render_pipeline.wait(artifact["id"], timeout=MAX_ARTIFACT_WAIT)
+        if job is not None:
+            artifact.update(job.to_dict())
+        artifact.pop("status_url", None)
+        artifact.pop("image_url", None)
+    return result
+
+def images_response(result, inline):
+    """Réponse JSON d'un résultat avec images: incluses (inline), attendues (multi-processus) ou asynchrones."""
+    if inline:
+        return jsonify(inline_images(result))
+    if multiprocess():
+        return jsonify(wait_images(result))
+    return jsonify(result)
+
+def request_graph_output():
+    """
+    Lit la sortie du graphe demandée: ?graph=image|layout et ?quantize=<bits>.
+    
+    En sortie layout, la mise en page est renvoyée en JSON et aucune image de graphe n'est rendue.
+    """
+    quantize = request.args.get('quantize')
+    if quantize is not None and not quantize.isdigit():
+        raise ValueError("La quantification doit être un nombre entier de bits")
+    return request.args.get('graph', 'image'), int(quantize) if quantize is not None else None
+
+def request_wait():
+    """Lit l'attente demandée ?wait=<secondes> (0 par défaut), bornée par MAX_ARTIFACT_WAIT."""
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        raise ValueError("L'attente doit être un nombre de secondes") from None
+    if not wait >= 0:
+        raise ValueError("L'attente doit être un nombre de secondes positif")
+    return min(wait, MAX_ARTIFACT_WAIT)
+
+def request_options_error(error):
+    return jsonify({"status": "error", "message": f"Paramètres invalides: {error}"}), 400
+
 @app.route('/api/quantum/circuit-demo', methods=['GET'])
 def circuit_demo():
-    """Génère un circuit quantique de démonstration."""
-    result = quantum_service.generate_demo_quantum_circuit()
-    return jsonify(result)
+    """Génère un circuit quantique de démonstration (options d'image: voir request_image_options)."""
+    try:
+        image, inline = request_image_options()
+    except ValueError as e:
+        return request_options_error(e)
+    
+    result = quantum_service.generate_demo_quantum_circuit(image=image)
+    return images_response(result, inline)
 
 @app.route('/api/quantum/network-graph', methods=['POST'])
 def network_graph():
-    """Génère un graphe à partir de données réseau."""
+    """
+    Génère un graphe à partir de données réseau.
+    
+    Options d'image: voir request_image_options; ?graph=layout: voir request_graph_output.
+    """
+    try:
+        image, inline = request_image_options()
+        output, quantize_bits = request_graph_output()
+    except ValueError as e:
+        return request_options_error(e)
+    
     network_data = request.json
     
     if not network_data:
         # Utiliser des données synthétiques pour la démonstration
         network_data = generate_synthetic_network_data(50)
     
-    result = quantum_service.generate_graph_from_network_data(network_data)
-    return jsonify(result)
+    # Conversion unique en colonnes, consommée directement par le service
+    result = quantum_service.generate_graph_from_network_data(ConnectionBatch.from_records(network_data), image=image,
+                                                              output=output, quantize_bits=quantize_bits)
+    return images_response(result, inline)
 
 @app.route('/api/quantum/detect-anomalies', methods=['POST'])
 def detect_anomalies():
-    """Détecte les anomalies dans les données réseau."""
+    """
+    Détecte les anomalies dans les données réseau.
+    
+    Options d'image: voir request_image_options; ?graph=layout: voir request_graph_output.
+    """
+    try:
+        image, inline = request_image_options()
+        output, quantize_bits = request_graph_output()
+    except ValueError as e:
+        return request_options_error(e)
+    
+    timer = StageTimer("detect_anomalies")
+    with timer.stage("parse"):
+        network_data = request.json
+        
+        if not network_data:
+            # Utiliser des données synthétiques pour la démonstration
+            network_data = generate_synthetic_network_data(100)
+        
+        batch = ConnectionBatch.from_records(network_data)
+    
+    result = quantum_service.detect_anomalies(batch, timer, image, output, quantize_bits)
+    return images_response(result, inline)
+
+def iter_body_lines(stream):
+    """
+    Découpe le corps d'une requête en lignes au fil de la réception.
+    
+    Les blocs sont lus tels qu'ils arrivent (corps chunked compris), sans
+    attendre la fin de l'envoi ni lire le flux octet par octet.
+    """
+    remainder = b""
+    for block in iter(lambda: stream.read(STREAM_READ_SIZE), b""):
+        lines = (remainder + block).split(b"\n")
+        remainder = lines.pop()
+        yield from lines
+    if remainder:
+        yield remainder
+
+@app.route('/api/quantum/detect-anomalies/stream', methods=['POST'])
+def detect_anomalies_stream():
+    """
+    Détecte les anomalies d'un flux NDJSON (une connexion par ligne, envoi chunked possible).
+    
+    Les connexions sont scorées par micro-lots pendant la réception et les
+    anomalies renvoyées en NDJSON au fil de l'eau, suivies d'une ligne de synthèse.
+    Le paramètre optionnel ?batch_size=<n> fixe la taille des micro-lots.
+    """
+    batch_size = request.args.get('batch_size', str(STREAM_BATCH_SIZE))
+    if not batch_size.isdigit() or int(batch_size) < 1:
+        return request_options_error("La taille des micro-lots doit être un entier positif")
+    batch_size = int(batch_size)
+    
+    def generate():
+        for event in quantum_service.detect_anomalies_stream(iter_body_lines(request.stream), batch_size=batch_size):
+            yield json.dumps(event) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/quantum/sample-connections', methods=['POST'])
+def sample_connections():
+    """
+    Exécute le circuit QML de chaque connexion et retourne les distributions mesurées.
+    
+    Le paramètre optionnel ?shot_noise=1 tire des comptages au lieu des probabilités exactes.
+    """
     network_data = request.json
+    shot_noise = request.args.get('shot_noise')
     
     if not network_data:
         # Utiliser des données synthétiques pour la démonstration
         network_data = generate_synthetic_network_data(100)
     
-    result = quantum_service.detect_anomalies(network_data)
+    config = quantum_service.config
+    try:
+        distributions = quantum_service.sample_connections(
+            ConnectionBatch.from_records(network_data),
+            shot_noise=shot_noise in ('1', 'true') if shot_noise is not None else None,
+            config=config
+        )
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Erreur lors de l'exécution des circuits: {str(e)}"
+        })
+    return jsonify({
+        "status": "success",
+        "num_qubits": config.num_qubits,
+        "shots": config.shots,
+        "config_version": config.version,
+        "distributions": distributions.tolist()
+    })
+
+@app.route('/api/quantum/live-graph', methods=['GET', 'POST'])
+@single_process
+def live_graph():
+    """
+    Graphe vivant: POST ajoute un lot de connexions, GET retourne les métriques.
+    
+    Le paramètre optionnel ?expire_before=<timestamp> expire les lots plus anciens.
+    """
+    if request.method == 'GET':
+        return jsonify(quantum_service.get_live_graph_metrics())
+    
+    expire_before = request.args.get('expire_before')
+    if expire_before is not None:
+        try:
+            expire_before = float(expire_before)
+        except ValueError:
+            return request_options_error("expire_before doit être un horodatage numérique")
+    result = quantum_service.update_live_graph(ConnectionBatch.from_records(request.json or []),
+                                               expire_before=expire_before)
     return jsonify(result)
 
+@app.route('/api/quantum/metrics', methods=['GET'])
+def get_metrics():
+    """Expose les durées par étape, les compteurs et les jauges au format Prometheus."""
+    return Response(server_metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/quantum/demo-data', methods=['GET'])
 def get_demo_data():
     """Génère des données de démonstration."""
@@ -140,10 +443,73 @@ def get_demo_data():
         "count": len(data)
     })
 
+@app.route('/api/quantum/artifacts/<job_id>', methods=['GET'])
+@single_process
+def get_artifact(job_id):
+    """
+    Retourne le statut d'un artefact en cours de rendu.
+    
+    Le paramètre optionnel ?wait=<secondes> attend la fin du rendu.
+    """
+    try:
+        wait = request_wait()
+    except ValueError as e:
+        return request_options_error(e)
+    job = render_pipeline.wait(job_id, timeout=wait) if wait > 0 else render_pipeline.get(job_id)
+    
+    if job is None:
+        return jsonify({"status": "error", "message": "Artefact inconnu"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/quantum/artifacts/<job_id>/image', methods=['GET'])
+@single_process
+def get_artifact_image(job_id):
+    """Sert l'image d'un artefact, en attendant au plus ?wait=<secondes> qu'elle soit prête."""
+    try:
+        wait = request_wait()
+    except ValueError as e:
+        return request_options_error(e)
+    job = render_pipeline.wait(job_id, timeout=wait) if wait > 0 else render_pipeline.get(job_id)
+    
+    if job is None:
+        return jsonify({"status": "error", "message": "Artefact inconnu"}), 404
+    
+    status = job.status
+    if status == "error":
+        return jsonify(job.to_dict()), 500
+    if status != "done":
+        return jsonify(job.to_dict()), 202
+    if job.image.in_memory:
+        return send_image(job.name, render_pipeline.read(job))
+    return send_from_directory(STATIC_DIR, job.name, mimetype=job.image.mimetype,
+                               etag=job.name, max_age=IMAGE_MAX_AGE)
+
+@app.route('/api/quantum/images/<name>', methods=['GET'])
+@single_process
+def get_memory_image(name):
+    """Sert une image rendue en mémoire."""
+    return send_image(name, render_pipeline.memory.get(name))
+
+def send_image(name, data):
+    """
+    Envoie une image avec un ETag fort (son nom, condensé de ses entrées).
+    
+    Un client qui renvoie l'ETag dans If-None-Match reçoit 304 Not Modified, sans contenu.
+    """
+    if data is None and request.if_none_match.contains(name):
+        # Le contenu d'un nom ne change jamais: la copie du client reste valide après éviction
+        response = Response(status=304)
+        response.set_etag(name)
+        return response
+    if data is None:
+        return jsonify({"status": "error", "message": "Image inconnue ou expirée, relancer l'analyse"}), 404
+    return send_file(io.BytesIO(data), mimetype=image_mimetype(name), etag=name,
+                     max_age=IMAGE_MAX_AGE, conditional=True)
+
 @app.route('/static/<path:path>')
 def serve_static(path):
     """Sert les fichiers statiques."""
-    return send_from_directory('static', path)
+    return send_from_directory(STATIC_DIR, path)
 
 if __name__ == '__main__':
     # Démarrer le serveur d'API
@@ -0,0 +1,189 @@
+"""
+QuantumEyes - Cache d'artefacts adressé par contenu
+
+Ce module nomme les images générées (circuits, histogrammes, graphes) par un
+condensé de leurs entrées. Une requête identique retrouve le fichier déjà
+rendu sans travail matplotlib, deux requêtes différentes ne peuvent plus
+s'écraser, et une éviction LRU bornée en taille limite le répertoire static/.
+Les images rendues en mémoire sont conservées de la même façon, sans fichier.
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Répertoire des images générées, servi par les applications Flask sous /static
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Taille maximale par défaut du répertoire des artefacts (en Mo)
+ARTIFACT_CACHE_MAX_MB = float(os.environ.get('QUANTUM_ARTIFACT_CACHE_MB', 256))
+
+# Taille maximale par défaut des images conservées en mémoire (en Mo)
+MEMORY_ARTIFACTS_MAX_MB = float(os.environ.get('QUANTUM_MEMORY_ARTIFACTS_MB', 64))
+
+# Marque des fichiers en cours d'écriture (rendus atomiques), jamais évincés
+TEMPORARY_MARKER = ".tmp"
+
+# Version des fonctions de rendu, à incrémenter quand leur sortie change
+RENDER_VERSION = 1
+
+
+def artifact_key(kind: str, inputs: Any) -> str:
+    """
+    Calcule le condensé des entrées d'un artefact.
+
+    Args:
+        kind: Type d'artefact (graph, circuit, histogram...)
+        inputs: Entrées sérialisables en JSON (arêtes, comptages, style...)
+
+    Returns:
+        Condensé hexadécimal
+    """
+    payload = json.dumps([RENDER_VERSION, kind, inputs], sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class ArtifactCache:
+    """Répertoire d'artefacts nommés par contenu, avec éviction LRU bornée en taille."""
+
+    def __init__(self, directory: str, max_mb: float = ARTIFACT_CACHE_MAX_MB, url_prefix: str = "static"):
+        """
+        Initialise le cache.
+
+        Args:
+            directory: Répertoire des fichiers sur le disque
+            max_mb: Taille maximale du répertoire en Mo
+            url_prefix: Préfixe des chemins relatifs retournés aux clients
+        """
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def filename(self, prefix: str, kind: str, inputs: Any, ext: str = 'png') -> str:
+        """Retourne le chemin relatif (static/...) de l'artefact correspondant aux entrées."""
+        return f"{self.url_prefix}/{prefix}_{artifact_key(kind, inputs)}.{ext}"
+
+    def path(self, filename: str) -> str:
+        """Retourne le chemin sur le disque d'un chemin relatif."""
+        return os.path.join(self.directory, os.path.basename(filename))
+
+    def temporary_path(self, filename: str) -> str:
+        """Retourne un chemin unique sur le disque où écrire l'artefact avant de le renommer."""
+        root, ext = os.path.splitext(self.path(filename))
+        return f"{root}.{uuid.uuid4().hex}{TEMPORARY_MARKER}{ext}"
+
+    def lookup(self, filename: str) -> bool:
+        """
+        Indique si l'artefact existe déjà et le marque comme récemment utilisé.
+
+        Returns:
+            True si le fichier peut être servi sans nouveau rendu
+        """
+        path = self.path(filename)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def enforce_limit(self, keep: Optional[str] = None) -> None:
+        """
+        Supprime les artefacts les moins récemment utilisés au-delà de la taille maximale.
+
+        Les fichiers temporaires des rendus en cours (d'un autre thread ou
+        processus) ne sont ni comptés ni supprimés.
+
+        Args:
+            keep: Chemin relatif à ne jamais supprimer (l'artefact qui vient d'être rendu)
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and TEMPORARY_MARKER not in entry.name:
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            keep_path = self.path(keep) if keep else None
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep_path:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Retourne les compteurs du cache."""
+        return {
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class MemoryArtifactStore:
+    """Images rendues en mémoire, indexées par nom d'artefact, avec éviction LRU bornée en taille."""
+
+    def __init__(self, max_mb: float = MEMORY_ARTIFACTS_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, name: str) -> Optional[bytes]:
+        """Retourne le contenu d'une image et la marque comme récemment utilisée."""
+        with self._lock:
+            data = self._entries.get(name)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+            return data
+
+    def put(self, name: str, data: bytes) -> None:
+        """Conserve une image; les moins récemment utilisées sont évincées au-delà de max_bytes."""
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[name] = data
+            self._size += len(data)
+            # L'image qui vient d'être rendue est toujours conservée
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Retourne les compteurs du cache."""
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "bytes": self._size,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
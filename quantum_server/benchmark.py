@@ -0,0 +1,432 @@
+"""
+QuantumEyes - Benchmarks des chemins critiques
+
+Ce script mesure, hors ligne et sur CPU, les chemins critiques du serveur QML
+en fonction du nombre de connexions (10² à 10⁵) et du nombre de qubits (2 à 12):
+génération de données, extraction de caractéristiques, graphe, détection
+d'anomalies et rendus de quantum_visualization. Les résultats sont écrits en
+JSON; la commande compare signale les régressions entre deux fichiers.
+
+Usage:
+    python quantum_server/benchmark.py run [--output bench.json] [--sizes 100,1000] [--qubits 2,4] [--cases ...]
+    python quantum_server/benchmark.py compare baseline.json current.json [--threshold 0.25]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Rendus sans affichage, même hors du serveur
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import numpy as np
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+# Tailles de lot (nombre de connexions) et nombres de qubits balayés par défaut
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+DEFAULT_QUBITS = (2, 4, 6, 8, 10, 12)
+
+# Nombre de qubits du balayage en taille, et taille du balayage en qubits
+SIZE_SWEEP_QUBITS = 4
+QUBIT_SWEEP_SIZE = 1_000
+
+# Au-delà de cette durée médiane, les points plus grands du balayage sont sautés
+DEFAULT_MAX_SECONDS = 60.0
+
+# Écart relatif et absolu à partir desquels compare signale une régression
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA = 0.005
+
+# Part d'anomalies dans les jeux de données générés
+ANOMALY_RATIO = 0.1
+
+
+def _dataset(size: int, seed: int, as_records: bool = True):
+    """Jeu de données étiqueté reproductible d'environ size connexions."""
+    from data_generator import NetworkDataGenerator
+
+    anomaly_count = max(3, int(size * ANOMALY_RATIO))
+    result = NetworkDataGenerator().generate_bulk_dataset(size - anomaly_count, anomaly_count, seed=seed,
+                                                          as_records=as_records)
+    return result[0] if as_records else result
+
+
+def _configure(qubits: int) -> None:
+    """Configure le service partagé et vide le cache de scores (mesures à froid)."""
+    from qml_service import quantum_service
+
+    if quantum_service.config.num_qubits != qubits:
+        quantum_service.configure({'num_qubits': qubits})
+    quantum_service.score_cache.clear()
+
+
+# Chaque cas prépare ses entrées (non chronométré) et retourne la fonction mesurée.
+# La fonction peut retourner des tâches de rendu, dont l'attente est mesurée à part.
+
+def _case_synthetic_data(size: int, qubits: int, seed: int) -> Callable[[], Any]:
+    from app import generate_synthetic_network_data
+
+    np.random.seed(seed)
+    random.seed(seed)
+    return lambda: generate_synthetic_network_data(size)
+
+
+def _case_mixed_dataset(size: int, qubits: int, seed: int) -> Callable[[], Any]:
+    from data_generator import NetworkDataGenerator
+
+    random.seed(seed)
+    anomaly_count = max(3, int(size * ANOMALY_RATIO))
+    generator = NetworkDataGenerator()
+    return lambda: generator.generate_mixed_dataset(size - anomaly_count, anomaly_count)
+
+
+def _case_classical_features(size: int, qubits: int, seed: int) -> Callable[[], Any]:
+    from data_generator import NetworkDataGenerator
+
+    records = _dataset(size, seed)
+    generator = NetworkDataGenerator()
+    return lambda: generator.extract_features_for_classical_ml(records)
+
+
+def _case_graph(size: int, qubits: int, seed: int) -> Callable[[], Any]:
+    from qml_service import quantum_service
+
+    records = _dataset(size, seed)
+
+    def run():
+        result = quantum_service.generate_graph_from_network_data(records)
+        return [artifact["id"] for artifact in result.get("artifacts", {}).values()]
+    return run
+
+
+def _case_detect_anomalies(size: int, qubits: int, seed: int) -> Callable[[], Any]:
+    from qml_service import quantum_service
+
+    _configure(qubits)
+    records = _dataset(size, seed)
+
+    def run():
+        result = quantum_service.detect_anomalies(records)
+        if result["status"] == "error":
+            raise RuntimeError(result["message"])
+        return [artifact["id"] for artifact in result["artifacts"].values()]
+    return run
+
+
+def _case_render_circuit(size: int, qubits: int, seed: int) -> Callable[[], Any]:
+    from quantum_visualization import create_anomaly_detection_circuit, visualize_quantum_circuit
+
+    np.random.seed(seed)
+    circuit = create_anomaly_detection_circuit(qubits)
+    return lambda: visualize_quantum_circuit(circuit, filename=_scratch_file("circuit"))
+
+
+def _case_render_histogram(size: int, qubits: int, seed: int) -> Callable[[], Any]:
+    from quantum_visualization import generate_counts_dict, visualize_histogram
+
+    np.random.seed(seed)
+    random.seed(seed)
+    counts = generate_counts_dict(qubits, 1024, anomaly=True)
+    return lambda: visualize_histogram(counts, filename=_scratch_file("histogram"))
+
+
+def _case_render_network_graph(size: int, qubits: int, seed: int) -> Callable[[], Any]:
+    from quantum_visualization import generate_network_graph_visualization
+
+    records = _dataset(size, seed)
+    edges = list({(conn["source_ip"], conn["destination_ip"]) for conn in records})
+    nodes = sorted({ip for edge in edges for ip in edge})
+    anomalies = [(conn["source_ip"], conn["destination_ip"]) for conn in records if conn.get("is_anomaly")]
+    return lambda: generate_network_graph_visualization(nodes, edges, filename=_scratch_file("network"),
+                                                        anomalies=anomalies)
+
+
+# Cas disponibles: fonction et axes balayés ("size" à SIZE_SWEEP_QUBITS, "qubits" à QUBIT_SWEEP_SIZE)
+CASES: Dict[str, Dict[str, Any]] = {
+    "synthetic_data": {"setup": _case_synthetic_data, "axes": ("size",)},
+    "mixed_dataset": {"setup": _case_mixed_dataset, "axes": ("size",)},
+    "classical_features": {"setup": _case_classical_features, "axes": ("size",)},
+    "graph": {"setup": _case_graph, "axes": ("size",)},
+    "detect_anomalies": {"setup": _case_detect_anomalies, "axes": ("size", "qubits")},
+    "render_circuit": {"setup": _case_render_circuit, "axes": ("qubits",)},
+    "render_histogram": {"setup": _case_render_histogram, "axes": ("qubits",)},
+    "render_network_graph": {"setup": _case_render_network_graph, "axes": ("size",)},
+}
+
+_scratch_dir = None
+
+
+def _scratch_file(prefix: str) -> str:
+    """Chemin absolu d'une image jetable (les rendus directs n'écrivent pas dans static/)."""
+    global _scratch_dir
+    if _scratch_dir is None:
+        _scratch_dir = tempfile.TemporaryDirectory(prefix="quantumeyes-bench-")
+    return os.path.join(_scratch_dir.name, f"{prefix}.png")
+
+
+def _wait_renders(job_ids: Any) -> List[str]:
+    """Attend la fin des rendus planifiés par un cas et retourne leurs erreurs."""
+    from render_pipeline import render_pipeline
+
+    errors = []
+    for job_id in job_ids or []:
+        job = render_pipeline.wait(job_id)
+        if job is not None and job.status == "error":
+            errors.append(job.to_dict()["message"])
+    return errors
+
+
+def measure(case: str, size: int, qubits: int, repeat: int = 3, warmup: int = 1, seed: int = 0) -> Dict[str, Any]:
+    """
+    Mesure un cas pour une taille et un nombre de qubits.
+
+    Chaque répétition utilise des données neuves (graine différente) pour que
+    les caches de scores et d'artefacts ne masquent pas le coût réel.
+
+    Args:
+        case: Nom du cas (voir CASES)
+        size: Nombre de connexions
+        qubits: Nombre de qubits
+        repeat: Nombre de mesures
+        warmup: Exécutions préalables non mesurées (imports, transpilation, noyau)
+        seed: Graine de base des données
+
+    Returns:
+        Médiane, minimum et durées de rendu en secondes (et erreurs de rendu éventuelles)
+    """
+    setup = CASES[case]["setup"]
+    durations, render_durations, render_errors = [], [], set()
+    for run in range(warmup + repeat):
+        fn = setup(size, qubits, seed + run)
+        started = time.perf_counter()
+        job_ids = fn()
+        elapsed = time.perf_counter() - started
+        if case in ("graph", "detect_anomalies"):
+            render_errors.update(_wait_renders(job_ids))
+            render_elapsed = time.perf_counter() - started - elapsed
+        else:
+            render_elapsed = None
+        if run >= warmup:
+            durations.append(elapsed)
+            if render_elapsed is not None:
+                render_durations.append(render_elapsed)
+
+    result = {
+        "median_seconds": round(statistics.median(durations), 6),
+        "min_seconds": round(min(durations), 6),
+        "runs": repeat
+    }
+    if render_durations:
+        result["render_median_seconds"] = round(statistics.median(render_durations), 6)
+    if render_errors:
+        result["render_errors"] = sorted(render_errors)
+    return result
+
+
+def _points(case: str, sizes: List[int], qubits: List[int]) -> List[Dict[str, Any]]:
+    """Points (axe, taille, qubits) d'un cas, par axe et par ordre croissant."""
+    points = []
+    axes = CASES[case]["axes"]
+    if "size" in axes:
+        points += [{"axis": "size", "size": size, "qubits": SIZE_SWEEP_QUBITS} for size in sorted(sizes)]
+    if "qubits" in axes:
+        points += [{"axis": "qubits", "size": QUBIT_SWEEP_SIZE, "qubits": q} for q in sorted(qubits)]
+    return points
+
+
+def _environment() -> Dict[str, Any]:
+    """Description de la machine et des versions, stockée avec les résultats."""
+    from importlib import metadata
+
+    versions = {}
+    for package in ("numpy", "networkx", "matplotlib", "qiskit", "qiskit-aer", "scikit-learn"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions
+    }
+
+
+def run_benchmarks(cases: Optional[List[str]] = None, sizes: List[int] = DEFAULT_SIZES,
+                   qubits: List[int] = DEFAULT_QUBITS, repeat: int = 3, warmup: int = 1,
+                   max_seconds: float = DEFAULT_MAX_SECONDS, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """
+    Exécute les benchmarks et retourne les résultats.
+
+    Dans un balayage, dès qu'un point dépasse max_seconds, les points plus
+    grands sont marqués "skipped" au lieu d'être mesurés.
+
+    Args:
+        cases: Cas à exécuter (tous par défaut)
+        sizes: Nombres de connexions du balayage en taille
+        qubits: Nombres de qubits du balayage en qubits
+        repeat: Mesures par point
+        warmup: Exécutions non mesurées par point
+        max_seconds: Durée médiane au-delà de laquelle le balayage s'arrête
+        log: Fonction d'affichage de la progression
+
+    Returns:
+        Environnement et liste des résultats par point
+    """
+    # Même répertoire de travail que run.py (racine du dépôt), pour les chemins de static/
+    os.chdir(os.path.dirname(SERVER_DIR))
+
+    results = []
+    for case in cases or list(CASES):
+        too_slow = set()
+        for point in _points(case, list(sizes), list(qubits)):
+            entry = {"case": case, **point}
+            if point["axis"] in too_slow:
+                entry["status"] = "skipped"
+            else:
+                try:
+                    entry.update(measure(case, point["size"], point["qubits"], repeat, warmup))
+                    entry["status"] = "ok"
+                    if entry["median_seconds"] > max_seconds:
+                        too_slow.add(point["axis"])
+                except Exception as e:
+                    entry["status"] = "error"
+                    entry["message"] = str(e)
+            results.append(entry)
+            log(_format_entry(entry))
+
+    return {"environment": _environment(), "results": results}
+
+
+def _format_entry(entry: Dict[str, Any]) -> str:
+    label = f"{entry['case']:<22} n={entry['size']:<7} q={entry['qubits']:<3}"
+    if entry["status"] != "ok":
+        return f"{label} {entry['status']}" + (f": {entry['message']}" if "message" in entry else "")
+    line = f"{label} {entry['median_seconds']:.4f} s (min {entry['min_seconds']:.4f} s)"
+    if "render_median_seconds" in entry:
+        line += f" + rendu {entry['render_median_seconds']:.4f} s"
+    if "render_errors" in entry:
+        line += f" ({len(entry['render_errors'])} erreur(s) de rendu)"
+    return line
+
+
+def _key(entry: Dict[str, Any]) -> tuple:
+    return entry["case"], entry["axis"], entry["size"], entry["qubits"]
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD,
+            min_delta: float = DEFAULT_MIN_DELTA) -> Dict[str, Any]:
+    """
+    Compare deux fichiers de résultats point par point.
+
+    Un point régresse si sa médiane dépasse celle de référence de plus de
+    threshold (relatif) et de plus de min_delta secondes (bruit des cas courts).
+    Un point mesuré dans la référence mais en erreur ou sauté ensuite régresse aussi.
+
+    Args:
+        baseline: Résultats de référence
+        current: Nouveaux résultats
+        threshold: Hausse relative tolérée
+        min_delta: Hausse absolue tolérée (secondes)
+
+    Returns:
+        Comparaisons par point, régressions et verdict global
+    """
+    reference = {_key(entry): entry for entry in baseline["results"]}
+    comparisons = []
+    for entry in current["results"]:
+        base = reference.get(_key(entry))
+        if base is None or base["status"] != "ok":
+            continue
+        item = {"case": entry["case"], "axis": entry["axis"], "size": entry["size"], "qubits": entry["qubits"],
+                "baseline_seconds": base["median_seconds"]}
+        if entry["status"] != "ok":
+            item.update(current_seconds=None, ratio=None, regression=True)
+        else:
+            ratio = entry["median_seconds"] / base["median_seconds"] if base["median_seconds"] > 0 else float("inf")
+            item.update(
+                current_seconds=entry["median_seconds"],
+                ratio=round(ratio, 3),
+                regression=(ratio > 1 + threshold and entry["median_seconds"] - base["median_seconds"] > min_delta)
+            )
+        comparisons.append(item)
+
+    regressions = [item for item in comparisons if item["regression"]]
+    return {
+        "threshold": threshold,
+        "min_delta": min_delta,
+        "comparisons": comparisons,
+        "regressions": regressions,
+        "passed": not regressions
+    }
+
+
+def _parse_list(value: str) -> List[int]:
+    return [int(float(item)) for item in value.split(",") if item]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins critiques de QuantumEyes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Exécute les benchmarks et écrit les résultats JSON")
+    run_parser.add_argument('--output', default="benchmark_results.json")
+    run_parser.add_argument('--cases', default=",".join(CASES), help="Cas séparés par des virgules")
+    run_parser.add_argument('--sizes', default=",".join(str(size) for size in DEFAULT_SIZES))
+    run_parser.add_argument('--qubits', default=",".join(str(q) for q in DEFAULT_QUBITS))
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--warmup', type=int, default=1)
+    run_parser.add_argument('--max-seconds', type=float, default=DEFAULT_MAX_SECONDS)
+
+    compare_parser = commands.add_parser("compare", help="Compare deux fichiers de résultats")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA)
+    compare_parser.add_argument('--json', action='store_true', help="Sortie JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        output = os.path.abspath(args.output)
+        cases = [case for case in args.cases.split(",") if case]
+        unknown = [case for case in cases if case not in CASES]
+        if unknown:
+            parser.error(f"cas inconnus: {', '.join(unknown)} (disponibles: {', '.join(CASES)})")
+        report = run_benchmarks(cases, _parse_list(args.sizes), _parse_list(args.qubits),
+                                args.repeat, args.warmup, args.max_seconds)
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Résultats écrits dans {output}")
+        sys.exit(0 if all(entry["status"] != "error" for entry in report["results"]) else 1)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    report = compare(baseline, current, args.threshold, args.min_delta)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for item in report["comparisons"]:
+            label = f"{item['case']:<22} n={item['size']:<7} q={item['qubits']:<3}"
+            if item["current_seconds"] is None:
+                print(f"{label} {item['baseline_seconds']:.4f} s -> absent  RÉGRESSION")
+                continue
+            verdict = "RÉGRESSION" if item["regression"] else "OK"
+            print(f"{label} {item['baseline_seconds']:.4f} s -> {item['current_seconds']:.4f} s "
+                  f"(x{item['ratio']:.2f}) {verdict}")
+    sys.exit(0 if report["passed"] else 1)
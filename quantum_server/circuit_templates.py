@@ -0,0 +1,166 @@
+"""
+QuantumEyes - Cache de circuits paramétrés
+
+Ce module construit les circuits QML (feature map + ansatz + mesures) sous
+forme de modèles paramétrés, transpilés une seule fois par configuration
+(num_qubits, reps, feature_map, ansatz, cible) et conservés dans un cache.
+Les données ne sont plus écrites comme angles littéraux dans un circuit par
+échantillon: un lot entier devient une matrice de valeurs de paramètres,
+liée en un seul appel par les primitives (PUB circuit + valeurs).
+"""
+
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Portes de base utilisées lorsqu'aucun backend cible n'est fourni
+DEFAULT_BASIS_GATES = ("rz", "sx", "x", "cx")
+
+# Nombre maximal de modèles transpilés conservés
+MAX_CACHED_TEMPLATES = 32
+
+
+def _build_feature_map(name: str, num_qubits: int, reps: int):
+    """Construit la feature map (fonctions de Qiskit >= 2.1, classes sinon)."""
+    try:
+        from qiskit.circuit.library import zz_feature_map, pauli_feature_map
+        builders = {"zz": zz_feature_map, "pauli": pauli_feature_map}
+    except ImportError:
+        from qiskit.circuit.library import ZZFeatureMap, PauliFeatureMap
+        builders = {"zz": ZZFeatureMap, "pauli": PauliFeatureMap}
+    return builders.get(name, builders["zz"])(num_qubits, reps=reps)
+
+
+def _build_ansatz(name: str, num_qubits: int, reps: int):
+    """Construit l'ansatz (fonctions de Qiskit >= 2.1, classes sinon)."""
+    try:
+        from qiskit.circuit.library import real_amplitudes, efficient_su2
+        builders = {"real": real_amplitudes, "efficient": efficient_su2}
+    except ImportError:
+        from qiskit.circuit.library import RealAmplitudes, EfficientSU2
+        builders = {"real": RealAmplitudes, "efficient": EfficientSU2}
+    return builders.get(name, builders["real"])(num_qubits, reps=reps)
+
+
+def _target_name(target: Any) -> str:
+    """Nom de la cible de transpilation utilisé dans la clé du cache."""
+    if target is None:
+        return "basis:" + ",".join(DEFAULT_BASIS_GATES)
+    return str(getattr(target, "name", target))
+
+
+class CircuitTemplate:
+    """Circuit paramétré transpilé, avec la correspondance données -> paramètres."""
+
+    def __init__(self, key: Tuple, feature_map, ansatz, circuit):
+        self.key = key
+        self.feature_map = feature_map
+        self.ansatz = ansatz
+        self.circuit = circuit
+
+        # Colonne de chaque paramètre dans l'ordre de circuit.parameters
+        columns = {param: i for i, param in enumerate(circuit.parameters)}
+        self.num_parameters = len(columns)
+        self.num_features = feature_map.num_parameters
+        self.num_weights = ansatz.num_parameters
+        self._feature_columns = np.array([columns.get(p, -1) for p in feature_map.parameters], dtype=np.int64)
+        self._weight_columns = np.array([columns.get(p, -1) for p in ansatz.parameters], dtype=np.int64)
+
+    def parameter_values(self, features: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Construit la matrice des valeurs de paramètres d'un lot.
+
+        Args:
+            features: Matrice (B, num_features) des angles encodés
+            weights: Poids de l'ansatz, (num_weights,) partagés ou (B, num_weights) (zéros par défaut)
+
+        Returns:
+            Matrice (B, num_parameters) dans l'ordre de circuit.parameters
+        """
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        values = np.zeros((len(features), self.num_parameters))
+
+        used = self._feature_columns >= 0
+        values[:, self._feature_columns[used]] = features[:, :self.num_features][:, used]
+        if weights is not None:
+            used = self._weight_columns >= 0
+            weights = np.broadcast_to(np.asarray(weights, dtype=np.float64), (len(features), self.num_weights))
+            values[:, self._weight_columns[used]] = weights[:, used]
+        return values
+
+    def pub(self, features: np.ndarray, weights: Optional[np.ndarray] = None) -> Tuple[Any, np.ndarray]:
+        """Retourne le PUB (circuit, valeurs) d'un lot, à soumettre en un seul appel."""
+        return self.circuit, self.parameter_values(features, weights)
+
+    def bind(self, features: np.ndarray, weights: Optional[np.ndarray] = None):
+        """Retourne le circuit lié pour un seul échantillon (visualisation)."""
+        return self.circuit.assign_parameters(self.parameter_values(features, weights)[0])
+
+
+class TemplateCache:
+    """Cache LRU des circuits paramétrés transpilés."""
+
+    def __init__(self, max_templates: int = MAX_CACHED_TEMPLATES):
+        self.max_templates = max_templates
+        self._templates: "OrderedDict[Tuple, CircuitTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, num_qubits: int, reps: int, feature_map: str, ansatz: str, target: Any = None) -> CircuitTemplate:
+        """
+        Retourne le modèle d'une configuration, en le transpilant au premier appel.
+
+        Args:
+            num_qubits: Nombre de qubits
+            reps: Répétitions de la feature map et de l'ansatz
+            feature_map: Nom de la feature map ('zz', 'pauli')
+            ansatz: Nom de l'ansatz ('real', 'efficient')
+            target: Backend cible de la transpilation (None: portes de base génériques)
+
+        Returns:
+            Le modèle transpilé
+        """
+        key = (num_qubits, reps, feature_map, ansatz, _target_name(target))
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        template = self._build(key, target)
+        with self._lock:
+            self._templates[key] = template
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+        return template
+
+    def _build(self, key: Tuple, target: Any) -> CircuitTemplate:
+        from qiskit import transpile
+
+        num_qubits, reps, feature_map_name, ansatz_name, _ = key
+        feature_map = _build_feature_map(feature_map_name, num_qubits, reps)
+        ansatz = _build_ansatz(ansatz_name, num_qubits, reps)
+        circuit = feature_map.compose(ansatz)
+        circuit.measure_all()
+
+        if target is None:
+            compiled = transpile(circuit, basis_gates=list(DEFAULT_BASIS_GATES), optimization_level=1)
+        else:
+            compiled = transpile(circuit, backend=target, optimization_level=1)
+        return CircuitTemplate(key, feature_map, ansatz, compiled)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"templates": len(self._templates), "hits": self.hits, "misses": self.misses}
+
+
+# Cache partagé par le service et les visualisations
+template_cache = TemplateCache()
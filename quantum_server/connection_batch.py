@@ -0,0 +1,282 @@
+"""
+QuantumEyes - Lot de connexions en colonnes
+
+Ce module fournit ConnectionBatch, une représentation en colonnes NumPy des
+connexions réseau. Les adresses IP sont internées en identifiants entiers et
+les protocoles encodés en catégories, ce qui évite de manipuler des listes de
+dictionnaires dans le graphe, l'extraction de caractéristiques et le scoring.
+"""
+
+import numbers
+import warnings
+import numpy as np
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Sequence, Union
+
+# Protocoles connus, encodés par leur position
+KNOWN_PROTOCOLS = ["TCP", "UDP", "ICMP", "HTTP", "HTTPS", "DNS", "NTP"]
+
+
+def parse_timestamp(value: Union[str, int, float]) -> float:
+    """
+    Convertit un timestamp de connexion en secondes.
+
+    Les chaînes ISO 8601 sans fuseau sont interprétées en UTC, comme dans
+    le chemin vectorisé de ConnectionBatch.
+
+    Args:
+        value: Nombre (secondes) ou chaîne ISO 8601
+
+    Returns:
+        Timestamp en secondes
+    """
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return float(value)
+
+
+def _parse_timestamps(values: List[Any]) -> np.ndarray:
+    """Convertit une colonne de timestamps en secondes (NaN si absent)."""
+    if all(isinstance(v, numbers.Real) for v in values):
+        return np.array(values, dtype=np.float64)
+
+    if all(isinstance(v, str) for v in values):
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                parsed = np.array(values, dtype="datetime64[us]")
+            return parsed.astype(np.int64) / 1e6
+        except (ValueError, DeprecationWarning, UserWarning):
+            pass
+
+    return np.array([np.nan if v is None else parse_timestamp(v) for v in values], dtype=np.float64)
+
+
+def count_distinct(groups: np.ndarray, values: np.ndarray, num_groups: int) -> np.ndarray:
+    """
+    Compte les valeurs distinctes de chaque groupe.
+
+    Args:
+        groups: Identifiant de groupe de chaque ligne (entiers >= 0)
+        values: Valeur de chaque ligne (entiers >= 0)
+        num_groups: Nombre total de groupes
+
+    Returns:
+        Tableau (num_groups,) du nombre de valeurs distinctes par groupe
+    """
+    if len(groups) == 0:
+        return np.zeros(num_groups, dtype=np.int64)
+    values = values.astype(np.int64)
+    keys = groups.astype(np.int64) * (int(values.max()) + 1) + values
+    distinct = np.unique(keys) // (int(values.max()) + 1)
+    return np.bincount(distinct, minlength=num_groups)
+
+
+class ConnectionBatch:
+    """Lot de connexions réseau stocké en colonnes NumPy."""
+
+    def __init__(self, ips: List[str], source_ids: np.ndarray, destination_ids: np.ndarray,
+                 protocol_codes: np.ndarray, source_ports: np.ndarray, destination_ports: np.ndarray,
+                 packet_sizes: np.ndarray, timestamps: Optional[np.ndarray] = None,
+                 is_anomaly: Optional[np.ndarray] = None, protocols: Optional[List[str]] = None,
+                 iso_timestamps: bool = False):
+        self.ips = ips
+        self.protocols = list(KNOWN_PROTOCOLS) if protocols is None else protocols
+        self.source_ids = source_ids
+        self.destination_ids = destination_ids
+        self.protocol_codes = protocol_codes
+        self.source_ports = source_ports
+        self.destination_ports = destination_ports
+        self.packet_sizes = packet_sizes
+        self.timestamps = timestamps
+        self.is_anomaly = is_anomaly
+        self.iso_timestamps = iso_timestamps
+        self._ip_array = None
+
+    def __len__(self) -> int:
+        return len(self.source_ids)
+
+    @property
+    def num_ips(self) -> int:
+        return len(self.ips)
+
+    @property
+    def ip_array(self) -> np.ndarray:
+        """Tableau des adresses IP indexé par identifiant."""
+        if self._ip_array is None:
+            self._ip_array = np.array(self.ips, dtype=object)
+        return self._ip_array
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]], ips: Optional[List[str]] = None,
+                     protocols: Optional[List[str]] = None) -> "ConnectionBatch":
+        """
+        Convertit une liste de connexions (dictionnaires JSON) en lot.
+
+        Args:
+            records: Liste de connexions réseau
+            ips: Table d'IPs existante à compléter (partagée avec le lot retourné)
+            protocols: Table de protocoles existante à compléter (idem)
+
+        Returns:
+            Le lot en colonnes
+        """
+        if isinstance(records, ConnectionBatch):
+            return records
+
+        ips = [] if ips is None else ips
+        protocols = list(KNOWN_PROTOCOLS) if protocols is None else protocols
+        ip_ids = {ip: i for i, ip in enumerate(ips)}
+        protocol_ids = {proto: i for i, proto in enumerate(protocols)}
+        n = len(records)
+        source_ids = np.empty(n, dtype=np.int32)
+        destination_ids = np.empty(n, dtype=np.int32)
+        protocol_codes = np.empty(n, dtype=np.int16)
+
+        # Une seule passe sur les dictionnaires; les IPs sont internées dans l'ordre d'apparition
+        for i, conn in enumerate(records):
+            source_ids[i] = ip_ids.setdefault(conn.get('source_ip', ''), len(ip_ids))
+            destination_ids[i] = ip_ids.setdefault(conn.get('destination_ip', ''), len(ip_ids))
+            proto = conn.get('protocol', '')
+            code = protocol_ids.get(proto)
+            if code is None:
+                code = protocol_ids[proto] = len(protocols)
+                protocols.append(proto)
+            protocol_codes[i] = code
+
+        def column(key, dtype):
+            return np.array([conn.get(key, 0) or 0 for conn in records], dtype=dtype)
+
+        timestamps = None
+        iso_timestamps = False
+        if n and 'timestamp' in records[0]:
+            raw = [conn.get('timestamp') for conn in records]
+            iso_timestamps = isinstance(raw[0], str)
+            timestamps = _parse_timestamps(raw)
+
+        is_anomaly = None
+        if n and 'is_anomaly' in records[0]:
+            is_anomaly = np.array([bool(conn.get('is_anomaly', False)) for conn in records])
+
+        # Les tables partagées sont complétées en place: les identifiants existants restent valides
+        ips.extend(list(ip_ids)[len(ips):])
+        return cls(
+            ips=ips,
+            source_ids=source_ids,
+            destination_ids=destination_ids,
+            protocol_codes=protocol_codes,
+            source_ports=column('source_port', np.int32),
+            destination_ports=column('destination_port', np.int32),
+            packet_sizes=column('packet_size', np.int32),
+            timestamps=timestamps,
+            is_anomaly=is_anomaly,
+            protocols=protocols,
+            iso_timestamps=iso_timestamps
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["ConnectionBatch"]) -> "ConnectionBatch":
+        """
+        Concatène des lots partageant la même table d'IPs et de protocoles.
+
+        Args:
+            batches: Lots à concaténer, dans l'ordre
+
+        Returns:
+            Le lot concaténé
+        """
+        first = batches[0]
+        if any(b.ips is not first.ips or b.protocols != first.protocols for b in batches):
+            raise ValueError("Les lots doivent partager la même table d'IPs et de protocoles")
+
+        def join(name):
+            columns = [getattr(b, name) for b in batches]
+            return None if any(c is None for c in columns) else np.concatenate(columns)
+
+        return cls(
+            ips=first.ips,
+            source_ids=join('source_ids'),
+            destination_ids=join('destination_ids'),
+            protocol_codes=join('protocol_codes'),
+            source_ports=join('source_ports'),
+            destination_ports=join('destination_ports'),
+            packet_sizes=join('packet_sizes'),
+            timestamps=join('timestamps'),
+            is_anomaly=join('is_anomaly'),
+            protocols=first.protocols,
+            iso_timestamps=first.iso_timestamps
+        )
+
+    def take(self, indices: Union[np.ndarray, slice]) -> "ConnectionBatch":
+        """Retourne le sous-lot des lignes sélectionnées (les IPs restent partagées)."""
+        pick = lambda column: None if column is None else column[indices]
+        return ConnectionBatch(
+            ips=self.ips,
+            source_ids=self.source_ids[indices],
+            destination_ids=self.destination_ids[indices],
+            protocol_codes=self.protocol_codes[indices],
+            source_ports=self.source_ports[indices],
+            destination_ports=self.destination_ports[indices],
+            packet_sizes=self.packet_sizes[indices],
+            timestamps=pick(self.timestamps),
+            is_anomaly=pick(self.is_anomaly),
+            protocols=self.protocols,
+            iso_timestamps=self.iso_timestamps
+        )
+
+    def compacted(self) -> "ConnectionBatch":
+        """Retourne le lot avec sa propre table d'IPs, réduite aux adresses référencées."""
+        n = len(self)
+        used, inverse = np.unique(np.concatenate([self.source_ids, self.destination_ids]), return_inverse=True)
+        inverse = inverse.astype(np.int32)
+        return ConnectionBatch(
+            ips=self.ip_array[used].tolist(),
+            source_ids=inverse[:n],
+            destination_ids=inverse[n:],
+            protocol_codes=self.protocol_codes,
+            source_ports=self.source_ports,
+            destination_ports=self.destination_ports,
+            packet_sizes=self.packet_sizes,
+            timestamps=self.timestamps,
+            is_anomaly=self.is_anomaly,
+            protocols=list(self.protocols),
+            iso_timestamps=self.iso_timestamps
+        )
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """Retourne la connexion i sous forme de dictionnaire."""
+        return self.to_records(slice(i, i + 1))[0]
+
+    def to_records(self, indices: Union[np.ndarray, slice, None] = None) -> List[Dict[str, Any]]:
+        """
+        Convertit le lot (ou une sélection de lignes) en liste de dictionnaires.
+
+        Args:
+            indices: Lignes à convertir (toutes par défaut)
+
+        Returns:
+            Liste de connexions réseau
+        """
+        batch = self if indices is None else self.take(indices)
+        columns = {
+            "source_ip": batch.ip_array[batch.source_ids].tolist(),
+            "destination_ip": batch.ip_array[batch.destination_ids].tolist(),
+            "protocol": np.array(batch.protocols, dtype=object)[batch.protocol_codes].tolist(),
+            "source_port": batch.source_ports.tolist(),
+            "destination_port": batch.destination_ports.tolist()
+        }
+        if batch.timestamps is not None:
+            if batch.iso_timestamps:
+                instants = (batch.timestamps * 1e6).astype("datetime64[us]")
+                columns["timestamp"] = np.datetime_as_string(instants).tolist()
+            else:
+                columns["timestamp"] = batch.timestamps.tolist()
+        columns["packet_size"] = batch.packet_sizes.tolist()
+        if batch.is_anomaly is not None:
+            columns["is_anomaly"] = batch.is_anomaly.tolist()
+
+        keys = list(columns)
+        return [dict(zip(keys, row)) for row in zip(*columns.values())]
@@ -4,13 +4,23 @@ Ce module génère des données réseau synthétiques pour tester et entraîner
 l'algorithme QML de détection d'anomalies.
 """
 
+import math
 import random
 import numpy as np
 import networkx as nx
+from collections import deque
 from datetime import datetime, timedelta
 import json
 import os
 
+from connection_batch import ConnectionBatch, KNOWN_PROTOCOLS, count_distinct, parse_timestamp
+
+# Fenêtres glissantes par défaut (en secondes) de l'extracteur en flux
+DEFAULT_WINDOWS = (10, 60, 300)
+
+# Taille maximale d'un incident (un attaquant, une cible) en mode volumique
+DEFAULT_INCIDENT_SIZE = 1000
+
 class NetworkDataGenerator:
     """Générateur de données réseau synthétiques pour QuantumEyes."""
     
@@ -39,6 +49,13 @@ class NetworkDataGenerator:
         
         # Protocoles courants
         self.protocols = ["TCP", "UDP", "ICMP", "HTTP", "HTTPS", "DNS", "NTP"]
+        
+        # Table d'IPs partagée par les lots du mode volumique
+        self.bulk_ips = self.internal_ips + self.external_ips + self.malicious_ips
+        self._internal_ids = np.arange(len(self.internal_ips))
+        self._attacker_ids = np.arange(len(self.internal_ips), len(self.bulk_ips))
+        self._malicious_ids = np.arange(len(self.bulk_ips) - len(self.malicious_ips), len(self.bulk_ips))
+        self._protocol_codes = np.array([KNOWN_PROTOCOLS.index(p) for p in self.protocols])
     
     def generate_normal_traffic(self, num_connections=50):
         """
@@ -205,54 +222,359 @@ class NetworkDataGenerator:
         
         return all_data, labels
     
+    def _bulk_batch(self, src, dst, protocols, dst_ports, sizes, timestamps, is_anomaly, rng):
+        """Assemble les colonnes générées en un ConnectionBatch."""
+        n = len(src)
+        return ConnectionBatch(
+            ips=self.bulk_ips,
+            source_ids=src.astype(np.int32),
+            destination_ids=dst.astype(np.int32),
+            protocol_codes=protocols.astype(np.int16),
+            source_ports=rng.integers(49152, 65536, n, dtype=np.int32),  # Ports éphémères
+            destination_ports=dst_ports.astype(np.int32),
+            packet_sizes=sizes.astype(np.int32),
+            timestamps=timestamps,
+            is_anomaly=np.full(n, is_anomaly),
+            protocols=list(KNOWN_PROTOCOLS),
+            iso_timestamps=True
+        )
+    
+    def generate_normal_traffic_bulk(self, num_connections, rng, now):
+        """
+        Génère du trafic normal en colonnes (mode volumique).
+        
+        Args:
+            num_connections (int): Nombre de connexions à générer
+            rng (np.random.Generator): Générateur aléatoire
+            now (float): Timestamp de référence en secondes
+            
+        Returns:
+            ConnectionBatch: Lot de connexions normales
+        """
+        n = num_connections
+        num_internal = len(self.internal_ips)
+        src = rng.integers(0, num_internal, n)
+        
+        # 80% vers des IPs externes, sinon une autre IP interne (décalage pour exclure la source)
+        external = rng.random(n) < 0.8
+        other = rng.integers(0, num_internal - 1, n)
+        other += other >= src
+        dst = np.where(external, self._attacker_ids[rng.integers(0, len(self.external_ips), n)], other)
+        
+        # HTTP et HTTPS utilisent leur port standard, les autres un port courant
+        protocols = self._protocol_codes[rng.integers(0, len(self.protocols), n)]
+        ports = np.asarray(self.common_ports)[rng.integers(0, len(self.common_ports), n)]
+        ports = np.where(protocols == KNOWN_PROTOCOLS.index("HTTP"), 80, ports)
+        ports = np.where(protocols == KNOWN_PROTOCOLS.index("HTTPS"), 443, ports)
+        
+        timestamps = now - 60.0 * rng.integers(0, 61, n)
+        sizes = rng.integers(64, 1501, n)
+        return self._bulk_batch(src, dst, protocols, ports, sizes, timestamps, False, rng)
+    
+    def generate_anomalous_traffic_bulk(self, num_connections, anomaly_type, rng, now,
+                                        incident_size=DEFAULT_INCIDENT_SIZE):
+        """
+        Génère du trafic anormal en colonnes (mode volumique).
+        
+        Même sémantique que generate_anomalous_traffic, découpée en incidents
+        d'au plus incident_size connexions ayant chacun leur attaquant et leur cible.
+        
+        Args:
+            num_connections (int): Nombre de connexions à générer
+            anomaly_type (str): Type d'anomalie (port_scan, ddos, data_exfil)
+            rng (np.random.Generator): Générateur aléatoire
+            now (float): Timestamp des connexions en secondes
+            incident_size (int): Nombre maximal de connexions par incident
+            
+        Returns:
+            ConnectionBatch: Lot de connexions anormales
+        """
+        n = num_connections
+        incident = np.arange(n) // incident_size
+        num_incidents = int(incident[-1]) + 1 if n else 0
+        timestamps = np.full(n, now)
+        internal_targets = rng.integers(0, len(self.internal_ips), num_incidents)
+        
+        def pick(choices, size):
+            return np.asarray(choices)[rng.integers(0, len(choices), size)]
+        
+        if anomaly_type == "port_scan":
+            # Un attaquant scanne des ports consécutifs d'une cible interne
+            attackers = pick(self._attacker_ids, num_incidents)
+            start_ports = rng.integers(1, 1001, num_incidents)
+            src = attackers[incident]
+            dst = internal_targets[incident]
+            ports = start_ports[incident] + np.arange(n) % incident_size
+            protocols = np.full(n, KNOWN_PROTOCOLS.index("TCP"))
+            sizes = np.full(n, 64)  # Petits paquets typiques d'un scan
+        
+        elif anomaly_type == "ddos":
+            # Plusieurs IPs sources attaquent le même port d'une cible interne
+            target_ports = pick(self.common_ports, num_incidents)
+            src = pick(self._attacker_ids, n)
+            dst = internal_targets[incident]
+            ports = target_ports[incident]
+            protocols = pick([KNOWN_PROTOCOLS.index(p) for p in ("TCP", "UDP", "ICMP")], n)
+            sizes = rng.integers(64, 1501, n)
+        
+        elif anomaly_type == "data_exfil":
+            # Une IP interne envoie de gros paquets vers une IP malveillante
+            src = internal_targets[incident]
+            dst = pick(self._malicious_ids, num_incidents)[incident]
+            ports = np.where(rng.random(n) < 0.7, 443, 53)
+            protocols = pick([KNOWN_PROTOCOLS.index(p) for p in ("HTTP", "HTTPS", "DNS")], n)
+            sizes = rng.integers(1000, 8001, n)  # Paquets plus grands
+        
+        else:
+            raise ValueError(f"Type d'anomalie inconnu: {anomaly_type}")
+        
+        return self._bulk_batch(src, dst, protocols, ports, sizes, timestamps, True, rng)
+    
+    def generate_bulk_dataset(self, normal_count=1_000_000, anomaly_count=100_000, seed=None,
+                              as_records=False, incident_size=DEFAULT_INCIDENT_SIZE):
+        """
+        Génère un grand jeu de données étiqueté, colonne par colonne.
+        
+        Équivalent volumique de generate_mixed_dataset pour les tests de charge:
+        chaque colonne est tirée en une fois avec un np.random.Generator initialisé
+        par seed, ce qui rend le jeu de données reproductible.
+        
+        Args:
+            normal_count (int): Nombre de connexions normales
+            anomaly_count (int): Nombre de connexions anormales
+            seed (int): Graine du générateur aléatoire
+            as_records (bool): Si True, retourne une liste de dictionnaires
+            incident_size (int): Nombre maximal de connexions par incident
+            
+        Returns:
+            ConnectionBatch | tuple: Lot mélangé (étiquettes dans is_anomaly),
+            ou (données, étiquettes) au format de generate_mixed_dataset
+        """
+        rng = np.random.default_rng(seed)
+        now = parse_timestamp(datetime.now().isoformat())
+        
+        parts = [self.generate_normal_traffic_bulk(normal_count, rng, now)]
+        anomaly_types = ["port_scan", "ddos", "data_exfil"]
+        for anomaly_type in anomaly_types:
+            count = anomaly_count // len(anomaly_types)
+            parts.append(self.generate_anomalous_traffic_bulk(count, anomaly_type, rng, now, incident_size))
+        
+        # Combiner et mélanger les données
+        batch = ConnectionBatch.concat(parts)
+        batch = batch.take(rng.permutation(len(batch)))
+        
+        if as_records:
+            return batch.to_records(), batch.is_anomaly.astype(int).tolist()
+        return batch
+    
     def extract_features_for_classical_ml(self, connections):
         """
         Extrait des caractéristiques pour l'apprentissage machine classique.
         Utile pour comparer les performances avec le QML.
         
         Args:
-            connections (list): Liste des connexions réseau
+            connections (list | ConnectionBatch): Connexions réseau
             
         Returns:
             np.array: Matrice de caractéristiques
         """
-        features = []
+        batch = ConnectionBatch.from_records(connections)
+        if len(batch) == 0:
+            return np.array([])
         
-        # Regrouper les connexions par source_ip
-        connections_by_source = {}
-        for conn in connections:
-            src = conn["source_ip"]
-            if src not in connections_by_source:
-                connections_by_source[src] = []
-            connections_by_source[src].append(conn)
-        
-        # Pour chaque adresse IP source, extraire des statistiques
-        for src_ip, conns in connections_by_source.items():
-            # Nombre de destinations uniques
-            unique_dests = len(set(c["destination_ip"] for c in conns))
-            
-            # Nombre de ports uniques
-            unique_ports = len(set(c["destination_port"] for c in conns))
-            
-            # Taille moyenne des paquets
-            avg_packet_size = np.mean([c["packet_size"] for c in conns])
-            
-            # Ratio ports/connexions
-            port_conn_ratio = unique_ports / len(conns) if len(conns) > 0 else 0
-            
-            # Caractéristiques par source IP
-            feature_vector = [
-                len(conns),           # Nombre de connexions
-                unique_dests,         # Nombre de destinations uniques
-                unique_ports,         # Nombre de ports uniques
-                avg_packet_size,      # Taille moyenne des paquets
-                port_conn_ratio       # Ratio ports/connexions
-            ]
+        # Regrouper les connexions par source_ip, dans l'ordre d'apparition
+        sources, first_index, source_rows = np.unique(
+            batch.source_ids, return_index=True, return_inverse=True
+        )
+        order = np.argsort(first_index)
+        num_sources = len(sources)
+        
+        # Nombre de connexions et taille moyenne des paquets par source
+        counts = np.bincount(source_rows, minlength=num_sources)
+        avg_packet_size = np.bincount(source_rows, weights=batch.packet_sizes, minlength=num_sources) / counts
+        
+        # Nombre de destinations et de ports uniques par source
+        unique_dests = count_distinct(source_rows, batch.destination_ids, num_sources)
+        unique_ports = count_distinct(source_rows, batch.destination_ports, num_sources)
+        
+        # Caractéristiques par source IP
+        features = np.column_stack([
+            counts,               # Nombre de connexions
+            unique_dests,         # Nombre de destinations uniques
+            unique_ports,         # Nombre de ports uniques
+            avg_packet_size,      # Taille moyenne des paquets
+            unique_ports / counts # Ratio ports/connexions
+        ])
+        
+        return features[order]
+
+class _SourceWindowStats:
+    """Statistiques d'une adresse IP source dans une fenêtre glissante."""
+    
+    __slots__ = ("count", "size_sum", "dest_counts", "port_counts")
+    
+    def __init__(self):
+        self.count = 0
+        self.size_sum = 0.0
+        self.dest_counts = {}
+        self.port_counts = {}
+
+class StreamingFeatureExtractor:
+    """
+    Version incrémentale de extract_features_for_classical_ml.
+    
+    Maintient, pour chaque fenêtre glissante, les statistiques par adresse IP
+    source. Chaque connexion entre une fois et sort une fois de chaque fenêtre,
+    ce qui donne une mise à jour en O(1) amorti par connexion. L'expiration
+    suit le plus grand timestamp observé (watermark). Une connexion en retard
+    est ramenée au watermark pour garder chaque fenêtre triée; elle est
+    ignorée par les fenêtres dont elle est déjà sortie (compteur late_events).
+    """
+    
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        """
+        Initialise l'extracteur.
+        
+        Args:
+            windows (tuple): Durées des fenêtres glissantes en secondes
+        """
+        self.windows = tuple(windows)
+        self.watermark = float("-inf")
+        self.late_events = 0
+        self._events = {window: deque() for window in self.windows}
+        self._stats = {window: {} for window in self.windows}
+    
+    def add(self, connection):
+        """
+        Ajoute une connexion à toutes les fenêtres.
+        
+        Args:
+            connection (dict): Connexion réseau avec un champ timestamp
+        """
+        self._add_event((
+            parse_timestamp(connection["timestamp"]),
+            connection["source_ip"],
+            connection["destination_ip"],
+            connection["destination_port"],
+            connection["packet_size"]
+        ))
+    
+    def _add_event(self, event):
+        """Ajoute un événement (timestamp, source, destination, port, taille)."""
+        timestamp = event[0]
+        if not math.isfinite(timestamp):
+            raise ValueError(f"Horodatage de connexion invalide: {timestamp}")
+        if timestamp < self.watermark:
+            self.late_events += 1
+            # Horodatage ramené au watermark: les files restent triées pour l'expiration
+            event = (self.watermark,) + tuple(event[1:])
+        else:
+            self.watermark = timestamp
+        
+        for window in self.windows:
+            if timestamp <= self.watermark - window:
+                # Déjà sortie de cette fenêtre
+                continue
+            stats = self._stats[window].get(event[1])
+            if stats is None:
+                stats = self._stats[window][event[1]] = _SourceWindowStats()
+            stats.count += 1
+            stats.size_sum += event[4]
+            stats.dest_counts[event[2]] = stats.dest_counts.get(event[2], 0) + 1
+            stats.port_counts[event[3]] = stats.port_counts.get(event[3], 0) + 1
+            self._events[window].append(event)
+            self._expire(window)
+    
+    def add_many(self, connections):
+        """Ajoute une séquence de connexions."""
+        for connection in connections:
+            self.add(connection)
+    
+    def add_batch(self, batch):
+        """
+        Ajoute un lot de connexions en colonnes sans reconstruire de dictionnaires.
+        
+        Args:
+            batch (ConnectionBatch): Lot de connexions horodatées
+        """
+        ips = batch.ip_array
+        rows = zip(
+            batch.timestamps.tolist(),
+            ips[batch.source_ids].tolist(),
+            ips[batch.destination_ids].tolist(),
+            batch.destination_ports.tolist(),
+            batch.packet_sizes.tolist()
+        )
+        for event in rows:
+            self._add_event(event)
+    
+    def _expire(self, window):
+        """Retire d'une fenêtre les connexions plus anciennes que sa durée."""
+        events = self._events[window]
+        sources = self._stats[window]
+        horizon = self.watermark - window
+        
+        while events and events[0][0] <= horizon:
+            _, src, dst, port, size = events.popleft()
+            stats = sources[src]
+            stats.count -= 1
+            stats.size_sum -= size
+            _decrement(stats.dest_counts, dst)
+            _decrement(stats.port_counts, port)
+            if stats.count == 0:
+                del sources[src]
+    
+    def advance(self, now):
+        """
+        Avance l'horloge sans nouvelle connexion et expire les fenêtres.
+        
+        Args:
+            now: Timestamp courant (nombre ou chaîne ISO 8601)
+        """
+        self.watermark = max(self.watermark, parse_timestamp(now))
+        for window in self.windows:
+            self._expire(window)
+    
+    def source_ips(self, window=None):
+        """Retourne les adresses IP sources actives dans la fenêtre, dans l'ordre des lignes."""
+        window = self.windows[0] if window is None else window
+        return list(self._stats[window])
+    
+    def extract_features(self, window=None):
+        """
+        Retourne la matrice de caractéristiques d'une fenêtre.
+        
+        Mêmes colonnes que NetworkDataGenerator.extract_features_for_classical_ml,
+        une ligne par adresse IP source active dans la fenêtre.
+        
+        Args:
+            window (int): Durée de la fenêtre (la plus courte par défaut)
             
-            features.append(feature_vector)
+        Returns:
+            np.array: Matrice de caractéristiques
+        """
+        window = self.windows[0] if window is None else window
+        features = []
+        
+        for stats in self._stats[window].values():
+            unique_ports = len(stats.port_counts)
+            features.append([
+                stats.count,
+                len(stats.dest_counts),
+                unique_ports,
+                stats.size_sum / stats.count,
+                unique_ports / stats.count
+            ])
         
         return np.array(features)
 
+def _decrement(counts, key):
+    """Décrémente un compteur et supprime la clé lorsqu'il atteint zéro."""
+    if counts[key] == 1:
+        del counts[key]
+    else:
+        counts[key] -= 1
+
 def generate_sample_data():
     """Génère et sauvegarde un échantillon de données synthétiques pour les tests."""
     generator = NetworkDataGenerator()
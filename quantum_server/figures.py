@@ -0,0 +1,67 @@
+"""
+QuantumEyes - Figures Matplotlib sans état global
+
+pyplot garde une figure « courante » par processus et le style passe par les
+rcParams globaux: deux threads qui dessinent en même temps se corrompent
+mutuellement. Les rendus passent donc par des Figure explicites, chacune
+attachée à son propre canevas Agg, et le style de chaque appel est appliqué
+directement aux artistes (les rcParams ne sont jamais modifiés). Plusieurs
+threads peuvent ainsi rendre en parallèle dans un même processus.
+
+Matplotlib est importé au premier rendu, pas au chargement du module.
+"""
+
+from typing import Optional, Tuple
+
+# Couleur de la grille et des bordures du style "whitegrid"
+GRID_COLOR = '0.8'
+
+# Largeur (pouces) des figures de circuits; la hauteur suit les proportions du circuit
+CIRCUIT_FIGURE_WIDTH = 10.0
+
+
+def new_figure(figsize: Tuple[float, float], facecolor: str = 'white'):
+    """Crée une Figure indépendante de pyplot, attachée à un canevas Agg."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=figsize, facecolor=facecolor)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def style_whitegrid(ax, tick_size: float = 10) -> None:
+    """Applique aux axes le style "whitegrid" (fond blanc, grille et bordures gris clair)."""
+    ax.set_facecolor('white')
+    ax.set_axisbelow(True)
+    ax.grid(True, color=GRID_COLOR)
+    for spine in ax.spines.values():
+        spine.set_color(GRID_COLOR)
+    ax.tick_params(labelsize=tick_size, length=0)
+
+
+def draw_circuit(circuit, title: Optional[str] = None, width: float = CIRCUIT_FIGURE_WIDTH, **draw_options):
+    """
+    Dessine un circuit Qiskit (sortie 'mpl') sur une Figure dédiée.
+
+    Qiskit dessine sur les axes fournis et met textes et traits à l'échelle de
+    leur largeur; la hauteur de la figure est ensuite ajustée aux proportions
+    du circuit, comme pour l'option de style figwidth de Qiskit.
+
+    Args:
+        circuit: Circuit quantique
+        title: Titre de la figure
+        width: Largeur de la figure (pouces)
+        **draw_options: Options de QuantumCircuit.draw (style, fold, ...)
+
+    Returns:
+        La Figure
+    """
+    figure = new_figure((width, width))
+    ax = figure.add_axes((0, 0, 1, 1))
+    circuit.draw(output='mpl', ax=ax, **draw_options)
+    (left, right), (bottom, top) = ax.get_xlim(), ax.get_ylim()
+    figure.set_size_inches(width, width * abs(top - bottom) / abs(right - left))
+    if title:
+        ax.set_title(title, fontsize=16)
+    return figure
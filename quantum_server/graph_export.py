@@ -0,0 +1,130 @@
+"""
+QuantumEyes - Export JSON des graphes de réseau
+
+Ce module sérialise un graphe mis en page sous une forme compacte destinée
+au rendu côté client (NetworkGraph): colonnes de nœuds (identifiant,
+coordonnées, attributs), arêtes par indices de nœuds et regroupements
+précalculés (composantes connexes, sous-réseaux). Aucun rendu Matplotlib
+n'est fait; les coordonnées peuvent être quantifiées en entiers.
+"""
+
+import os
+import ipaddress
+import numpy as np
+import networkx as nx
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Optional, Sequence
+
+# Décimales conservées pour les coordonnées non quantifiées
+LAYOUT_DECIMALS = 4
+
+# Bornes du nombre de bits des coordonnées quantifiées
+MIN_QUANTIZE_BITS = 4
+MAX_QUANTIZE_BITS = 16
+
+# Longueur de préfixe des sous-réseaux de regroupement (IPv4, IPv6)
+SUBNET_PREFIX_V4 = int(os.environ.get('QUANTUM_SUBNET_PREFIX', 24))
+SUBNET_PREFIX_V6 = 64
+
+
+@lru_cache(maxsize=65536)
+def subnet_of(node: Hashable, prefix_v4: int = SUBNET_PREFIX_V4, prefix_v6: int = SUBNET_PREFIX_V6) -> str:
+    """
+    Retourne le sous-réseau d'une adresse IP (par exemple 192.168.1.0/24).
+
+    Les nœuds qui ne sont pas des adresses IP forment leur propre groupe.
+    """
+    try:
+        address = ipaddress.ip_address(node)
+    except ValueError:
+        return str(node)
+    prefix = prefix_v4 if address.version == 4 else prefix_v6
+    return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+
+def _codes(values: Sequence[Any]):
+    """Code les valeurs par leur indice dans la table de leurs valeurs distinctes (ordre d'apparition)."""
+    table: Dict[Any, int] = {}
+    codes = [table.setdefault(value, len(table)) for value in values]
+    return codes, list(table)
+
+
+def quantize(coords: np.ndarray, bits: int) -> np.ndarray:
+    """
+    Ramène des coordonnées (N, 2) sur la grille entière [0, 2**bits - 1] de leur boîte englobante.
+
+    Le rapport largeur/hauteur est conservé: les deux axes partagent la même échelle.
+    """
+    if not MIN_QUANTIZE_BITS <= bits <= MAX_QUANTIZE_BITS:
+        raise ValueError(f"La quantification doit être comprise entre {MIN_QUANTIZE_BITS} et {MAX_QUANTIZE_BITS} bits")
+    if len(coords) == 0:
+        return coords.astype(np.int64)
+    low = coords.min(axis=0)
+    span = max(float(np.ptp(coords, axis=0).max()), 1e-12)
+    return np.rint((coords - low) / span * ((1 << bits) - 1)).astype(np.int64)
+
+
+def layout_payload(G: nx.Graph, pos: Dict[Hashable, np.ndarray], internal: Optional[Sequence[bool]] = None,
+                   quantize_bits: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Sérialise un graphe mis en page en colonnes JSON.
+
+    members vaut le nombre d'IPs d'un super-nœud de sous-réseau (graph_lod), 1 sinon.
+
+    Args:
+        G: Graphe (arêtes étiquetées protocol et port)
+        pos: Positions des nœuds (LayoutEngine.layout)
+        internal: Indicateur "réseau interne" de chaque nœud, dans l'ordre de G.nodes()
+        quantize_bits: Nombre de bits des coordonnées entières (None: flottants arrondis)
+
+    Returns:
+        Dictionnaire {"nodes", "edges", "groups", "bounds", "quantize_bits"}; les arêtes
+        et les regroupements désignent les nœuds par leur indice
+    """
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    coords = np.array([pos[node] for node in nodes], dtype=np.float64).reshape(-1, 2)
+    bounds = np.concatenate([coords.min(axis=0), coords.max(axis=0)]).round(LAYOUT_DECIMALS).tolist() if len(nodes) else []
+    if quantize_bits is not None:
+        coords = quantize(coords, quantize_bits)
+    else:
+        coords = coords.round(LAYOUT_DECIMALS)
+
+    # Composantes connexes numérotées de la plus grande à la plus petite
+    components = sorted(nx.connected_components(G), key=len, reverse=True)
+    component = np.empty(len(nodes), dtype=np.int64)
+    for component_id, members in enumerate(components):
+        component[[index[node] for node in members]] = component_id
+    subnet, subnets = _codes([subnet_of(node) for node in nodes])
+
+    edges = list(G.edges(data=True))
+    protocol, protocols = _codes([d.get('protocol', '') for _, _, d in edges])
+
+    degrees = dict(G.degree())
+    return {
+        "nodes": {
+            "id": [str(node) for node in nodes],
+            "x": coords[:, 0].tolist(),
+            "y": coords[:, 1].tolist(),
+            "degree": [degrees[node] for node in nodes],
+            "members": [d.get('members', 1) for _, d in G.nodes(data=True)],
+            "internal": [bool(flag) for flag in internal] if internal is not None else None,
+            "component": component.tolist(),
+            "subnet": subnet
+        },
+        "edges": {
+            "source": [index[u] for u, _, _ in edges],
+            "target": [index[v] for _, v, _ in edges],
+            "protocol": protocol,
+            "port": [int(d.get('port', 0)) for _, _, d in edges],
+            "count": [int(d.get('count', 1)) for _, _, d in edges],
+            "bytes": [int(d.get('bytes', 0)) for _, _, d in edges]
+        },
+        "groups": {
+            "components": [len(members) for members in components],
+            "subnets": subnets,
+            "protocols": protocols
+        },
+        "bounds": bounds,
+        "quantize_bits": quantize_bits
+    }
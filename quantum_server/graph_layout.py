@@ -0,0 +1,237 @@
+"""
+QuantumEyes - Mise en page des graphes de réseau
+
+Ce module fournit un moteur de mise en page réutilisable entre les appels:
+les positions calculées sont conservées et servent de point de départ au
+calcul suivant, de sorte que seuls les nouveaux nœuds se déplacent. Les
+petits graphes utilisent nx.spring_layout; au-delà d'un seuil, un algorithme
+de Fruchterman-Reingold creux approxime la répulsion par les centroïdes d'une
+grille (Barnes-Hut à un niveau) et s'arrête à l'épuisement d'un budget de temps.
+"""
+
+import os
+import time
+import threading
+import numpy as np
+import networkx as nx
+from typing import Dict, Hashable, Optional, Tuple
+
+# Au-delà de ce nombre de nœuds, la mise en page creuse remplace spring_layout
+SPARSE_LAYOUT_THRESHOLD = int(os.environ.get('QUANTUM_SPARSE_LAYOUT_THRESHOLD', 1000))
+
+# Budget de temps par défaut de la mise en page creuse (en secondes)
+DEFAULT_TIME_BUDGET = float(os.environ.get('QUANTUM_LAYOUT_TIME_BUDGET', 2.0))
+
+# Nombre maximal de positions conservées entre les appels
+MAX_CACHED_POSITIONS = 200_000
+
+# Côté de la grille utilisée pour approximer la répulsion
+GRID_SIZE = 16
+
+# Nombre de nœuds traités ensemble lors du calcul de la répulsion
+REPULSION_CHUNK = 4096
+
+# Déplacement maximal (en fraction de la distance idéale k) sous lequel la mise en page a convergé
+CONVERGENCE_TOLERANCE = 0.01
+
+
+def _grid_repulsion(pos: np.ndarray, k: float, targets: np.ndarray, grid_size: int = GRID_SIZE) -> np.ndarray:
+    """
+    Approxime la répulsion k²/d exercée par tous les nœuds sur les nœuds cibles.
+
+    Les nœuds sont regroupés dans une grille; chaque cible est repoussée par le
+    centroïde de chaque cellule, pondéré par le nombre de nœuds qu'elle contient
+    (sa propre contribution est retirée de sa cellule).
+
+    Returns:
+        Forces (len(targets), 2)
+    """
+    low = pos.min(axis=0)
+    span = np.maximum(pos.max(axis=0) - low, 1e-9)
+    cell_xy = np.minimum(((pos - low) / span * grid_size).astype(np.int64), grid_size - 1)
+    cells = cell_xy[:, 0] * grid_size + cell_xy[:, 1]
+
+    num_cells = grid_size * grid_size
+    mass = np.bincount(cells, minlength=num_cells).astype(np.float64)
+    sums = np.stack([np.bincount(cells, weights=pos[:, d], minlength=num_cells) for d in (0, 1)], axis=1)
+    occupied = np.flatnonzero(mass)
+    mass = mass[occupied]
+    sums = sums[occupied]
+    cell_index = np.searchsorted(occupied, cells)
+
+    force = np.zeros((len(targets), 2))
+    for start in range(0, len(targets), REPULSION_CHUNK):
+        chunk = slice(start, start + REPULSION_CHUNK)
+        rows_idx = targets[chunk]
+        p = pos[rows_idx]
+        m = np.broadcast_to(mass, (len(p), len(mass))).copy()
+        s = np.broadcast_to(sums, (len(p),) + sums.shape).copy()
+
+        # Retirer le nœud lui-même de sa cellule
+        rows = np.arange(len(p))
+        m[rows, cell_index[rows_idx]] -= 1.0
+        s[rows, cell_index[rows_idx]] -= p
+
+        centroids = s / np.maximum(m, 1.0)[:, :, None]
+        delta = p[:, None, :] - centroids
+        dist2 = np.maximum((delta ** 2).sum(axis=2), 1e-6)
+        weight = np.where(m > 0, m * k * k / dist2, 0.0)
+        force[chunk] = (delta * weight[:, :, None]).sum(axis=1)
+    return force
+
+
+def sparse_force_layout(edges: np.ndarray, num_nodes: int, init: np.ndarray, movable: np.ndarray,
+                        time_budget: float = DEFAULT_TIME_BUDGET, max_iter: int = 200,
+                        seed: int = 42) -> np.ndarray:
+    """
+    Mise en page force-dirigée creuse bornée en temps.
+
+    Args:
+        edges: Tableau (E, 2) des indices des extrémités des arêtes
+        num_nodes: Nombre de nœuds
+        init: Positions initiales (N, 2)
+        movable: Masque booléen des nœuds autorisés à bouger
+        time_budget: Durée maximale en secondes
+        max_iter: Nombre maximal d'itérations
+        seed: Graine pour départager les nœuds superposés
+
+    Returns:
+        Positions (N, 2)
+    """
+    pos = init.astype(np.float64).copy()
+    if num_nodes < 2 or not movable.any():
+        return pos
+
+    rng = np.random.default_rng(seed)
+    pos[movable] += rng.normal(scale=1e-4, size=(int(movable.sum()), 2))
+
+    span = np.ptp(pos, axis=0).max()
+    area = max(span, 1.0) ** 2
+    k = np.sqrt(area / num_nodes)
+    # Démarrage à chaud: les nouveaux nœuds partent près de leurs voisins, un refroidissement court suffit
+    if movable.all():
+        temperature, cooling = 0.1 * max(span, 1.0), 0.95
+    else:
+        temperature, cooling = 5.0 * k, 0.9
+    deadline = time.perf_counter() + time_budget
+    # Seules les arêtes touchant un nœud mobile produisent un déplacement
+    edges = edges[movable[edges[:, 0]] | movable[edges[:, 1]]]
+    src, dst = edges[:, 0], edges[:, 1]
+    targets = np.flatnonzero(movable)
+
+    for _ in range(max_iter):
+        started = time.perf_counter()
+        force = np.zeros_like(pos)
+        force[targets] = _grid_repulsion(pos, k, targets)
+
+        # Attraction d²/k le long des arêtes
+        if len(edges):
+            delta = pos[src] - pos[dst]
+            dist = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 1e-9)
+            pull = delta * (dist / k)[:, None]
+            np.add.at(force, src, -pull)
+            np.add.at(force, dst, pull)
+
+        # Déplacement limité par la température, seuls les nœuds mobiles bougent
+        length = np.maximum(np.sqrt((force ** 2).sum(axis=1)), 1e-9)
+        step = force * (np.minimum(length, temperature) / length)[:, None]
+        pos[targets] += step[targets]
+        temperature *= cooling
+
+        # Arrêt anticipé quand plus aucun nœud ne bouge sensiblement
+        if np.abs(step[targets]).max() < CONVERGENCE_TOLERANCE * k:
+            break
+
+        elapsed = time.perf_counter() - started
+        if time.perf_counter() + elapsed > deadline:
+            break
+    return pos
+
+
+class LayoutEngine:
+    """Moteur de mise en page avec démarrage à chaud depuis les positions précédentes."""
+
+    def __init__(self, threshold: int = SPARSE_LAYOUT_THRESHOLD, time_budget: float = DEFAULT_TIME_BUDGET,
+                 max_cached: int = MAX_CACHED_POSITIONS, seed: int = 42):
+        self.threshold = threshold
+        self.time_budget = time_budget
+        self.max_cached = max_cached
+        self.seed = seed
+        self._positions: Dict[Hashable, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Oublie les positions conservées."""
+        with self._lock:
+            self._positions.clear()
+
+    def _initial_positions(self, G: nx.Graph, nodes: list, known: np.ndarray) -> np.ndarray:
+        """Positions de départ: positions conservées, sinon barycentre des voisins connus."""
+        rng = np.random.default_rng(self.seed)
+        with self._lock:
+            cached = {node: self._positions[node] for node in nodes if node in self._positions}
+
+        init = np.empty((len(nodes), 2))
+        if cached:
+            known_pos = np.array(list(cached.values()))
+            center, radius = known_pos.mean(axis=0), max(np.ptp(known_pos, axis=0).max(), 1.0) / 2
+        else:
+            center, radius = np.zeros(2), 1.0
+
+        for i, node in enumerate(nodes):
+            if node in cached:
+                init[i] = cached[node]
+                continue
+            anchors = [cached[v] for v in G.neighbors(node) if v in cached]
+            if anchors:
+                init[i] = np.mean(anchors, axis=0) + rng.normal(scale=0.05 * radius, size=2)
+            else:
+                init[i] = center + rng.uniform(-radius, radius, size=2)
+        return init
+
+    def layout(self, G: nx.Graph, time_budget: Optional[float] = None) -> Dict[Hashable, np.ndarray]:
+        """
+        Calcule les positions des nœuds, en repartant des positions de l'appel précédent.
+
+        Args:
+            G: Graphe à mettre en page
+            time_budget: Budget de temps de la mise en page creuse (secondes)
+
+        Returns:
+            Dictionnaire nœud -> position (x, y)
+        """
+        nodes = list(G.nodes())
+        if not nodes:
+            return {}
+
+        with self._lock:
+            known = np.array([node in self._positions for node in nodes])
+
+        if known.all():
+            with self._lock:
+                return {node: np.asarray(self._positions[node]) for node in nodes}
+
+        if len(nodes) <= self.threshold:
+            if known.any():
+                init = dict(zip(nodes, self._initial_positions(G, nodes, known)))
+                fixed = [node for node, is_known in zip(nodes, known) if is_known]
+                pos = nx.spring_layout(G, pos=init, fixed=fixed, seed=self.seed)
+            else:
+                pos = nx.spring_layout(G, seed=self.seed)
+            coords = np.array([pos[node] for node in nodes])
+        else:
+            index = {node: i for i, node in enumerate(nodes)}
+            edges = np.array([(index[u], index[v]) for u, v in G.edges() if u != v], dtype=np.int64).reshape(-1, 2)
+            init = self._initial_positions(G, nodes, known)
+            budget = self.time_budget if time_budget is None else time_budget
+            coords = sparse_force_layout(edges, len(nodes), init, ~known, budget, seed=self.seed)
+
+        with self._lock:
+            if len(self._positions) + int((~known).sum()) > self.max_cached:
+                self._positions.clear()
+            self._positions.update(zip(nodes, map(tuple, coords)))
+        return dict(zip(nodes, coords))
+
+
+# Moteur partagé par les rendus de graphes
+layout_engine = LayoutEngine()
@@ -0,0 +1,134 @@
+"""
+QuantumEyes - Niveau de détail des grands graphes de réseau
+
+Avec des milliers d'adresses, dessiner chaque nœud et chaque étiquette
+d'arête donne une image illisible et un rendu de plusieurs minutes. Au-delà
+d'un budget d'affichage, les nœuds sont regroupés en super-nœuds de
+sous-réseau (/24, puis /16 si nécessaire) et les arêtes parallèles fusionnées
+avec leurs nombres de connexions et d'octets cumulés. Les entités à
+surveiller (par exemple les IPs impliquées dans une anomalie) restent
+détaillées. Le coût de la mise en page et du rendu dépend alors du budget,
+pas de la taille du graphe brut.
+"""
+
+import os
+import networkx as nx
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+from graph_export import subnet_of
+
+# Nombre maximal de nœuds affichés avant agrégation
+GRAPH_NODE_BUDGET = int(os.environ.get('QUANTUM_GRAPH_NODE_BUDGET', 200))
+
+# Nombre maximal d'arêtes affichées avant agrégation
+GRAPH_EDGE_BUDGET = int(os.environ.get('QUANTUM_GRAPH_EDGE_BUDGET', 1000))
+
+# Niveaux d'agrégation successifs: préfixes (IPv4, IPv6) des super-nœuds
+LOD_PREFIXES = ((24, 64), (16, 48))
+
+# Part du budget de nœuds laissée aux nœuds détaillés de keep (le reste aux super-nœuds)
+KEEP_BUDGET_SHARE = 0.5
+
+
+def within_budget(G: nx.Graph, node_budget: int = GRAPH_NODE_BUDGET, edge_budget: int = GRAPH_EDGE_BUDGET) -> bool:
+    """Indique si le graphe peut être affiché sans agrégation."""
+    return G.number_of_nodes() <= node_budget and G.number_of_edges() <= edge_budget
+
+
+def collapse_subnets(G: nx.Graph, keep: Iterable[Hashable] = (), prefix_v4: int = 24,
+                     prefix_v6: int = 64) -> nx.Graph:
+    """
+    Regroupe les nœuds d'un graphe par sous-réseau.
+
+    Chaque super-nœud porte le nombre de nœuds regroupés (members) et les
+    connexions internes au sous-réseau (internal_count, internal_bytes).
+    Les arêtes parallèles sont fusionnées: count et bytes sont cumulés,
+    edges compte les arêtes fusionnées, protocol et port sont ceux de
+    l'arête la plus active.
+
+    Args:
+        G: Graphe des connexions (arêtes protocol, port, count, bytes)
+        keep: Nœuds conservés tels quels
+        prefix_v4, prefix_v6: Longueur de préfixe des sous-réseaux
+
+    Returns:
+        Le graphe agrégé (même type que G)
+    """
+    keep = set(keep)
+    group: Dict[Hashable, Hashable] = {
+        node: node if node in keep else subnet_of(node, prefix_v4, prefix_v6) for node in G
+    }
+
+    H = G.__class__()
+    for node, data in G.nodes(data=True):
+        target = group[node]
+        if target == node:
+            H.add_node(node, **data)
+        elif target in H:
+            H.nodes[target]['members'] += 1
+        else:
+            H.add_node(target, type='subnet', members=1, internal_count=0, internal_bytes=0)
+
+    heaviest: Dict[Tuple[Hashable, Hashable], int] = {}
+    for u, v, data in G.edges(data=True):
+        a, b = group[u], group[v]
+        count = data.get('count', 1)
+        size = data.get('bytes', 0)
+        if a == b:
+            node = H.nodes[a]
+            node['internal_count'] = node.get('internal_count', 0) + count
+            node['internal_bytes'] = node.get('internal_bytes', 0) + size
+            continue
+        if not H.has_edge(a, b):
+            H.add_edge(a, b, protocol=data.get('protocol', ''), port=data.get('port', 0),
+                       count=count, bytes=size, edges=1)
+            heaviest[(a, b)] = count
+            continue
+        edge = H.edges[a, b]
+        edge['count'] += count
+        edge['bytes'] += size
+        edge['edges'] += 1
+        key = (a, b) if (a, b) in heaviest else (b, a)
+        if count > heaviest[key]:
+            heaviest[key] = count
+            edge['protocol'], edge['port'] = data.get('protocol', ''), data.get('port', 0)
+    return H
+
+
+def level_of_detail(G: nx.Graph, keep: Iterable[Hashable] = (), node_budget: int = GRAPH_NODE_BUDGET,
+                    edge_budget: int = GRAPH_EDGE_BUDGET) -> Tuple[nx.Graph, Optional[int]]:
+    """
+    Retourne la vue du graphe à afficher dans le budget.
+    
+    Le graphe est agrégé en /24, puis en /16 si le budget est encore dépassé.
+    keep est parcouru par priorité décroissante (par exemple les IPs des
+    anomalies les mieux scorées d'abord): au plus KEEP_BUDGET_SHARE du budget
+    de nœuds reste détaillé, et cette part est réduite de moitié tant que la
+    vue dépasse le budget. Le dernier niveau est retourné si même l'agrégation
+    complète le dépasse.
+    
+    Args:
+        G: Graphe des connexions
+        keep: Nœuds à ne pas regrouper, par priorité décroissante
+        node_budget, edge_budget: Budget d'affichage
+        
+    Returns:
+        (graphe affiché, préfixe IPv4 d'agrégation ou None si aucun nœud n'a été regroupé)
+    """
+    if within_budget(G, node_budget, edge_budget):
+        return G, None
+    
+    keep = [node for node in dict.fromkeys(keep) if node in G][:int(node_budget * KEEP_BUDGET_SHARE)]
+    while True:
+        for prefix_v4, prefix_v6 in LOD_PREFIXES:
+            view = collapse_subnets(G, keep, prefix_v4, prefix_v6)
+            if within_budget(view, node_budget, edge_budget):
+                break
+        if not keep or within_budget(view, node_budget, edge_budget):
+            break
+        keep = keep[:len(keep) // 2]
+    
+    # Sous-réseaux d'un seul nœud: rien n'a été regroupé
+    if view.number_of_nodes() == G.number_of_nodes():
+        return G, None
+    return view, prefix_v4
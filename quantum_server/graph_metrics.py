@@ -0,0 +1,329 @@
+"""
+QuantumEyes - Métriques de graphe incrémentales
+
+Ce module maintient un graphe de connexions persistant alimenté par lots
+(ConnectionBatch), avec expiration des lots anciens. Les métriques (densité,
+degré moyen, composantes connexes, clustering moyen) sont mises à jour à
+chaque arête ajoutée ou retirée: somme des degrés, deltas de triangles par
+arête pour le clustering, et ensembles de membres des composantes. Un ajout
+fusionne la plus petite composante dans la plus grande; un retrait lance deux
+parcours alternés depuis les extrémités, arrêtés dès qu'ils se rejoignent ou
+que le plus petit côté est épuisé. Le coût d'une mise à jour dépend du lot et
+du voisinage des arêtes retirées, pas de l'historique.
+"""
+
+import time
+import numpy as np
+import networkx as nx
+from collections import deque
+from typing import Dict, List, Any, Optional, Set
+
+from connection_batch import ConnectionBatch
+
+# Décalage utilisé pour encoder une paire d'identifiants de nœuds en une clé
+_PAIR_SHIFT = np.int64(1 << 32)
+
+
+class _BatchEntry:
+    """Contribution d'un lot au graphe, conservée pour son expiration."""
+
+    __slots__ = ('timestamp', 'nodes', 'edges')
+
+    def __init__(self, timestamp: float, nodes: np.ndarray, edges: np.ndarray):
+        self.timestamp = timestamp
+        self.nodes = nodes
+        self.edges = edges
+
+
+class IncrementalGraph:
+    """Graphe de connexions persistant avec métriques mises à jour incrémentalement."""
+
+    def __init__(self, retention: Optional[float] = None, max_batches: Optional[int] = None):
+        """
+        Initialise le graphe.
+
+        Args:
+            retention: Durée de rétention des lots en secondes (None: illimitée)
+            max_batches: Nombre maximal de lots conservés (None: illimité)
+        """
+        self.retention = retention
+        self.max_batches = max_batches
+        # Identifiants des IPs vivantes; ceux des nœuds retirés sont réutilisés
+        self._ids: Dict[str, int] = {}
+        self._names: List[Optional[str]] = []
+        self._free_ids: List[int] = []
+        self._batches: deque = deque()
+        self.watermark: Optional[float] = None
+
+        # Références des lots vivants vers les nœuds et les arêtes
+        self._node_refs: Dict[int, int] = {}
+        self._edge_refs: Dict[int, int] = {}
+        self._edge_attrs: Dict[int, tuple] = {}
+
+        # Structure et agrégats des métriques
+        self._adjacency: Dict[int, Set[int]] = {}
+        self._self_loops: Set[int] = set()
+        self._triangles: Dict[int, int] = {}
+        self._clustering_sum = 0.0
+        self._degree_sum = 0
+        self._num_edges = 0
+
+        # Composantes connexes: étiquette de chaque nœud et membres de chaque étiquette
+        self._component: Dict[int, int] = {}
+        self._members: Dict[int, Set[int]] = {}
+        self._next_component = 0
+
+    def __len__(self) -> int:
+        return len(self._adjacency)
+
+    @property
+    def num_batches(self) -> int:
+        return len(self._batches)
+
+    def _intern(self, ip: str) -> int:
+        node = self._ids.get(ip)
+        if node is None:
+            if self._free_ids:
+                node = self._free_ids.pop()
+                self._names[node] = ip
+            else:
+                node = len(self._names)
+                self._names.append(ip)
+            self._ids[ip] = node
+        return node
+
+    def add_batch(self, batch: ConnectionBatch, timestamp: Optional[float] = None) -> float:
+        """
+        Ajoute un lot de connexions puis expire les lots hors rétention.
+
+        Args:
+            batch: Lot de connexions
+            timestamp: Horodatage du lot (par défaut son timestamp maximal, sinon l'heure courante)
+
+        Returns:
+            L'horodatage retenu pour le lot
+        """
+        if timestamp is None:
+            if batch.timestamps is not None and len(batch) and not np.isnan(batch.timestamps).all():
+                timestamp = float(np.nanmax(batch.timestamps))
+            else:
+                timestamp = time.time()
+
+        # Identifiants globaux des IPs utilisées par le lot ('' n'est pas un nœud)
+        global_ids = np.full(batch.num_ips, -1, dtype=np.int64)
+        for index in np.unique(np.concatenate((batch.source_ids, batch.destination_ids))).tolist():
+            ip = batch.ips[index]
+            if ip:
+                global_ids[index] = self._intern(ip)
+        src = global_ids[batch.source_ids]
+        dst = global_ids[batch.destination_ids]
+        nodes = np.unique(np.concatenate((src, dst)))
+        nodes = nodes[nodes >= 0]
+
+        valid = np.flatnonzero((src >= 0) & (dst >= 0))
+        low = np.minimum(src[valid], dst[valid])
+        high = np.maximum(src[valid], dst[valid])
+        keys = low * _PAIR_SHIFT + high
+        edges, last_reversed = np.unique(keys[::-1], return_index=True)
+        last_rows = valid[len(keys) - 1 - last_reversed]
+
+        for node in nodes.tolist():
+            refs = self._node_refs.get(node, 0)
+            self._node_refs[node] = refs + 1
+            if refs == 0:
+                self._insert_node(node)
+
+        protocols = np.array(batch.protocols, dtype=object)[batch.protocol_codes[last_rows]].tolist()
+        ports = batch.destination_ports[last_rows].tolist()
+        for key, proto, port in zip(edges.tolist(), protocols, ports):
+            refs = self._edge_refs.get(key, 0)
+            self._edge_refs[key] = refs + 1
+            self._edge_attrs[key] = (proto, port)
+            if refs == 0:
+                self._insert_edge(key // int(_PAIR_SHIFT), key % int(_PAIR_SHIFT))
+
+        self._batches.append(_BatchEntry(timestamp, nodes, edges))
+        self.watermark = timestamp if self.watermark is None else max(self.watermark, timestamp)
+        if self.retention is not None:
+            self.expire(self.watermark - self.retention)
+        while self.max_batches is not None and len(self._batches) > self.max_batches:
+            self._remove_batch(self._batches.popleft())
+        return timestamp
+
+    def expire(self, before: float) -> int:
+        """
+        Retire les lots dont l'horodatage est antérieur à before.
+
+        Returns:
+            Nombre de lots retirés
+        """
+        expired = [entry for entry in self._batches if entry.timestamp < before]
+        if expired:
+            self._batches = deque(entry for entry in self._batches if entry.timestamp >= before)
+            for entry in expired:
+                self._remove_batch(entry)
+        return len(expired)
+
+    def clear(self) -> None:
+        """Vide le graphe et oublie tous les lots."""
+        self.__init__(self.retention, self.max_batches)
+
+    def _remove_batch(self, entry: _BatchEntry) -> None:
+        """Retire la contribution d'un lot: arêtes d'abord, puis nœuds devenus orphelins."""
+        for key in entry.edges.tolist():
+            refs = self._edge_refs[key] - 1
+            if refs:
+                self._edge_refs[key] = refs
+                continue
+            del self._edge_refs[key]
+            del self._edge_attrs[key]
+            self._delete_edge(key // int(_PAIR_SHIFT), key % int(_PAIR_SHIFT))
+
+        for node in entry.nodes.tolist():
+            refs = self._node_refs[node] - 1
+            if refs:
+                self._node_refs[node] = refs
+                continue
+            del self._node_refs[node]
+            self._delete_node(node)
+
+    def _local_clustering(self, node: int) -> float:
+        degree = len(self._adjacency[node])
+        if degree < 2:
+            return 0.0
+        return 2.0 * self._triangles[node] / (degree * (degree - 1))
+
+    def _insert_node(self, node: int) -> None:
+        self._adjacency[node] = set()
+        self._triangles[node] = 0
+        self._new_component({node})
+
+    def _delete_node(self, node: int) -> None:
+        # Ses arêtes ont été retirées avant lui: il est seul dans sa composante
+        del self._adjacency[node]
+        del self._triangles[node]
+        del self._members[self._component.pop(node)]
+        del self._ids[self._names[node]]
+        self._names[node] = None
+        self._free_ids.append(node)
+
+    def _update_triangles(self, u: int, v: int, delta: int) -> int:
+        """
+        Applique le delta de triangles de l'arête (u, v) et met à jour la somme des clusterings.
+
+        Returns:
+            Nombre de voisins communs de u et v
+        """
+        adj_u, adj_v = self._adjacency[u], self._adjacency[v]
+        common = adj_u & adj_v if len(adj_u) < len(adj_v) else adj_v & adj_u
+        affected = common | {u, v}
+        self._clustering_sum -= sum(self._local_clustering(w) for w in affected)
+
+        for w in common:
+            self._triangles[w] += delta
+        self._triangles[u] += delta * len(common)
+        self._triangles[v] += delta * len(common)
+        if delta > 0:
+            adj_u.add(v)
+            adj_v.add(u)
+        else:
+            adj_u.discard(v)
+            adj_v.discard(u)
+
+        self._clustering_sum += sum(self._local_clustering(w) for w in affected)
+        return len(common)
+
+    def _insert_edge(self, u: int, v: int) -> None:
+        self._num_edges += 1
+        self._degree_sum += 2
+        if u == v:
+            # Les boucles comptent dans les degrés mais pas dans le clustering (comme networkx)
+            self._self_loops.add(u)
+            return
+        self._update_triangles(u, v, 1)
+        self._merge_components(u, v)
+
+    def _delete_edge(self, u: int, v: int) -> None:
+        self._num_edges -= 1
+        self._degree_sum -= 2
+        if u == v:
+            self._self_loops.discard(u)
+            return
+        # Un voisin commun les relie encore; sinon, recherche d'un autre chemin
+        if not self._update_triangles(u, v, -1):
+            self._split_components(u, v)
+
+    def _new_component(self, members: Set[int]) -> None:
+        label = self._next_component
+        self._next_component += 1
+        self._members[label] = members
+        for node in members:
+            self._component[node] = label
+
+    def _merge_components(self, u: int, v: int) -> None:
+        """Fusionne les composantes de u et v (la plus petite est réétiquetée)."""
+        label_u, label_v = self._component[u], self._component[v]
+        if label_u == label_v:
+            return
+        if len(self._members[label_u]) < len(self._members[label_v]):
+            label_u, label_v = label_v, label_u
+        moved = self._members.pop(label_v)
+        self._members[label_u] |= moved
+        for node in moved:
+            self._component[node] = label_u
+
+    def _separated_side(self, u: int, v: int) -> Optional[Set[int]]:
+        """
+        Cherche si u et v sont encore reliés, par deux parcours en largeur alternés.
+
+        Returns:
+            None s'ils sont reliés, sinon les nœuds du côté épuisé en premier (le plus petit)
+        """
+        sides = ((deque([u]), {u}), (deque([v]), {v}))
+        while True:
+            for (queue, seen), (_, other) in ((sides[0], sides[1]), (sides[1], sides[0])):
+                if not queue:
+                    return seen
+                for neighbor in self._adjacency[queue.popleft()]:
+                    if neighbor in other:
+                        return None
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        queue.append(neighbor)
+
+    def _split_components(self, u: int, v: int) -> None:
+        """Après le retrait de (u, v): le côté séparé, s'il existe, devient une nouvelle composante."""
+        side = self._separated_side(u, v)
+        if side is not None:
+            self._members[self._component[u]] -= side
+            self._new_component(side)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retourne les métriques du graphe vivant.
+
+        Returns:
+            Dictionnaire des métriques (mêmes clés que generate_graph_from_network_data)
+        """
+        n = len(self._adjacency)
+        return {
+            "nodes": n,
+            "edges": self._num_edges,
+            "density": 2.0 * self._num_edges / (n * (n - 1)) if n > 1 else 0,
+            "avg_degree": self._degree_sum / n if n > 0 else 0,
+            "connected_components": len(self._members),
+            "avg_clustering": self._clustering_sum / n if n > 1 else 0,
+            "batches": len(self._batches),
+            "watermark": self.watermark
+        }
+
+    def to_networkx(self) -> nx.Graph:
+        """Construit le nx.Graph équivalent (pour le rendu ou la vérification)."""
+        G = nx.Graph()
+        G.add_nodes_from((self._names[node], {'type': 'ip'}) for node in sorted(self._adjacency))
+        shift = int(_PAIR_SHIFT)
+        G.add_edges_from(
+            (self._names[key // shift], self._names[key % shift], {'protocol': proto, 'port': port})
+            for key, (proto, port) in self._edge_attrs.items()
+        )
+        return G
@@ -0,0 +1,106 @@
+"""
+QuantumEyes - Fichier de modèle entraîné
+
+Un modèle entraîné (normalisation, paramètres optimisés ou vecteurs de
+support, configuration) est enregistré dans un seul fichier versionné:
+
+    QEYEMDL\\0 | longueur de l'en-tête (uint32) | en-tête JSON | tableaux
+
+L'en-tête décrit le modèle et l'emplacement de chaque tableau, aligné sur
+ALIGNMENT octets. Le chargement projette le fichier en mémoire (mmap) sans
+copier les tableaux: il est immédiat, et les processus créés par fork
+partagent les mêmes pages. L'écriture passe par un fichier temporaire
+renommé, de sorte qu'un serveur ne lit jamais de fichier partiel.
+"""
+
+import os
+import json
+import uuid
+import struct
+import numpy as np
+from typing import Any, Dict, Tuple
+
+# Emplacement par défaut du modèle entraîné
+DEFAULT_MODEL_PATH = os.environ.get(
+    'QUANTUM_MODEL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'qml_model.qmodel')
+)
+
+# Version du format de fichier, à incrémenter quand sa structure change
+CHECKPOINT_FORMAT = 1
+
+MAGIC = b"QEYEMDL\0"
+
+# Alignement (octets) du début de chaque tableau
+ALIGNMENT = 64
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_checkpoint(path: str, metadata: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Enregistre un modèle.
+
+    Args:
+        path: Chemin du fichier (remplacé atomiquement)
+        metadata: Description sérialisable en JSON (type de modèle, configuration, version...)
+        arrays: Tableaux numériques du modèle
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+
+    header = json.dumps({"format": CHECKPOINT_FORMAT, "metadata": metadata, "arrays": layout}).encode()
+    data_start = _aligned(len(MAGIC) + 4 + len(header))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<I', len(header)) + header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_checkpoint(path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Projette un modèle en mémoire.
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        Tuple (métadonnées, tableaux en lecture seule adossés au fichier)
+
+    Raises:
+        ValueError: Fichier qui n'est pas un modèle, ou d'un format inconnu
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(len(MAGIC) + 4)
+        if len(prefix) < len(MAGIC) + 4 or not prefix.startswith(MAGIC):
+            raise ValueError(f"{path} n'est pas un fichier de modèle QuantumEyes")
+        header_size = struct.unpack('<I', prefix[len(MAGIC):])[0]
+        header = json.loads(f.read(header_size))
+
+    if header.get("format") != CHECKPOINT_FORMAT:
+        raise ValueError(f"Format de modèle {header.get('format')} non supporté (attendu {CHECKPOINT_FORMAT})")
+
+    data_start = _aligned(len(prefix) + header_size)
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        start = data_start + spec["offset"]
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    return header["metadata"], arrays
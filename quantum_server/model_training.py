@@ -0,0 +1,344 @@
+"""
+QuantumEyes - Entraînement des modèles QSVC et VQC
+
+Ce module ajuste les modèles supervisés du service sur des connexions
+étiquetées (NetworkDataGenerator.generate_mixed_dataset):
+
+- QSVC: SVM à noyau précalculé, le noyau de fidélité de la feature map
+  (quantum_kernel); le modèle conserve ses vecteurs de support encodés,
+  leurs coefficients duaux et le biais.
+- VQC: feature map suivie de l'ansatz paramétré, évalués exactement
+  (statevector_execution); la probabilité d'anomalie est celle des états de
+  base de parité impaire, et les poids de l'ansatz sont optimisés par
+  COBYLA, SPSA ou ADAM.
+
+Les modèles ajustés sont enregistrés avec leur normalisation et leur
+configuration (model_checkpoint) puis chargés par le serveur au démarrage.
+L'entraînement se lance hors du serveur, qui n'attend donc jamais:
+
+    python quantum_server/model_training.py --model-type qsvc
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from quantum_kernel import FeatureMapEncoder, DEFAULT_BATCH_SIZE
+
+# Types de modèles entraînables (config.model_type)
+TRAINABLE_MODELS = ("qsvc", "vqc")
+
+# Taille par défaut du jeu d'entraînement
+DEFAULT_NORMAL_COUNT = 400
+DEFAULT_ANOMALY_COUNT = 120
+
+# Nombre d'itérations par défaut des optimiseurs du VQC
+DEFAULT_MAXITER = 80
+
+# Borne des probabilités dans l'entropie croisée (log(0))
+PROBABILITY_EPSILON = 1e-9
+
+
+# --- Optimiseurs (interface minimize(fun, x0) de qiskit_algorithms) ---
+
+@dataclass
+class OptimizerResult:
+    """Résultat d'une optimisation."""
+    x: np.ndarray
+    fun: float
+    nfev: int
+
+
+class COBYLA:
+    """Optimiseur sans gradient COBYLA (scipy)."""
+
+    def __init__(self, maxiter: int = DEFAULT_MAXITER, tol: Optional[float] = None):
+        self.maxiter = maxiter
+        self.tol = tol
+
+    def minimize(self, fun: Callable[[np.ndarray], float], x0: np.ndarray) -> OptimizerResult:
+        from scipy.optimize import minimize
+
+        result = minimize(fun, x0, method='COBYLA', tol=self.tol, options={'maxiter': self.maxiter})
+        return OptimizerResult(np.asarray(result.x), float(result.fun), int(result.nfev))
+
+
+class SPSA:
+    """
+    Approximation stochastique par perturbations simultanées.
+
+    Deux évaluations par itération, quel que soit le nombre de paramètres;
+    gains a_k = a / (k + 1 + A)^0.602 et c_k = c / (k + 1)^0.101.
+    """
+
+    def __init__(self, maxiter: int = DEFAULT_MAXITER, learning_rate: float = 0.2,
+                 perturbation: float = 0.1, seed: Optional[int] = None):
+        self.maxiter = maxiter
+        self.learning_rate = learning_rate
+        self.perturbation = perturbation
+        self.seed = seed
+
+    def minimize(self, fun: Callable[[np.ndarray], float], x0: np.ndarray) -> OptimizerResult:
+        rng = np.random.default_rng(self.seed)
+        x = np.asarray(x0, dtype=np.float64).copy()
+        stability = 0.1 * self.maxiter
+        best_x, best_fun = x.copy(), fun(x)
+        nfev = 1
+        for k in range(self.maxiter):
+            gain = self.learning_rate / (k + 1 + stability) ** 0.602
+            step = self.perturbation / (k + 1) ** 0.101
+            delta = rng.choice((-1.0, 1.0), size=x.shape)
+            plus, minus = fun(x + step * delta), fun(x - step * delta)
+            nfev += 2
+            x -= gain * (plus - minus) / (2 * step) * delta
+            # Le dernier point n'est pas forcément le meilleur: on garde le meilleur évalué
+            for candidate, value in ((x + step * delta, plus), (x - step * delta, minus)):
+                if value < best_fun:
+                    best_x, best_fun = candidate.copy(), value
+        return OptimizerResult(best_x, float(best_fun), nfev)
+
+
+class ADAM:
+    """Descente de gradient ADAM, gradient par différences finies centrées."""
+
+    def __init__(self, maxiter: int = DEFAULT_MAXITER, lr: float = 0.05, beta_1: float = 0.9,
+                 beta_2: float = 0.99, eps: float = 1e-8, tol: float = 1e-6, gradient_step: float = 1e-2):
+        self.maxiter = maxiter
+        self.lr = lr
+        self.beta_1 = beta_1
+        self.beta_2 = beta_2
+        self.eps = eps
+        self.tol = tol
+        self.gradient_step = gradient_step
+
+    def _gradient(self, fun: Callable[[np.ndarray], float], x: np.ndarray) -> np.ndarray:
+        gradient = np.empty_like(x)
+        for i in range(len(x)):
+            shift = np.zeros_like(x)
+            shift[i] = self.gradient_step
+            gradient[i] = (fun(x + shift) - fun(x - shift)) / (2 * self.gradient_step)
+        return gradient
+
+    def minimize(self, fun: Callable[[np.ndarray], float], x0: np.ndarray) -> OptimizerResult:
+        x = np.asarray(x0, dtype=np.float64).copy()
+        m = np.zeros_like(x)
+        v = np.zeros_like(x)
+        nfev = 0
+        for t in range(1, self.maxiter + 1):
+            gradient = self._gradient(fun, x)
+            nfev += 2 * len(x)
+            m = self.beta_1 * m + (1 - self.beta_1) * gradient
+            v = self.beta_2 * v + (1 - self.beta_2) * gradient ** 2
+            step = self.lr * (m / (1 - self.beta_1 ** t)) / (np.sqrt(v / (1 - self.beta_2 ** t)) + self.eps)
+            x -= step
+            if np.linalg.norm(step) < self.tol:
+                break
+        return OptimizerResult(x, float(fun(x)), nfev + 1)
+
+
+# --- Normalisation ---
+
+class FittedScaler:
+    """Normalisation (x - moyenne) / écart-type, équivalente à StandardScaler, en NumPy."""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    @classmethod
+    def fit(cls, features: np.ndarray) -> "FittedScaler":
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        return cls(features.mean(axis=0), scale)
+
+    def transform(self, features: np.ndarray) -> np.ndarray:
+        return (np.asarray(features, dtype=np.float64) - self.mean_) / self.scale_
+
+
+# --- Modèles ---
+
+class TrainedModel(ABC):
+    """
+    Modèle supervisé entraîné, avec l'interface de scoring de QuantumKernelScorer.
+
+    score(angles) retourne (scores, masque des anomalies); un score supérieur
+    à threshold désigne une anomalie.
+    """
+
+    model_type = ""
+    threshold = 0.0
+
+    def __init__(self, metadata: Dict[str, Any]):
+        self.metadata = metadata
+        config = metadata["config"]
+        self.num_qubits = int(config["num_qubits"])
+        self.reps = int(config["reps"])
+        self.feature_map = config["feature_map"]
+        self.ansatz = config["ansatz"]
+
+    @property
+    def model_id(self) -> str:
+        """Identifiant du modèle (type et version), utilisé dans les clés du cache de scores."""
+        return f"{self.model_type}-v{self.metadata['model_version']}"
+
+    def matches(self, config) -> bool:
+        """Indique si le modèle a été entraîné pour cette configuration."""
+        return config.model_type == self.model_type and config.model_key == (self.num_qubits, self.reps, self.feature_map)
+
+    @abstractmethod
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Tableaux à enregistrer dans le fichier du modèle."""
+
+    @abstractmethod
+    def score(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Retourne (scores, masque des anomalies) pour des angles encodés (B, num_qubits)."""
+
+
+class QSVCModel(TrainedModel):
+    """SVM à noyau de fidélité quantique: décision = K(x, vecteurs de support) . coefficients + biais."""
+
+    model_type = "qsvc"
+    threshold = 0.0
+
+    def __init__(self, metadata: Dict[str, Any], support_angles: np.ndarray, dual_coef: np.ndarray,
+                 intercept: float, batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__(metadata)
+        self.encoder = FeatureMapEncoder(self.num_qubits, self.reps, self.feature_map)
+        self.support_angles = support_angles
+        self.dual_coef = dual_coef
+        self.intercept = float(intercept)
+        self.batch_size = batch_size
+        self._support_states = np.ascontiguousarray(self.encoder.encode(support_angles).conj().T)
+
+    @classmethod
+    def fit(cls, metadata: Dict[str, Any], angles: np.ndarray, labels: np.ndarray, C: float = 1.0) -> "QSVCModel":
+        """Ajuste le SVM sur la matrice de noyau des angles d'entraînement (classes équilibrées)."""
+        from sklearn.svm import SVC
+
+        config = metadata["config"]
+        states = FeatureMapEncoder(config["num_qubits"], config["reps"], config["feature_map"]).encode(angles)
+        kernel = np.abs(states @ states.conj().T) ** 2
+        svc = SVC(kernel='precomputed', C=C, class_weight='balanced').fit(kernel, labels)
+        return cls(metadata, angles[svc.support_], svc.dual_coef_[0], svc.intercept_[0])
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "support_angles": self.support_angles,
+            "dual_coef": self.dual_coef,
+            "intercept": np.array([self.intercept])
+        }
+
+    def score(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        X = np.asarray(X, dtype=np.float64)
+        scores = np.empty(len(X))
+        for start in range(0, len(X), self.batch_size):
+            kernel = np.abs(self.encoder.encode(X[start:start + self.batch_size]) @ self._support_states) ** 2
+            scores[start:start + len(kernel)] = kernel @ self.dual_coef + self.intercept
+        return scores, scores > self.threshold
+
+
+class VQCModel(TrainedModel):
+    """Classifieur variationnel: probabilité d'anomalie = probabilité des états de parité impaire."""
+
+    model_type = "vqc"
+    threshold = 0.5
+
+    def __init__(self, metadata: Dict[str, Any], weights: np.ndarray):
+        super().__init__(metadata)
+        self.weights = np.array(weights, dtype=np.float64)
+        states = np.arange(2 ** self.num_qubits)
+        self._odd_parity = np.array([bin(state).count('1') % 2 for state in states], dtype=np.float64)
+        self._template = None
+
+    def matches(self, config) -> bool:
+        return super().matches(config) and config.ansatz == self.ansatz
+
+    @property
+    def template(self):
+        """Circuit paramétré du modèle (transpilé à la première utilisation)."""
+        if self._template is None:
+            from circuit_templates import template_cache
+            self._template = template_cache.get(self.num_qubits, self.reps, self.feature_map, self.ansatz)
+        return self._template
+
+    def anomaly_probability(self, X: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """Probabilité d'anomalie de chaque ligne; des poids explicites (entraînement) ne sont pas mis en cache."""
+        from statevector_execution import exact_executor
+
+        if weights is None:
+            return exact_executor.probabilities(self.template, X, self.weights) @ self._odd_parity
+        return exact_executor.probabilities(self.template, X, weights, cache=False) @ self._odd_parity
+
+    @classmethod
+    def fit(cls, metadata: Dict[str, Any], angles: np.ndarray, labels: np.ndarray, optimizer,
+            seed: Optional[int] = None) -> "VQCModel":
+        """Optimise les poids de l'ansatz (entropie croisée pondérée par classe)."""
+        model = cls(metadata, np.zeros(0))
+        num_weights = model.template.num_weights
+        labels = np.asarray(labels, dtype=np.float64)
+        positive = max(labels.mean(), PROBABILITY_EPSILON)
+        sample_weights = np.where(labels == 1, 0.5 / positive, 0.5 / max(1 - positive, PROBABILITY_EPSILON))
+
+        def loss(weights: np.ndarray) -> float:
+            p = np.clip(model.anomaly_probability(angles, weights), PROBABILITY_EPSILON, 1 - PROBABILITY_EPSILON)
+            return float(-np.mean(sample_weights * (labels * np.log(p) + (1 - labels) * np.log(1 - p))))
+
+        x0 = np.random.default_rng(seed).uniform(-np.pi, np.pi, num_weights)
+        result = optimizer.minimize(loss, x0)
+        model.weights = result.x
+        metadata["training"]["loss"] = result.fun
+        metadata["training"]["evaluations"] = result.nfev
+        return model
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"weights": self.weights}
+
+    def score(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.anomaly_probability(np.asarray(X, dtype=np.float64))
+        return scores, scores > self.threshold
+
+
+def model_from_checkpoint(metadata: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> TrainedModel:
+    """Reconstruit un modèle à partir d'un fichier chargé (model_checkpoint.load_checkpoint)."""
+    model_type = metadata.get("model_type")
+    if model_type == "qsvc":
+        return QSVCModel(metadata, arrays["support_angles"], arrays["dual_coef"], arrays["intercept"][0])
+    if model_type == "vqc":
+        return VQCModel(metadata, arrays["weights"])
+    raise ValueError(f"Type de modèle inconnu: {model_type}")
+
+
+if __name__ == "__main__":
+    from model_checkpoint import DEFAULT_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Entraîne le modèle QML et enregistre son fichier")
+    parser.add_argument('--model-type', choices=TRAINABLE_MODELS, default=None,
+                        help="Type de modèle (par défaut celui de la configuration)")
+    parser.add_argument('--optimizer', choices=("cobyla", "spsa", "adam"), default=None)
+    parser.add_argument('--num-qubits', type=int, default=None)
+    parser.add_argument('--normal-count', type=int, default=DEFAULT_NORMAL_COUNT)
+    parser.add_argument('--anomaly-count', type=int, default=DEFAULT_ANOMALY_COUNT)
+    parser.add_argument('--maxiter', type=int, default=DEFAULT_MAXITER)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH)
+    args = parser.parse_args()
+
+    from qml_service import quantum_service
+
+    changes = {name: value for name, value in (("model_type", args.model_type), ("optimizer", args.optimizer),
+                                               ("num_qubits", args.num_qubits)) if value is not None}
+    if changes:
+        quantum_service.configure(changes)
+
+    result = quantum_service.train_model(normal_count=args.normal_count, anomaly_count=args.anomaly_count,
+                                         seed=args.seed, maxiter=args.maxiter, path=args.output)
+    if result["status"] != "success":
+        print(result["message"], file=sys.stderr)
+        sys.exit(1)
+    model = result["model"]
+    print(f"Modèle {model['model_id']} enregistré dans {args.output} "
+          f"(exactitude d'entraînement {model['training']['accuracy']:.3f}, {result['timings']['total']:.1f} s)")
@@ -8,48 +8,409 @@ et l'analyse des données réseau par QML pour la détection d'anomalies.
 
 import os
 import json
+import time
+import random
+import hashlib
+import threading
+import ipaddress
+from collections import OrderedDict
 import numpy as np
 import networkx as nx
-import matplotlib.pyplot as plt
-from datetime import datetime
-from typing import Dict, List, Any, Tuple, Optional, Union
-
-# Qiskit imports
-from qiskit import QuantumCircuit
-from qiskit.primitives import Sampler
-from qiskit_ibm_runtime import QiskitRuntimeService
-from qiskit.circuit.library import ZZFeatureMap, RealAmplitudes, PauliFeatureMap
-# Adaptations pour les versions récentes de Qiskit
-from qiskit.visualization import plot_histogram
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-
-# Générer des noms de fichiers uniques basés sur la date et l'heure
-def generate_filename(prefix: str, ext: str = 'png') -> str:
-    """Génère un nom de fichier unique basé sur la date et l'heure."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return f"static/{prefix}_{timestamp}.{ext}"
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Any, Tuple, Optional, Union, TYPE_CHECKING
+
+# Qiskit, qiskit_ibm_runtime, matplotlib et sklearn sont importés à la première
+# utilisation: /api/quantum/status et les endpoints de données démarrent sans eux
+if TYPE_CHECKING:
+    from qiskit import QuantumCircuit
+
+from quantum_kernel import QuantumKernelScorer
+from connection_batch import ConnectionBatch, KNOWN_PROTOCOLS, count_distinct
+from artifact_cache import STATIC_DIR
+from render_pipeline import render_pipeline, ImageOptions
+from data_generator import NetworkDataGenerator
+from graph_layout import layout_engine
+from graph_export import layout_payload
+from graph_lod import level_of_detail
+from graph_metrics import IncrementalGraph
+from circuit_templates import CircuitTemplate, template_cache
+from sampler_execution import BatchedSampler
+from statevector_execution import EXACT_MAX_QUBITS_LIMIT, exact_executor, circuit_probabilities, sample_counts
+from server_metrics import StageTimer, observe_stage
+from scoring_pool import sharded_scorer
+from figures import new_figure, draw_circuit
+from service_config import ConfigStore, ServiceConfig
+from model_checkpoint import DEFAULT_MODEL_PATH, save_checkpoint, load_checkpoint
+from model_training import (COBYLA, SPSA, ADAM, DEFAULT_MAXITER, DEFAULT_NORMAL_COUNT, DEFAULT_ANOMALY_COUNT,
+                            TRAINABLE_MODELS, FittedScaler, QSVCModel, VQCModel, TrainedModel, model_from_checkpoint)
 
 # Espace de stockage des images générées
-os.makedirs('quantum_server/static', exist_ok=True)
+os.makedirs(STATIC_DIR, exist_ok=True)
+
+# Réseaux privés (RFC 1918) considérés comme internes
+INTERNAL_NETWORKS = [ipaddress.ip_network(n) for n in ("10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16")]
+
+# Type d'anomalie associé aux caractéristiques d'attaque (indices dans le vecteur)
+ANOMALY_TYPE_FEATURES = {0: "data_exfil", 1: "port_scan", 2: "ddos"}
+
+# Fenêtre fixe (en secondes) des comptages par source et par destination: les
+# caractéristiques agrégées ne dépendent pas de la taille du lot envoyé
+FEATURE_WINDOW = float(os.environ.get('QUANTUM_FEATURE_WINDOW', 60))
+
+# Ports distincts usuels entre deux hôtes dans la fenêtre (web, DNS, SSH...) avant de compter un balayage
+SCAN_PORT_ALLOWANCE = 4
+
+# Trafic normal généré pour calibrer la normalisation, et taille de la référence du noyau
+REFERENCE_TRAFFIC_SIZE = 2048
+REFERENCE_SIZE = 256
+
+# Largeur angulaire d'un écart-type autour de pi (petites phases ZZ près de la référence)
+ENCODING_BANDWIDTH = np.pi / 12
+
+# Pas de quantification des angles encodés (1/16 d'écart-type) pour les clés du cache de scores
+SCORE_CACHE_QUANTUM = ENCODING_BANDWIDTH / 16
+
+# Nombre de noyaux ajustés conservés (un par (num_qubits, reps, feature_map))
+MAX_KERNEL_MODELS = 4
+
+# Plafond mémoire par défaut du cache de scores (en Mo)
+SCORE_CACHE_MAX_MB = float(os.environ.get('QUANTUM_SCORE_CACHE_MB', 64))
+
+# Rétention par défaut des lots du graphe vivant (en secondes)
+LIVE_GRAPH_RETENTION = float(os.environ.get('QUANTUM_LIVE_GRAPH_RETENTION', 300))
+
+# Détection en flux: taille des micro-lots, et connexions précédentes conservées comme
+# contexte des caractéristiques agrégées (diversité des ports, part de sources externes)
+STREAM_BATCH_SIZE = int(os.environ.get('QUANTUM_STREAM_BATCH_SIZE', 512))
+STREAM_CONTEXT_SIZE = int(os.environ.get('QUANTUM_STREAM_CONTEXT_SIZE', 2048))
+
+class ScoreCache:
+    """
+    Cache LRU borné des scores d'anomalie.
+    
+    Les clés sont un condensé du vecteur encodé et quantifié et de la
+    configuration de la feature map; les connexions répétées ne repassent
+    donc pas par l'évaluation du noyau.
+    """
+    
+    # Coût mémoire approximatif d'une entrée (clé de 16 octets, float, nœud de l'OrderedDict)
+    ENTRY_BYTES = 160
+    
+    def __init__(self, max_mb: float = SCORE_CACHE_MAX_MB):
+        self._entries: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @property
+    def max_entries(self) -> int:
+        return self.max_bytes // self.ENTRY_BYTES
+    
+    @staticmethod
+    def make_keys(quantized: np.ndarray, config: Tuple) -> List[bytes]:
+        """Calcule les clés de cache des lignes d'une matrice quantifiée."""
+        prefix = repr(config).encode()
+        rows = np.ascontiguousarray(quantized, dtype=np.int32)
+        return [hashlib.blake2b(prefix + row.tobytes(), digest_size=16).digest() for row in rows]
+    
+    def get(self, key: bytes) -> Optional[float]:
+        """Retourne le score en cache et le marque comme récemment utilisé."""
+        with self._lock:
+            score = self._entries.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return score
+    
+    def put(self, key: bytes, score: float) -> None:
+        """Ajoute un score et évince les entrées les moins récemment utilisées."""
+        with self._lock:
+            self._entries[key] = score
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def resize(self, max_mb: float) -> None:
+        """Modifie le plafond mémoire et évince l'excédent."""
+        with self._lock:
+            self.max_bytes = int(max_mb * 1024 * 1024)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Vide le cache sans réinitialiser les compteurs."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Retourne les compteurs du cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "memory_bytes": len(self._entries) * self.ENTRY_BYTES,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+def _is_internal_ip(ip: str) -> bool:
+    """Indique si une adresse IP appartient à un réseau privé."""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in INTERNAL_NETWORKS)
+
+def _window_groups(batch: ConnectionBatch, *columns: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Numérote les groupes (colonnes..., fenêtre de FEATURE_WINDOW secondes) des connexions.
+    
+    Sans timestamp, toutes les connexions du lot partagent la même fenêtre.
+    """
+    if batch.timestamps is None:
+        windows = np.zeros(len(batch), dtype=np.int64)
+    else:
+        windows = np.nan_to_num(np.floor(batch.timestamps / FEATURE_WINDOW), nan=0.0).astype(np.int64)
+    keys = np.column_stack([np.asarray(column, dtype=np.int64) for column in columns] + [windows])
+    _, groups = np.unique(keys, axis=0, return_inverse=True)
+    groups = groups.ravel()
+    return groups, int(groups.max()) + 1
+
+def extract_connection_features(network_data: Union[ConnectionBatch, List[Dict[str, Any]]]) -> np.ndarray:
+    """
+    Extrait un vecteur de caractéristiques par connexion.
+    
+    Colonnes: taille de paquet, ports distincts visés par la source sur la
+    même destination (au-delà de SCAN_PORT_ALLOWANCE), sources externes distinctes de la destination, source
+    interne, port de destination, protocole, destination interne, port source
+    (les trois premières sont les plus discriminantes et sont conservées même
+    avec peu de qubits).
+    
+    Les deux comptages sont absolus et limités à une fenêtre fixe de
+    FEATURE_WINDOW secondes: le trafic normal a la même distribution quel que
+    soit le nombre de connexions envoyées dans une requête, et le seuil
+    calibré sur la référence garde son taux de faux positifs.
+    
+    Args:
+        network_data: Lot de connexions (ou liste de connexions réseau)
+        
+    Returns:
+        Matrice (N, 8) de caractéristiques
+    """
+    batch = ConnectionBatch.from_records(network_data)
+    if len(batch) == 0:
+        return np.zeros((0, 8))
+    
+    src_ids = batch.source_ids
+    dst_ids = batch.destination_ids
+    internal = np.array([_is_internal_ip(ip) for ip in batch.ips], dtype=np.float64)
+    protocols = np.minimum(batch.protocol_codes, len(KNOWN_PROTOCOLS))
+    
+    # Ports distincts d'une source vers une même destination dans la fenêtre (scan de ports)
+    pairs, num_pairs = _window_groups(batch, src_ids, dst_ids)
+    ports_per_pair = count_distinct(pairs, batch.destination_ports, num_pairs)
+    
+    # Sources externes distinctes d'une destination dans la fenêtre (DDoS)
+    destinations, num_destinations = _window_groups(batch, dst_ids)
+    external_source = internal[src_ids] == 0
+    external_sources = count_distinct(destinations[external_source], src_ids[external_source], num_destinations)
+    
+    return np.column_stack([
+        batch.packet_sizes.astype(np.float64),
+        np.log1p(np.maximum(ports_per_pair[pairs] - SCAN_PORT_ALLOWANCE, 0)),
+        np.log1p(external_sources[destinations]),
+        internal[src_ids],
+        np.log1p(batch.destination_ports),
+        protocols / len(KNOWN_PROTOCOLS),
+        internal[dst_ids],
+        np.log1p(batch.source_ports),
+    ])
+
+def build_connection_graph(batch: ConnectionBatch) -> nx.Graph:
+    """
+    Construit le graphe des connexions d'un lot.
+    
+    Les nœuds suivent l'ordre d'apparition des IPs; chaque paire d'IPs donne
+    une arête, insérée à sa première occurrence avec le protocole et le port
+    de sa dernière occurrence, le nombre de connexions de la paire (count) et
+    leur volume cumulé (bytes).
+    
+    Args:
+        batch: Lot de connexions
+        
+    Returns:
+        Le graphe non orienté des connexions
+    """
+    G = nx.Graph()
+    empty_id = batch.ips.index('') if '' in batch.ips else -1
+    G.add_nodes_from((ip, {'type': 'ip'}) for ip in batch.ips if ip)
+    
+    src, dst = batch.source_ids, batch.destination_ids
+    valid = np.flatnonzero((src != empty_id) & (dst != empty_id))
+    if len(valid) == 0:
+        return G
+    
+    # Dédoublonner les paires non orientées: première et dernière occurrence
+    low = np.minimum(src[valid], dst[valid]).astype(np.int64)
+    high = np.maximum(src[valid], dst[valid]).astype(np.int64)
+    keys = low * batch.num_ips + high
+    _, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    _, last_reversed = np.unique(keys[::-1], return_index=True)
+    last = len(keys) - 1 - last_reversed
+    volumes = np.bincount(inverse, weights=batch.packet_sizes[valid], minlength=len(first))
+    order = np.argsort(first)
+    first_rows = valid[first[order]]
+    last_rows = valid[last[order]]
+    
+    ips = batch.ip_array
+    protocols = np.array(batch.protocols, dtype=object)
+    G.add_edges_from(zip(
+        ips[src[first_rows]].tolist(),
+        ips[dst[first_rows]].tolist(),
+        ({'protocol': proto, 'port': port, 'count': count, 'bytes': size} for proto, port, count, size in zip(
+            protocols[batch.protocol_codes[last_rows]].tolist(),
+            batch.destination_ports[last_rows].tolist(),
+            counts[order].tolist(),
+            volumes[order].astype(np.int64).tolist()
+        ))
+    ))
+    return G
+
+# Paramètres de style des rendus, inclus dans la clé des artefacts
+# Au-delà de LABEL_MAX_NODES nœuds, les étiquettes ne sont plus dessinées
+GRAPH_STYLE = {"figsize": (10, 8), "dpi": 300, "layout": "warm", "seed": 42}
+LABEL_MAX_NODES = 200
+HISTOGRAM_STYLE = {"figsize": (10, 6), "dpi": 100}
+CIRCUIT_STYLE = {"output": "mpl", "width": 10.0, "dpi": 150}
+
+# Sorties d'un graphe: image rendue côté serveur, ou mise en page JSON rendue par le client
+GRAPH_OUTPUTS = ("image", "layout")
+
+def graph_artifact_inputs(G: nx.Graph) -> Dict[str, Any]:
+    """Entrées déterminant l'image d'un graphe: nœuds (taille des super-nœuds), arêtes étiquetées et style."""
+    return {
+        "nodes": [[node, d.get('members', 1)] for node, d in G.nodes(data=True)],
+        "edges": [[u, v, d.get('protocol', ''), d.get('port', ''), d.get('edges', 1)] for u, v, d in G.edges(data=True)],
+        "style": GRAPH_STYLE
+    }
+
+def circuit_artifact_inputs(qc: "QuantumCircuit") -> Dict[str, Any]:
+    """Entrées déterminant l'image d'un circuit: structure des portes et style."""
+    return {
+        "qubits": qc.num_qubits,
+        "clbits": qc.num_clbits,
+        "gates": [
+            [inst.operation.name,
+             [str(p) for p in inst.operation.params],
+             [qc.find_bit(q).index for q in inst.qubits],
+             [qc.find_bit(c).index for c in inst.clbits]]
+            for inst in qc.data
+        ],
+        "style": CIRCUIT_STYLE
+    }
+
+# Les rendus dessinent sur leur propre Figure (voir figures): le pool de rendu
+# peut en exécuter plusieurs à la fois. La destination est un chemin ou un
+# tampon en mémoire; fmt et dpi sont choisis par la requête (ImageOptions)
+
+def render_network_graph(target: Union[str, BinaryIO], G: nx.Graph, fmt: str = 'png',
+                         dpi: float = GRAPH_STYLE["dpi"]) -> None:
+    """
+    Dessine le graphe de réseau avec les étiquettes protocole/port des arêtes.
+    
+    Les super-nœuds de sous-réseau (graph_lod) sont grisés et grossissent avec
+    le nombre d'IPs regroupées; une arête fusionnée indique le nombre d'arêtes qu'elle remplace.
+    """
+    fig = new_figure(GRAPH_STYLE["figsize"])
+    ax = fig.add_axes((0, 0, 1, 1))
+    started = time.perf_counter()
+    pos = layout_engine.layout(G)
+    observe_stage("render", "layout", time.perf_counter() - started)
+    labeled = G.number_of_nodes() <= LABEL_MAX_NODES
+    node_size = 1500 if labeled else 10
+    nodes = G.nodes(data=True)
+    nx.draw(G, pos, ax=ax, with_labels=labeled,
+            node_color=['lightgray' if d.get('type') == 'subnet' else 'skyblue' for _, d in nodes],
+            node_size=[node_size * (1 + np.log2(d.get('members', 1))) for _, d in nodes],
+            edge_color='gray', font_size=8, width=1.5 if labeled else 0.3, alpha=0.7)
+    
+    # Ajouter des étiquettes d'arêtes
+    if labeled:
+        edge_labels = {(u, v): f"{d.get('protocol', '')}/{d.get('port', '')}"
+                               + (f" x{d['edges']}" if d.get('edges', 1) > 1 else "")
+                    for u, v, d in G.edges(data=True)}
+        nx.draw_networkx_edge_labels(G, pos, ax=ax, edge_labels=edge_labels, font_size=6)
+    
+    ax.set_title("Graphe de Réseau")
+    ax.axis('off')
+    # Axes pleine figure: bbox_inches='tight' rogne les marges, sans tight_layout
+    fig.savefig(target, format=fmt, dpi=dpi, bbox_inches='tight')
+
+def render_circuit(target: Union[str, BinaryIO], qc: "QuantumCircuit", fmt: str = 'png',
+                   dpi: float = CIRCUIT_STYLE["dpi"]) -> None:
+    """Dessine un circuit quantique."""
+    fig = draw_circuit(qc, width=CIRCUIT_STYLE["width"])
+    fig.savefig(target, format=fmt, dpi=dpi, bbox_inches='tight')
+
+def render_histogram(target: Union[str, BinaryIO], counts: Dict[str, int], fmt: str = 'png',
+                     dpi: float = HISTOGRAM_STYLE["dpi"]) -> None:
+    """Dessine l'histogramme des mesures."""
+    fig = new_figure(HISTOGRAM_STYLE["figsize"])
+    ax = fig.add_subplot(111)
+    ax.bar(counts.keys(), counts.values())
+    ax.set_xlabel('Basis States')
+    ax.set_ylabel('Counts')
+    ax.set_title('Measurement Results')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    fig.savefig(target, format=fmt, dpi=dpi)
 
 class QuantumService:
     """Service pour l'intégration de QML dans QuantumEyes."""
     
     def __init__(self):
-        self.sampler = Sampler()  # Use the new Sampler primitive
-        self.num_qubits = 4
+        self.batched_sampler = BatchedSampler()
         self.api_token = None
         self.ibm_service = None
-        self.feature_map = None
-        self.ansatz = None
-        self.model_type = "qsvc"
-        self.optimizer_name = "cobyla"
-        self.feature_map_name = "zz"
-        self.ansatz_name = "real"
-        self.reps = 2
-        self.shots = 1024
-        self.scaler = StandardScaler()
+        # Configuration immuable et versionnée (voir service_config)
+        self._config = ConfigStore()
+        # Normalisation ajustée une fois sur le trafic de référence, puis un noyau par model_key
+        self.scaler = None
+        self._reference_sample = None
+        self._kernel_scorers: "OrderedDict[Tuple, QuantumKernelScorer]" = OrderedDict()
+        self._model_lock = threading.Lock()
+        self.score_cache = ScoreCache()
+        self.live_graph = IncrementalGraph(retention=LIVE_GRAPH_RETENTION)
+        self._live_graph_lock = threading.Lock()
+        # Modèle entraîné (model_training), projeté en mémoire depuis son fichier;
+        # un échec de chargement est rapporté par model_info (statut du service)
+        self._trained: Optional[TrainedModel] = None
+        self._model_generation = 0
+        self._model_error: Optional[str] = None
+        if os.path.exists(DEFAULT_MODEL_PATH):
+            self.load_model()
+        
+    @property
+    def sampler(self):
+        """Primitive Sampler, créée à la première utilisation."""
+        return self.batched_sampler.sampler
+    
+    @property
+    def config(self) -> ServiceConfig:
+        """
+        Instantané courant de la configuration.
+        
+        Une opération lit cet instantané une seule fois et le transmet à ses
+        étapes: une reconfiguration concurrente ne l'affecte pas.
+        """
+        return self._config.current
         
     def configure(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -62,50 +423,43 @@ class QuantumService:
             Dictionnaire avec le statut de la configuration
         """
         try:
-            # Mettre à jour les paramètres s'ils sont fournis
-            if 'num_qubits' in config:
-                self.num_qubits = config['num_qubits']
-            
-            if 'model_type' in config:
-                self.model_type = config['model_type']
-                
-            if 'backend' in config:
-                backend_name = config['backend']
-                if backend_name == 'simulator':
-                    self.backend = Aer.get_backend('qasm_simulator')
-            
-            if 'feature_map' in config:
-                self.feature_map_name = config['feature_map']
-                
-            if 'ansatz' in config:
-                self.ansatz_name = config['ansatz']
-                
-            if 'reps' in config:
-                self.reps = config['reps']
-                
-            if 'shots' in config:
-                self.shots = config['shots']
-                
-            if 'optimizer' in config:
-                self.optimizer_name = config['optimizer']
-            
-            # Créer le feature map
-            self._create_feature_map()
-            
-            # Créer l'ansatz
-            self._create_ansatz()
+            # Tous les réglages sont validés avant la publication: une requête
+            # invalide ne laisse ni nouvel instantané ni réglage à moitié appliqué
+            runtime = self._parse_runtime_settings(config)
+            changes = dict(config)
+            if changes.get('backend') == 'simulator':
+                from qiskit_aer import AerSimulator
+                changes['backend'] = AerSimulator()
+            else:
+                changes.pop('backend', None)
+            
+            # Nouvelle version publiée d'un bloc: les requêtes en cours gardent la leur.
+            # Le circuit paramétré et le noyau de chaque version sont construits à la
+            # première utilisation, une seule fois par configuration (caches de modèles)
+            snapshot = self._config.update(changes)
+            
+            # Réglages d'exécution du processus, hors instantané
+            if 'score_cache_mb' in runtime:
+                self.score_cache.resize(runtime['score_cache_mb'])
+            
+            if 'max_batch_size' in runtime:
+                self.batched_sampler.max_batch_size = runtime['max_batch_size']
+            
+            if 'scoring_workers' in runtime:
+                sharded_scorer.resize(runtime['scoring_workers'])
+            
+            if 'exact_max_qubits' in runtime:
+                exact_executor.max_qubits = runtime['exact_max_qubits']
             
             return {
                 "status": "success",
                 "message": "Configuration du service QML mise à jour avec succès",
+                "config_version": snapshot.version,
                 "config": {
-                    "num_qubits": self.num_qubits,
-                    "model_type": self.model_type,
-                    "feature_map": self.feature_map_name,
-                    "ansatz": self.ansatz_name,
-                    "reps": self.reps,
-                    "shots": self.shots,
-                    "optimizer": self.optimizer_name
+                    **snapshot.to_dict(),
+                    "max_batch_size": self.batched_sampler.max_batch_size,
+                    "exact_max_qubits": exact_executor.max_qubits,
+                    "scoring_workers": sharded_scorer.workers
                 }
             }
         except Exception as e:
@@ -114,6 +468,33 @@ class QuantumService:
                 "message": f"Erreur lors de la configuration: {str(e)}"
             }
     
+    @staticmethod
+    def _parse_runtime_settings(config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Valide les réglages d'exécution du processus (hors instantané de configuration).
+        
+        Args:
+            config: Dictionnaire de configuration
+            
+        Returns:
+            Les réglages présents, convertis (ValueError si l'un est invalide)
+        """
+        settings: Dict[str, Any] = {}
+        if 'score_cache_mb' in config:
+            settings['score_cache_mb'] = float(config['score_cache_mb'])
+            if not settings['score_cache_mb'] >= 0:
+                raise ValueError("score_cache_mb doit être un nombre positif ou nul")
+        for name in ('max_batch_size', 'scoring_workers'):
+            if name in config:
+                settings[name] = int(config[name])
+                if settings[name] < 1:
+                    raise ValueError(f"{name} doit être un entier positif")
+        if 'exact_max_qubits' in config:
+            settings['exact_max_qubits'] = int(config['exact_max_qubits'])
+            if not 0 <= settings['exact_max_qubits'] <= EXACT_MAX_QUBITS_LIMIT:
+                raise ValueError(f"exact_max_qubits doit être compris entre 0 et {EXACT_MAX_QUBITS_LIMIT}")
+        return settings
+    
     def set_api_token(self, token: str) -> Dict[str, Any]:
         """
         Configure le token API pour IBM Quantum.
@@ -127,6 +508,7 @@ class QuantumService:
         try:
             self.api_token = token
             # Initialiser le service IBM Quantum
+            from qiskit_ibm_runtime import QiskitRuntimeService
             self.ibm_service = QiskitRuntimeService(channel="ibm_quantum", token=token)
             backends = self.ibm_service.backends()
             return {
@@ -140,91 +522,462 @@ class QuantumService:
                 "message": f"Erreur lors de la configuration du token API: {str(e)}"
             }
     
-    def _create_feature_map(self) -> None:
-        """Crée le feature map en fonction des paramètres configurés."""
-        if self.feature_map_name == "zz":
-            self.feature_map = ZZFeatureMap(feature_dimension=self.num_qubits, reps=self.reps)
-        elif self.feature_map_name == "pauli":
-            self.feature_map = PauliFeatureMap(feature_dimension=self.num_qubits, reps=self.reps)
-        elif self.feature_map_name == "iqp":
-            self.feature_map = IQPFeatureMap(feature_dimension=self.num_qubits, reps=self.reps)
-        else:
-            self.feature_map = ZZFeatureMap(feature_dimension=self.num_qubits, reps=self.reps)
-    
-    def _create_ansatz(self) -> None:
-        """Crée l'ansatz en fonction des paramètres configurés."""
-        if self.ansatz_name == "real":
-            self.ansatz = RealAmplitudes(self.num_qubits, reps=self.reps)
-        elif self.ansatz_name == "efficient":
-            # Note: EfficientSU2 requires additional import if needed
-            self.ansatz = RealAmplitudes(self.num_qubits, reps=self.reps)
-        else:
-            self.ansatz = RealAmplitudes(self.num_qubits, reps=self.reps)
+    def circuit_template(self, target: Any = None, config: Optional[ServiceConfig] = None) -> CircuitTemplate:
+        """
+        Retourne le circuit paramétré (feature map + ansatz) d'une configuration.
+        
+        Le circuit est transpilé une seule fois par (num_qubits, reps, feature_map,
+        ansatz, cible); un lot d'échantillons se lie ensuite en une seule matrice
+        de paramètres (voir CircuitTemplate.pub).
+        
+        Args:
+            target: Backend cible (par défaut le backend configuré, sinon portes génériques)
+            config: Instantané de configuration (par défaut l'instantané courant)
+        """
+        config = config if config is not None else self.config
+        return template_cache.get(config.num_qubits, config.reps, config.feature_map, config.ansatz,
+                                  target if target is not None else config.backend)
+    
+    @property
+    def feature_map(self):
+        """Feature map de la configuration courante."""
+        return self.circuit_template().feature_map
     
-    def _get_optimizer(self):
+    @property
+    def ansatz(self):
+        """Ansatz de la configuration courante."""
+        return self.circuit_template().ansatz
+    
+    def _get_optimizer(self, config: Optional[ServiceConfig] = None, maxiter: int = DEFAULT_MAXITER):
         """Retourne l'optimiseur en fonction des paramètres configurés."""
-        if self.optimizer_name == "cobyla":
-            return COBYLA(maxiter=80)
-        elif self.optimizer_name == "spsa":
-            return SPSA(maxiter=80)
-        elif self.optimizer_name == "adam":
-            return ADAM(maxiter=80)
+        optimizer = (config if config is not None else self.config).optimizer
+        if optimizer == "cobyla":
+            return COBYLA(maxiter=maxiter)
+        elif optimizer == "spsa":
+            return SPSA(maxiter=maxiter, seed=42)
+        elif optimizer == "adam":
+            return ADAM(maxiter=maxiter)
         else:
-            return COBYLA(maxiter=80)
+            return COBYLA(maxiter=maxiter)
+    
+    def _encode_features(self, features: np.ndarray, config: ServiceConfig, scaler=None) -> np.ndarray:
+        """Normalise les caractéristiques et les projette sur config.num_qubits angles."""
+        columns = [i % features.shape[1] for i in range(config.num_qubits)]
+        scaled = (scaler if scaler is not None else self.scaler).transform(features)
+        return np.pi + np.clip(scaled[:, columns], -3.0, 3.0) * ENCODING_BANDWIDTH
+    
+    @staticmethod
+    def _reference_features() -> np.ndarray:
+        """Caractéristiques du trafic normal de référence (graine fixe, état de random préservé)."""
+        state = random.getstate()
+        random.seed(42)
+        try:
+            reference = NetworkDataGenerator().generate_normal_traffic(REFERENCE_TRAFFIC_SIZE)
+        finally:
+            random.setstate(state)
+        return extract_connection_features(reference)
+    
+    def _get_kernel_scorer(self, config: Optional[ServiceConfig] = None) -> QuantumKernelScorer:
+        """
+        Retourne le scorer à noyau quantique d'une configuration.
+        
+        La référence est un échantillon de trafic normal généré avec une graine
+        fixe, de sorte que les scores restent stables d'un appel à l'autre. Les
+        scorers ajustés sont conservés par (num_qubits, reps, feature_map): une
+        requête garde celui de son instantané même après une reconfiguration.
+        
+        Args:
+            config: Instantané de configuration (par défaut l'instantané courant)
+        """
+        config = config if config is not None else self.config
+        key = config.model_key
+        with self._model_lock:
+            scorer = self._kernel_scorers.get(key)
+            if scorer is not None:
+                self._kernel_scorers.move_to_end(key)
+                return scorer
+            
+            if self.scaler is None:
+                features = self._reference_features()
+                sample = np.random.RandomState(42).choice(len(features), REFERENCE_SIZE, replace=False)
+                self._reference_sample = features[sample]
+                self.scaler = FittedScaler.fit(features)
+            
+            scorer = QuantumKernelScorer(config.num_qubits, config.reps, config.feature_map)
+            scorer.fit(self._encode_features(self._reference_sample, config))
+            self._kernel_scorers[key] = scorer
+            while len(self._kernel_scorers) > MAX_KERNEL_MODELS:
+                self._kernel_scorers.popitem(last=False)
+            return scorer
+    
+    def _get_scorer(self, config: ServiceConfig) -> Tuple[Any, Any, Tuple]:
+        """
+        Retourne le scorer d'une configuration, sa normalisation et le préfixe de ses clés de cache.
+        
+        Le modèle entraîné est utilisé quand il correspond à la configuration
+        (model_type, model_key), sinon le scorer à noyau non supervisé. Le
+        préfixe inclut la génération du modèle chargé: un rechargement ne
+        réutilise jamais les scores de l'ancien modèle.
+        """
+        with self._model_lock:
+            trained = self._trained
+            if trained is not None and trained.matches(config):
+                return trained, self.scaler, config.model_key + (self._model_generation, trained.model_id)
+        scorer = self._get_kernel_scorer(config)
+        with self._model_lock:
+            return scorer, self.scaler, config.model_key + (self._model_generation, "kernel")
+    
+    def load_model(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Charge (ou recharge) le modèle entraîné depuis son fichier.
+        
+        Le fichier est projeté en mémoire: le chargement ne fait aucun calcul
+        d'entraînement. La normalisation et la référence du noyau enregistrées
+        remplacent celles du trafic de référence; les scorers à noyau et le
+        cache de scores sont invalidés.
+        
+        Args:
+            path: Chemin du fichier (par défaut DEFAULT_MODEL_PATH)
+            
+        Returns:
+            Dictionnaire avec le statut et la description du modèle chargé
+        """
+        path = path or DEFAULT_MODEL_PATH
+        try:
+            metadata, arrays = load_checkpoint(path)
+            trained = model_from_checkpoint(metadata, arrays)
+            scaler = FittedScaler(arrays["scaler_mean"], arrays["scaler_scale"])
+        except Exception as e:
+            self._model_error = f"Erreur lors du chargement du modèle {path}: {str(e)}"
+            return {
+                "status": "error",
+                "message": self._model_error
+            }
+        
+        with self._model_lock:
+            self.scaler = scaler
+            self._reference_sample = arrays["reference_sample"]
+            self._kernel_scorers.clear()
+            self._trained = trained
+            self._model_generation += 1
+            self._model_error = None
+        self.score_cache.clear()
+        return {
+            "status": "success",
+            "message": f"Modèle {trained.model_id} chargé",
+            "model": self.model_info()
+        }
+    
+    def model_info(self) -> Optional[Dict[str, Any]]:
+        """
+        Description du modèle entraîné chargé (None si aucun).
+        
+        error contient l'échec du dernier chargement; le modèle précédent, s'il
+        existe, reste utilisé.
+        """
+        trained, error = self._trained, self._model_error
+        if trained is None:
+            return {"model_id": None, "active": False, "error": error} if error else None
+        info = {
+            "model_id": trained.model_id,
+            "generation": self._model_generation,
+            "active": trained.matches(self.config),
+            **trained.metadata
+        }
+        if error:
+            info["error"] = error
+        return info
     
-    def generate_demo_quantum_circuit(self) -> Dict[str, Any]:
+    def train_model(self, normal_count: int = DEFAULT_NORMAL_COUNT, anomaly_count: int = DEFAULT_ANOMALY_COUNT,
+                    seed: int = 42, maxiter: int = DEFAULT_MAXITER, path: Optional[str] = None,
+                    config: Optional[ServiceConfig] = None) -> Dict[str, Any]:
+        """
+        Entraîne le modèle de config.model_type, l'enregistre puis le charge.
+        
+        Les données étiquetées viennent de NetworkDataGenerator.generate_mixed_dataset
+        (graine fixe). Le fichier contient la normalisation ajustée, la
+        référence du noyau, les vecteurs de support (QSVC) ou les poids
+        optimisés (VQC) et la configuration. Destiné à être lancé hors du
+        serveur (python model_training.py), qui charge ensuite le fichier.
+        
+        Args:
+            normal_count, anomaly_count: Taille du jeu d'entraînement
+            seed: Graine des données et de l'initialisation des poids
+            maxiter: Nombre d'itérations de l'optimiseur (VQC)
+            path: Fichier du modèle (par défaut DEFAULT_MODEL_PATH)
+            config: Instantané de configuration (par défaut l'instantané courant)
+            
+        Returns:
+            Dictionnaire avec le statut, la description du modèle et les durées
+        """
+        config = config if config is not None else self.config
+        path = path or DEFAULT_MODEL_PATH
+        if config.model_type not in TRAINABLE_MODELS:
+            return {
+                "status": "error",
+                "message": f"Type de modèle non entraînable: {config.model_type}"
+            }
+        if config.model_type == "vqc" and not exact_executor.supports(config.num_qubits):
+            return {
+                "status": "error",
+                "message": f"L'entraînement du VQC requiert l'évaluation exacte (au plus {exact_executor.max_qubits} qubits)"
+            }
+        
+        try:
+            timer = StageTimer("train_model")
+            with timer.stage("dataset"):
+                state = random.getstate()
+                random.seed(seed)
+                try:
+                    data, labels = NetworkDataGenerator().generate_mixed_dataset(normal_count, anomaly_count)
+                finally:
+                    random.setstate(state)
+                features = extract_connection_features(data)
+                labels = np.asarray(labels, dtype=np.int64)
+                scaler = FittedScaler.fit(features)
+                angles = self._encode_features(features, config, scaler)
+                reference = self._reference_features()
+                sample = np.random.RandomState(42).choice(len(reference), REFERENCE_SIZE, replace=False)
+            
+            previous = self._trained
+            metadata = {
+                "model_type": config.model_type,
+                "model_version": previous.metadata["model_version"] + 1 if previous is not None else 1,
+                "config": config.to_dict(),
+                "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "training": {
+                    "normal_count": normal_count,
+                    "anomaly_count": anomaly_count,
+                    "seed": seed
+                }
+            }
+            with timer.stage("fit"):
+                if config.model_type == "qsvc":
+                    model = QSVCModel.fit(metadata, angles, labels)
+                else:
+                    metadata["training"]["optimizer"] = config.optimizer
+                    model = VQCModel.fit(metadata, angles, labels, self._get_optimizer(config, maxiter), seed=seed)
+                predicted = model.score(angles)[1]
+                metadata["training"]["accuracy"] = float(np.mean(predicted == labels.astype(bool)))
+            
+            with timer.stage("checkpoint"):
+                save_checkpoint(path, metadata, {
+                    "scaler_mean": scaler.mean_,
+                    "scaler_scale": scaler.scale_,
+                    "reference_sample": reference[sample],
+                    **model.arrays()
+                })
+            loaded = self.load_model(path)
+            if loaded["status"] != "success":
+                return loaded
+            return {
+                "status": "success",
+                "message": f"Modèle {loaded['model']['model_id']} entraîné et enregistré",
+                "model": loaded["model"],
+                "path": path,
+                "timings": timer.finish()
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Erreur lors de l'entraînement du modèle: {str(e)}"
+            }
+    
+    def score_connections(self, network_data: Union[ConnectionBatch, List[Dict[str, Any]]],
+                          config: Optional[ServiceConfig] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calcule les scores d'anomalie de toutes les connexions en un seul lot.
+        
+        Args:
+            network_data: Lot de connexions (ou liste de connexions réseau)
+            config: Instantané de configuration (par défaut l'instantané courant)
+            
+        Returns:
+            Tuple (caractéristiques normalisées, scores, masque des anomalies)
+        """
+        return self._score_features(extract_connection_features(network_data), config)
+    
+    def _score_angles(self, scorer: Union[QuantumKernelScorer, TrainedModel], angles: np.ndarray) -> np.ndarray:
+        """Score des angles encodés: pool de processus pour les grands lots du noyau, sinon dans ce thread."""
+        if isinstance(scorer, QuantumKernelScorer) and sharded_scorer.enabled_for(len(angles)):
+            return sharded_scorer.score(scorer, angles)
+        return scorer.score(angles)[0]
+    
+    def _score_features(self, features: np.ndarray,
+                        config: Optional[ServiceConfig] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Calcule les scores d'anomalie d'une matrice de caractéristiques (voir score_connections)."""
+        config = config if config is not None else self.config
+        scorer, scaler, cache_prefix = self._get_scorer(config)
+        if len(features) == 0:
+            return features, np.zeros(0), np.zeros(0, dtype=bool)
+        
+        # Quantifier les angles et dédoublonner les flux identiques du lot
+        quantized = np.rint(self._encode_features(features, config, scaler) / SCORE_CACHE_QUANTUM).astype(np.int32)
+        unique_rows, inverse = np.unique(quantized, axis=0, return_inverse=True)
+        keys = ScoreCache.make_keys(unique_rows, cache_prefix)
+        
+        unique_scores = np.empty(len(unique_rows))
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.score_cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                unique_scores[i] = cached
+        
+        # Seuls les vecteurs absents du cache passent par le noyau
+        if missing:
+            missing = np.array(missing)
+            computed = self._score_angles(scorer, unique_rows[missing] * SCORE_CACHE_QUANTUM)
+            unique_scores[missing] = computed
+            for i, score in zip(missing, computed):
+                self.score_cache.put(keys[i], float(score))
+        
+        scores = unique_scores[inverse.ravel()]
+        return scaler.transform(features), scores, scores > scorer.threshold
+    
+    def _use_exact(self, config: ServiceConfig, weights: Optional[np.ndarray] = None) -> bool:
+        """Indique si une configuration est évaluée exactement en NumPy."""
+        return config.execution_mode == "exact" and exact_executor.supports(config.num_qubits, weights)
+
+    def warm_up(self) -> Dict[str, float]:
+        """
+        Construit les modèles de la configuration courante avant la première requête.
+
+        Utilisé par le serveur préchargé (serve.py): circuit paramétré transpilé,
+        noyau de scoring ajusté et, en mode exact, unitaire de l'ansatz sont
+        construits une fois dans le processus maître puis partagés par fork.
+        Aucun thread n'est démarré (pools de rendu et Sampler restent paresseux).
+
+        Returns:
+            Durées par étape (secondes)
+        """
+        config = self.config
+        timer = StageTimer("warm_up")
+        with timer.stage("circuit_template"):
+            template = self.circuit_template(config=config)
+        with timer.stage("kernel"):
+            # Modèle entraîné s'il correspond à la configuration (VQC: unitaire de son ansatz)
+            scorer, scaler, _ = self._get_scorer(config)
+            scorer.score(self._encode_features(self._reference_sample[:1], config, scaler))
+        if self._use_exact(config):
+            with timer.stage("exact_unitary"):
+                exact_executor.probabilities(template, np.zeros((1, config.num_qubits)))
+        with timer.stage("imports"):
+            new_figure((1, 1))
+        return timer.finish()
+
+    def sample_connections(self, network_data: Union[ConnectionBatch, List[Dict[str, Any]]],
+                           weights: Optional[np.ndarray] = None,
+                           shot_noise: Optional[bool] = None,
+                           config: Optional[ServiceConfig] = None) -> np.ndarray:
+        """
+        Exécute le circuit QML de toutes les connexions d'un lot.
+        
+        Jusqu'à exact_executor.max_qubits, les probabilités sont calculées
+        exactement par vecteurs d'état; au-delà (ou en mode "sampler"), les
+        connexions deviennent une matrice de paramètres soumise au Sampler en
+        jobs d'au plus max_batch_size échantillons.
+        
+        Args:
+            network_data: Lot de connexions (ou liste de connexions réseau)
+            weights: Poids de l'ansatz, partagés (num_weights,) ou par connexion (zéros par défaut)
+            shot_noise: Tire des comptages multinomiaux sur config.shots mesures (défaut: config.shot_noise)
+            config: Instantané de configuration (par défaut l'instantané courant)
+            
+        Returns:
+            Matrice (N, 2^num_qubits) des probabilités (ou fréquences mesurées)
+        """
+        config = config if config is not None else self.config
+        _, scaler, _ = self._get_scorer(config)  # normalisation du modèle chargé ou du trafic de référence
+        features = extract_connection_features(network_data)
+        if len(features) == 0:
+            return np.zeros((0, 2 ** config.num_qubits))
+        
+        template = self.circuit_template(config=config)
+        angles = self._encode_features(features, config, scaler)
+        if not self._use_exact(config, weights):
+            return self.batched_sampler.run([template.pub(angles, weights)], shots=config.shots)[0]
+        
+        probabilities = exact_executor.probabilities(template, angles, weights)
+        if config.shot_noise if shot_noise is None else shot_noise:
+            return sample_counts(probabilities, config.shots) / config.shots
+        return probabilities
+    
+    def generate_demo_quantum_circuit(self, timer: Optional[StageTimer] = None,
+                                      config: Optional[ServiceConfig] = None,
+                                      image: Optional[ImageOptions] = None) -> Dict[str, Any]:
         """
         Génère un circuit quantique de démonstration.
         
+        Args:
+            timer: Chronomètre de l'opération appelante (sinon opération "circuit_demo")
+            config: Instantané de configuration (par défaut l'instantané courant)
+            image: Format, résolution et destination des images (par défaut PNG)
+        
         Returns:
             Dictionnaire avec les informations du circuit
         """
+        owns_timer = timer is None
+        timer = StageTimer("circuit_demo") if owns_timer else timer
+        config = config if config is not None else self.config
         try:
+            from qiskit import QuantumCircuit
+            
             # Créer un circuit simple pour la démonstration
-            qc = QuantumCircuit(self.num_qubits)
+            qc = QuantumCircuit(config.num_qubits)
             
             # Ajouter des portes H sur tous les qubits
-            for i in range(self.num_qubits):
+            for i in range(config.num_qubits):
                 qc.h(i)
             
             # Ajouter des portes CNOT entre qubits adjacents
-            for i in range(self.num_qubits - 1):
+            for i in range(config.num_qubits - 1):
                 qc.cx(i, i + 1)
             
             # Mesurer tous les qubits
             qc.measure_all()
             
-            # Simuler le circuit
-            job = Aer.get_backend('qasm_simulator').run(qc, shots=self.shots)
-            result = job.result()
-            counts = result.get_counts(qc)
+            # Simuler le circuit: exactement si possible, sinon un seul job Sampler
+            with timer.stage("circuit_execution"):
+                if self._use_exact(config):
+                    distribution = circuit_probabilities(qc)
+                    if config.shot_noise:
+                        distribution = sample_counts(distribution, config.shots) / config.shots
+                else:
+                    distribution = self.batched_sampler.run([(qc, None)], shots=config.shots)[0]
+            counts = {
+                format(state, f'0{config.num_qubits}b'): int(round(p * config.shots))
+                for state, p in enumerate(distribution[0]) if p > 0
+            }
             
             # Convertir les counts en format pour l'API
             counts_list = [{"state": state, "count": count} for state, count in counts.items()]
             
-            # Générer une image du circuit
-            circuit_image = generate_filename("circuit")
-            qc.draw(output='mpl', filename=f"quantum_server/{circuit_image}")
-            
-            # Générer une image de l'histogramme
-            hist_image = generate_filename("histogram")
-            fig, ax = plt.subplots(figsize=(10, 6))
-            bars = ax.bar(counts.keys(), counts.values())
-            ax.set_xlabel('Basis States')
-            ax.set_ylabel('Counts')
-            ax.set_title('Measurement Results')
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.savefig(f"quantum_server/{hist_image}")
-            plt.close(fig)
+            # Planifier les images du circuit et de l'histogramme en arrière-plan
+            with timer.stage("render_submit"):
+                circuit_job = render_pipeline.submit_cached(
+                    "circuit", "circuit", circuit_artifact_inputs(qc), render_circuit, qc, image=image
+                )
+                hist_job = render_pipeline.submit_cached(
+                    "histogram", "histogram", {"counts": sorted(counts.items()), "style": HISTOGRAM_STYLE},
+                    render_histogram, counts, image=image
+                )
             
+            if owns_timer:
+                timer.finish()
             return {
                 "status": "success",
-                "circuit_image_url": f"/{circuit_image}",
-                "histogram_image_url": f"/{hist_image}",
+                "circuit_image_url": circuit_job.url,
+                "histogram_image_url": hist_job.url,
+                "artifacts": {
+                    "circuit": circuit_job.to_dict(),
+                    "histogram": hist_job.to_dict()
+                },
                 "counts": counts_list,
-                "num_qubits": self.num_qubits,
-                "shots": self.shots
+                "num_qubits": config.num_qubits,
+                "shots": config.shots,
+                "config_version": config.version
             }
         except Exception as e:
             return {
@@ -232,73 +985,104 @@ class QuantumService:
                 "message": f"Erreur lors de la génération du circuit: {str(e)}"
             }
 
-    def generate_graph_from_network_data(self, network_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def generate_graph_from_network_data(self, network_data: Union[ConnectionBatch, List[Dict[str, Any]]],
+                                         timer: Optional[StageTimer] = None,
+                                         image: Optional[ImageOptions] = None,
+                                         output: str = "image",
+                                         quantize_bits: Optional[int] = None,
+                                         keep: Iterable[str] = ()) -> Dict[str, Any]:
         """
         Génère un graphe à partir de données réseau.
         
+        Au-delà du budget d'affichage (graph_lod), le graphe affiché regroupe
+        les IPs en sous-réseaux, sauf celles de keep; les métriques portent
+        toujours sur le graphe complet.
+        
+        En sortie "layout", aucune image n'est rendue: la réponse contient la
+        mise en page (coordonnées, attributs des nœuds et des arêtes,
+        regroupements) en colonnes JSON, pour un rendu côté client.
+        
         Args:
-            network_data: Liste de connexions réseau
+            network_data: Lot de connexions (ou liste de connexions réseau)
+            timer: Chronomètre de l'opération appelante (sinon opération "network_graph")
+            image: Format, résolution et destination de l'image (par défaut PNG)
+            output: "image" (rendu en arrière-plan) ou "layout" (mise en page JSON)
+            quantize_bits: Coordonnées entières sur ce nombre de bits (sortie "layout")
+            keep: IPs affichées individuellement tant que le budget le permet, par
+                  priorité décroissante (par exemple celles des anomalies)
             
         Returns:
-            Dictionnaire avec les informations du graphe
+            Dictionnaire avec les informations du graphe (lod: niveau de détail affiché)
         """
+        owns_timer = timer is None
+        timer = StageTimer("network_graph") if owns_timer else timer
         try:
-            # Créer un graphe
-            G = nx.Graph()
-            
-            # Ajouter des nœuds et des arêtes
-            for conn in network_data:
-                src = conn.get('source_ip', '')
-                dst = conn.get('destination_ip', '')
-                proto = conn.get('protocol', '')
-                port = conn.get('destination_port', 0)
-                
-                # Ajouter des nœuds
-                if src and src not in G:
-                    G.add_node(src, type='ip')
-                if dst and dst not in G:
-                    G.add_node(dst, type='ip')
-                    
-                # Ajouter une arête si les deux nœuds existent
-                if src and dst:
-                    G.add_edge(src, dst, protocol=proto, port=port)
-            
-            # Générer une visualisation du graphe
-            graph_image = generate_filename("network_graph")
-            plt.figure(figsize=(10, 8))
-            pos = nx.spring_layout(G, seed=42)
-            nx.draw(G, pos, with_labels=True, node_color='skyblue', 
-                    node_size=1500, edge_color='gray', font_size=8,
-                    width=1.5, alpha=0.7)
-            
-            # Ajouter des étiquettes d'arêtes
-            edge_labels = {(u, v): f"{d.get('protocol', '')}/{d.get('port', '')}" 
-                        for u, v, d in G.edges(data=True)}
-            nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_size=6)
-            
-            plt.title("Graphe de Réseau")
-            plt.axis('off')
-            plt.tight_layout()
-            plt.savefig(f"quantum_server/{graph_image}", dpi=300, bbox_inches='tight')
-            plt.close()
+            if output not in GRAPH_OUTPUTS:
+                raise ValueError(f"sortie inconnue '{output}' ({', '.join(GRAPH_OUTPUTS)})")
+            
+            # Créer le graphe à partir des colonnes du lot
+            with timer.stage("graph_build"):
+                G = build_connection_graph(ConnectionBatch.from_records(network_data))
+            
+            # Vue affichée, bornée par le budget d'affichage
+            with timer.stage("level_of_detail"):
+                keep = list(dict.fromkeys(keep))
+                view, lod_prefix = level_of_detail(G, keep)
+            
+            if output == "layout":
+                # Mise en page synchrone, sans Matplotlib
+                with timer.stage("layout"):
+                    pos = layout_engine.layout(view)
+                with timer.stage("layout_export"):
+                    # Un super-nœud est interne si son adresse de réseau l'est
+                    internal = [_is_internal_ip(str(node).split('/')[0]) for node in view.nodes()]
+                    layout = layout_payload(view, pos, internal, quantize_bits)
+                graph_job = None
+            else:
+                # Planifier la visualisation du graphe (mise en page et rendu) en arrière-plan
+                with timer.stage("render_submit"):
+                    graph_job = render_pipeline.submit_cached(
+                        "graph", "network_graph", graph_artifact_inputs(view), render_network_graph, view, image=image
+                    )
             
             # Extraire des métriques de graphe
-            metrics = {
-                "nodes": len(G.nodes()),
-                "edges": len(G.edges()),
-                "density": nx.density(G) if len(G.nodes()) > 1 else 0,
-                "avg_degree": sum(dict(G.degree()).values()) / len(G.nodes()) if len(G.nodes()) > 0 else 0,
-                "connected_components": nx.number_connected_components(G) if len(G.nodes()) > 0 else 0,
-                "avg_clustering": nx.average_clustering(G) if len(G.nodes()) > 1 else 0
-            }
+            with timer.stage("graph_metrics"):
+                metrics = {
+                    "nodes": len(G.nodes()),
+                    "edges": len(G.edges()),
+                    "density": nx.density(G) if len(G.nodes()) > 1 else 0,
+                    "avg_degree": sum(dict(G.degree()).values()) / len(G.nodes()) if len(G.nodes()) > 0 else 0,
+                    "connected_components": nx.number_connected_components(G) if len(G.nodes()) > 0 else 0,
+                    "avg_clustering": nx.average_clustering(G) if len(G.nodes()) > 1 else 0
+                }
             
+            lod = {
+                "prefix": lod_prefix,
+                "nodes": view.number_of_nodes(),
+                "edges": view.number_of_edges(),
+                "expanded": sum(1 for node in keep if node in view)
+            }
+            if owns_timer:
+                timer.finish()
+            if graph_job is None:
+                return {
+                    "status": "success",
+                    "graph_image_url": None,
+                    "artifacts": {},
+                    "metrics": metrics,
+                    "lod": lod,
+                    "layout": layout
+                }
             return {
                 "status": "success",
-                "graph_image_url": f"/{graph_image}",
+                "graph_image_url": graph_job.url,
+                "artifacts": {"graph": graph_job.to_dict()},
                 "metrics": metrics,
-                "nodes": list(G.nodes()),
-                "edges": [{"source": u, "target": v, "protocol": d.get('protocol', ''), "port": d.get('port', 0)} 
-                         for u, v, d in G.edges(data=True)]
+                "lod": lod,
+                "nodes": list(view.nodes()),
+                "edges": [{"source": u, "target": v, "protocol": d.get('protocol', ''), "port": d.get('port', 0),
+                           "count": d.get('count', 1), "bytes": d.get('bytes', 0)}
+                         for u, v, d in view.edges(data=True)]
             }
         except Exception as e:
             return {
@@ -306,59 +1090,239 @@ class QuantumService:
                 "message": f"Erreur lors de la génération du graphe: {str(e)}"
             }
             
-    def detect_anomalies(self, network_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def update_live_graph(self, network_data: Union[ConnectionBatch, List[Dict[str, Any]]],
+                          expire_before: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Ajoute un lot de connexions au graphe vivant et retourne ses métriques.
+        
+        Les métriques sont mises à jour incrémentalement: le coût dépend du lot,
+        pas de l'historique conservé.
+        
+        Args:
+            network_data: Lot de connexions (ou liste de connexions réseau)
+            expire_before: Horodatage avant lequel les lots sont expirés
+            
+        Returns:
+            Dictionnaire avec les métriques du graphe vivant
+        """
+        try:
+            batch = ConnectionBatch.from_records(network_data)
+            with self._live_graph_lock:
+                if len(batch):
+                    self.live_graph.add_batch(batch)
+                if expire_before is not None:
+                    self.live_graph.expire(expire_before)
+                metrics = self.live_graph.metrics()
+            
+            return {
+                "status": "success",
+                "metrics": metrics
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Erreur lors de la mise à jour du graphe vivant: {str(e)}"
+            }
+    
+    def get_live_graph_metrics(self) -> Dict[str, Any]:
+        """Retourne les métriques du graphe vivant sans le modifier."""
+        with self._live_graph_lock:
+            metrics = self.live_graph.metrics()
+        return {
+            "status": "success",
+            "metrics": metrics
+        }
+            
+    def _describe_anomalies(self, batch: ConnectionBatch, scaled: np.ndarray, scores: np.ndarray, mask: np.ndarray,
+                            row_offset: int = 0, id_offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Décrit les connexions marquées comme anomalies.
+        
+        Le type d'anomalie suit la caractéristique d'attaque la plus déviante.
+        
+        Args:
+            batch: Lot de connexions
+            scaled, scores, mask: Résultats de _score_features pour les lignes row_offset.. du lot
+            row_offset: Première ligne du lot couverte par les résultats
+            id_offset: Identifiant de la première connexion couverte (flux)
+        """
+        type_columns = list(ANOMALY_TYPE_FEATURES)
+        anomalies = []
+        indices = np.flatnonzero(mask)
+        for i, conn in zip(indices, batch.to_records(indices + row_offset)):
+            dominant = type_columns[int(np.argmax(scaled[i, type_columns]))]
+            anomalies.append({
+                "connection_id": int(i + id_offset),
+                "source_ip": conn['source_ip'],
+                "destination_ip": conn['destination_ip'],
+                "protocol": conn['protocol'],
+                "port": conn['destination_port'],
+                "anomaly_score": float(scores[i]),
+                "anomaly_type": ANOMALY_TYPE_FEATURES[dominant]
+            })
+        return anomalies
+    
+    def detect_anomalies_stream(self, lines: Iterable[Union[bytes, str]], batch_size: int = STREAM_BATCH_SIZE,
+                                context_size: int = STREAM_CONTEXT_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Détecte les anomalies d'un flux de connexions NDJSON, par micro-lots.
+        
+        Chaque micro-lot est scoré dès qu'il est complet, avec au plus
+        context_size connexions précédentes comme contexte des caractéristiques
+        agrégées; seules les nouvelles connexions sont rapportées. La mémoire
+        reste bornée quelle que soit la taille du flux.
+        
+        Args:
+            lines: Lignes JSON, une connexion par ligne (lignes vides ignorées)
+            batch_size: Nombre de connexions par micro-lot
+            context_size: Nombre de connexions précédentes conservées comme contexte
+            
+        Returns:
+            Itérateur d'événements: {"type": "anomaly", ...} par anomalie,
+            {"type": "error", "line", "message"} par ligne invalide, puis
+            {"type": "summary", ...} à la fin du flux (avec la version de
+            configuration utilisée pour tout le flux)
+        """
+        timer = StageTimer("detect_anomalies_stream")
+        config = self.config
+        # Le contexte reste en colonnes: seules les nouvelles connexions sont converties à chaque micro-lot
+        context: Optional[ConnectionBatch] = None
+        pending: List[Dict[str, Any]] = []
+        analyzed = detected = batches = 0
+        
+        def flush() -> Iterator[Dict[str, Any]]:
+            nonlocal context, analyzed, detected, batches
+            with timer.stage("scoring"):
+                if context is None:
+                    batch = ConnectionBatch.from_records(pending)
+                else:
+                    batch = ConnectionBatch.concat([
+                        context,
+                        ConnectionBatch.from_records(pending, ips=context.ips, protocols=context.protocols)
+                    ])
+                offset = len(batch) - len(pending)
+                features = extract_connection_features(batch)[offset:]
+                scaled, scores, mask = self._score_features(features, config)
+            with timer.stage("report"):
+                anomalies = self._describe_anomalies(batch, scaled, scores, mask, offset, analyzed)
+            analyzed += len(pending)
+            detected += len(anomalies)
+            batches += 1
+            # Table d'IPs réduite au contexte conservé: la mémoire reste bornée sur un flux infini
+            context = batch.take(slice(-context_size, None)).compacted() if context_size > 0 else None
+            pending.clear()
+            for anomaly in anomalies:
+                yield {"type": "anomaly", **anomaly}
+        
+        for line_number, line in enumerate(lines, start=1):
+            with timer.stage("parse"):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    connection = json.loads(line)
+                    if not isinstance(connection, dict):
+                        raise ValueError("une connexion doit être un objet JSON")
+                except ValueError as e:
+                    error = {"type": "error", "line": line_number, "message": str(e)}
+                else:
+                    error = None
+                    pending.append(connection)
+            if error is not None:
+                yield error
+            elif len(pending) >= batch_size:
+                yield from flush()
+        
+        if pending:
+            yield from flush()
+        
+        yield {
+            "type": "summary",
+            "connections_analyzed": analyzed,
+            "anomalies_detected": detected,
+            "batches": batches,
+            "config_version": config.version,
+            "timings": timer.finish()
+        }
+    
+    def detect_anomalies(self, network_data: Union[ConnectionBatch, List[Dict[str, Any]]],
+                         timer: Optional[StageTimer] = None,
+                         image: Optional[ImageOptions] = None,
+                         graph_output: str = "image",
+                         quantize_bits: Optional[int] = None) -> Dict[str, Any]:
         """
         Détecte les anomalies dans les données réseau à l'aide de QML.
         
+        La réponse contient la durée réelle de chaque étape synchrone; la mise
+        en page et le rendu des images, faits en arrière-plan, sont mesurés
+        dans les histogrammes de /api/quantum/metrics (opération "render").
+        
         Args:
-            network_data: Liste de connexions réseau
+            network_data: Lot de connexions (ou liste de connexions réseau)
+            timer: Chronomètre démarré par l'appelant (par exemple avant l'analyse JSON)
+            image: Format, résolution et destination des images (par défaut PNG)
+            graph_output: Sortie du graphe, "image" ou "layout" (voir generate_graph_from_network_data)
+            quantize_bits: Quantification des coordonnées de la mise en page
             
         Returns:
-            Dictionnaire avec les résultats de la détection
+            Dictionnaire avec les résultats de la détection (config_version: version
+            de la configuration qui a scoré le lot)
         """
+        timer = timer if timer is not None else StageTimer("detect_anomalies")
+        config = self.config
         try:
-            # Générer un graphe à partir des données réseau
-            graph_result = self.generate_graph_from_network_data(network_data)
+            # Convertir une seule fois en colonnes pour le graphe et le scoring
+            if not isinstance(network_data, ConnectionBatch):
+                with timer.stage("parse"):
+                    network_data = ConnectionBatch.from_records(network_data)
+            
+            # Scorer toutes les connexions par noyau de fidélité quantique
+            with timer.stage("scoring"):
+                scaled, scores, mask = self.score_connections(network_data, config)
+            
+            with timer.stage("report"):
+                anomalies = self._describe_anomalies(network_data, scaled, scores, mask)
+            
+            # Générer un graphe à partir des données réseau; les IPs des anomalies les mieux
+            # scorées restent détaillées dans la limite du budget d'affichage
+            ranked = sorted(anomalies, key=lambda anomaly: anomaly["anomaly_score"], reverse=True)
+            graph_result = self.generate_graph_from_network_data(
+                network_data, timer, image, graph_output, quantize_bits,
+                keep=[ip for anomaly in ranked for ip in (anomaly["source_ip"], anomaly["destination_ip"])]
+            )
             
             if graph_result["status"] == "error":
                 return graph_result
             
-            # Simuler la détection d'anomalies
-            # Pour une démonstration, utiliser des anomalies générées
-            anomalies = []
-            
-            # Simuler quelques anomalies
-            for i, conn in enumerate(network_data):
-                if i % 10 == 0:  # Simuler environ 10% d'anomalies
-                    score = np.random.uniform(0.85, 0.99)
-                    anomalies.append({
-                        "connection_id": i,
-                        "source_ip": conn.get('source_ip', ''),
-                        "destination_ip": conn.get('destination_ip', ''),
-                        "protocol": conn.get('protocol', ''),
-                        "port": conn.get('destination_port', 0),
-                        "anomaly_score": score,
-                        "anomaly_type": "port_scan" if i % 3 == 0 else "data_exfil" if i % 3 == 1 else "ddos"
-                    })
-            
             # Générer un circuit quantique pour la détection
-            qc_result = self.generate_demo_quantum_circuit()
+            qc_result = self.generate_demo_quantum_circuit(timer, config, image)
+            
+            # Les images sont rendues en arrière-plan; le client suit leur statut
+            artifacts = dict(graph_result["artifacts"])
+            if qc_result["status"] == "success":
+                artifacts.update(qc_result["artifacts"])
             
+            timings = timer.finish()
             return {
                 "status": "success",
                 "graph_image_url": graph_result["graph_image_url"],
                 "circuit_image_url": qc_result["circuit_image_url"] if qc_result["status"] == "success" else None,
                 "histogram_image_url": qc_result["histogram_image_url"] if qc_result["status"] == "success" else None,
+                "artifacts": artifacts,
+                "graph_layout": graph_result.get("layout"),
+                "graph_lod": graph_result["lod"],
                 "metrics": graph_result["metrics"],
                 "anomalies_detected": len(anomalies),
                 "anomalies": anomalies,
-                "execution_time": np.random.uniform(2, 8),  # Temps simulé en secondes
+                "execution_time": timings["total"],
+                "timings": timings,
                 "connections_analyzed": len(network_data),
+                "config_version": config.version,
                 "quantum_simulation": {
-                    "qubits": self.num_qubits,
-                    "shots": self.shots,
-                    "feature_map": self.feature_map_name,
-                    "ansatz": self.ansatz_name
+                    "qubits": config.num_qubits,
+                    "shots": config.shots,
+                    "feature_map": config.feature_map,
+                    "ansatz": config.ansatz
                 }
             }
         except Exception as e:
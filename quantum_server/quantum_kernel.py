@@ -0,0 +1,165 @@
+"""
+QuantumEyes - Noyau quantique vectorisé
+
+Ce module simule en NumPy, par lots, les feature maps ZZ/Pauli de Qiskit
+et calcule des scores de noyau de fidélité contre un ensemble de référence.
+Les feature maps Z/ZZ étant diagonales entre deux couches de Hadamard,
+l'état encodé s'obtient par une transformée de Walsh-Hadamard et un vecteur
+de phases, sans construire de circuit par échantillon.
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+
+# Nombre de connexions encodées simultanément (borne la mémoire des états)
+DEFAULT_BATCH_SIZE = 4096
+
+# Nombre de voisins de référence utilisés pour le score
+DEFAULT_TOP_K = 5
+
+# Quantile des scores de référence utilisé comme seuil d'anomalie
+DEFAULT_THRESHOLD_QUANTILE = 0.99
+
+
+def _basis_bits(num_qubits: int) -> np.ndarray:
+    """Retourne la matrice (2^n, n) des bits des états de base (qubit 0 = bit de poids faible)."""
+    indices = np.arange(2 ** num_qubits)
+    return ((indices[:, None] >> np.arange(num_qubits)) & 1).astype(np.float64)
+
+
+def _hadamard_all(states: np.ndarray, num_qubits: int) -> np.ndarray:
+    """Applique H sur tous les qubits d'un lot d'états (transformée de Walsh-Hadamard)."""
+    batch = states.shape[0]
+    out = states
+    for q in range(num_qubits):
+        view = out.reshape(batch, -1, 2, 2 ** q)
+        a = view[:, :, 0, :]
+        b = view[:, :, 1, :]
+        out = np.stack((a + b, a - b), axis=2).reshape(batch, -1)
+    return out * (2 ** (-num_qubits / 2))
+
+
+class FeatureMapEncoder:
+    """Encodeur NumPy équivalent à ZZFeatureMap / PauliFeatureMap(['Z', 'ZZ'])."""
+
+    def __init__(self, num_qubits: int = 4, reps: int = 2, feature_map: str = "zz"):
+        self.num_qubits = num_qubits
+        self.reps = reps
+        self.feature_map = feature_map
+
+        # Paires de qubits pour l'intrication "full" (i < j), comme Qiskit
+        self.pairs = [(i, j) for i in range(num_qubits) for j in range(i + 1, num_qubits)]
+
+        bits = _basis_bits(num_qubits)
+        self._single_bits = bits.T  # (n, 2^n)
+        if self.pairs:
+            left = np.array([i for i, _ in self.pairs])
+            right = np.array([j for _, j in self.pairs])
+            # Parité z_i XOR z_j pour chaque paire et chaque état de base
+            self._pair_parity = np.logical_xor(bits[:, left], bits[:, right]).astype(np.float64).T
+            self._left = left
+            self._right = right
+        else:
+            self._pair_parity = np.zeros((0, 2 ** num_qubits))
+            self._left = self._right = np.zeros(0, dtype=int)
+
+    def phases(self, X: np.ndarray) -> np.ndarray:
+        """
+        Calcule la phase diagonale d'une couche de la feature map.
+
+        Args:
+            X: Matrice (B, num_qubits) de caractéristiques encodées
+
+        Returns:
+            Matrice (B, 2^n) des phases par état de base
+        """
+        phase = 2.0 * X @ self._single_bits
+        if self.pairs:
+            pair_values = (np.pi - X[:, self._left]) * (np.pi - X[:, self._right])
+            phase += 2.0 * pair_values @ self._pair_parity
+        return phase
+
+    def encode(self, X: np.ndarray) -> np.ndarray:
+        """
+        Calcule les vecteurs d'état |phi(x)> pour un lot de points.
+
+        Args:
+            X: Matrice (B, num_qubits) de caractéristiques encodées
+
+        Returns:
+            Matrice complexe (B, 2^n) des vecteurs d'état
+        """
+        X = np.asarray(X, dtype=np.float64)
+        diagonal = np.exp(1j * self.phases(X))
+
+        # Première couche: H|0...0> est l'état uniforme
+        states = diagonal * (2 ** (-self.num_qubits / 2))
+        for _ in range(self.reps - 1):
+            states = diagonal * _hadamard_all(states, self.num_qubits)
+        return states
+
+
+class QuantumKernelScorer:
+    """Score d'anomalie par noyau de fidélité contre un ensemble de référence."""
+
+    def __init__(self, num_qubits: int = 4, reps: int = 2, feature_map: str = "zz",
+                 batch_size: int = DEFAULT_BATCH_SIZE, top_k: int = DEFAULT_TOP_K,
+                 threshold_quantile: float = DEFAULT_THRESHOLD_QUANTILE):
+        self.encoder = FeatureMapEncoder(num_qubits, reps, feature_map)
+        self.batch_size = batch_size
+        self.top_k = top_k
+        self.threshold_quantile = threshold_quantile
+        self.reference_states: Optional[np.ndarray] = None
+        self.threshold = 1.0
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.reference_states is not None
+
+    def fit(self, reference: np.ndarray) -> "QuantumKernelScorer":
+        """
+        Encode l'ensemble de référence (trafic normal) et calibre le seuil.
+
+        Args:
+            reference: Matrice (R, num_qubits) de caractéristiques encodées
+
+        Returns:
+            Le scorer lui-même
+        """
+        states = self.encoder.encode(reference)
+        self.reference_states = np.ascontiguousarray(states.conj().T)
+
+        # Scores de la référence contre elle-même, en excluant la diagonale
+        kernel = np.abs(states @ self.reference_states) ** 2
+        np.fill_diagonal(kernel, 0.0)
+        self.threshold = float(np.quantile(self._scores_from_kernel(kernel), self.threshold_quantile))
+        return self
+
+    def kernel(self, X: np.ndarray) -> np.ndarray:
+        """Calcule la matrice de noyau (B, R) entre X et la référence."""
+        if not self.is_fitted:
+            raise RuntimeError("Le scorer doit être ajusté avant le calcul du noyau")
+        return np.abs(self.encoder.encode(X) @ self.reference_states) ** 2
+
+    def _scores_from_kernel(self, kernel: np.ndarray) -> np.ndarray:
+        """Score = 1 - fidélité moyenne aux k plus proches points de référence."""
+        k = min(self.top_k, kernel.shape[1])
+        nearest = np.partition(kernel, kernel.shape[1] - k, axis=1)[:, -k:]
+        return 1.0 - nearest.mean(axis=1)
+
+    def score(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calcule les scores d'anomalie d'un lot de points.
+
+        Args:
+            X: Matrice (B, num_qubits) de caractéristiques encodées
+
+        Returns:
+            Tuple (scores, masque booléen des anomalies)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        scores = np.empty(len(X))
+        for start in range(0, len(X), self.batch_size):
+            chunk = X[start:start + self.batch_size]
+            scores[start:start + len(chunk)] = self._scores_from_kernel(self.kernel(chunk))
+        return scores, scores > self.threshold
@@ -6,22 +6,110 @@ Ce module fournit un serveur Flask qui simule l'API du module QML pour les tests
 import os
 import random
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 
+from artifact_cache import STATIC_DIR, ArtifactCache
+from figures import new_figure
+
 app = Flask(__name__)
 CORS(app)
 
-# Création du dossier pour les images statiques
-os.makedirs('static', exist_ok=True)
+# Cache des images statiques, nommées par le condensé de leurs entrées
+artifact_cache = ArtifactCache(STATIC_DIR)
+
+def render_cached(prefix: str, inputs, draw) -> str:
+    """
+    Rend une image sauf si une image identique existe déjà.
+    
+    Args:
+        prefix: Préfixe du nom de fichier
+        inputs: Entrées déterminant l'image
+        draw: Fonction qui dessine et sauvegarde la figure au chemin donné
+        
+    Returns:
+        Chemin relatif de l'image (static/...)
+    """
+    filename = artifact_cache.filename(prefix, prefix, inputs)
+    if not artifact_cache.lookup(filename):
+        # Rendu dans un fichier temporaire puis renommé: une requête concurrente
+        # ne trouve jamais d'image partielle sous le nom final
+        tmp_path = artifact_cache.temporary_path(filename)
+        try:
+            draw(tmp_path)
+            os.replace(tmp_path, artifact_cache.path(filename))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        artifact_cache.enforce_limit(keep=filename)
+    return filename
+
+def draw_gate_circuit(path: str, gates, title: str) -> None:
+    """Dessine un circuit simplifié à 4 qubits (portes, CNOT, mesures)."""
+    fig = new_figure((8, 6))
+    ax = fig.add_subplot(111)
+    ax.plot([0, 1, 2, 3], [0, 0, 0, 0], 'k-', linewidth=2)
+    ax.plot([0, 1, 2, 3], [1, 1, 1, 1], 'k-', linewidth=2)
+    ax.plot([0, 1, 2, 3], [2, 2, 2, 2], 'k-', linewidth=2)
+    ax.plot([0, 1, 2, 3], [3, 3, 3, 3], 'k-', linewidth=2)
+    
+    # Ajouter des symboles pour les portes
+    for x, label, color, wires in gates:
+        for y in wires:
+            ax.text(x, y, label, fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor=color))
+        if label == 'CNOT':
+            ax.plot([x, x], [wires[0], wires[0] + 1], 'g-', linewidth=2)
+    
+    ax.set_title(title)
+    ax.axis('off')
+    fig.tight_layout()
+    fig.savefig(path)
+
+def draw_network(path: str, nodes, edges, pos, title: str, anomaly_edges=()) -> None:
+    """Dessine un graphe de réseau en disposition circulaire."""
+    fig = new_figure((10, 8))
+    ax = fig.add_subplot(111)
+    
+    # Dessiner les nœuds
+    ax.scatter([pos[node][0] for node in nodes], 
+                [pos[node][1] for node in nodes], 
+                s=500, color='skyblue', edgecolors='black', zorder=2)
+    
+    # Ajouter les étiquettes
+    for node in nodes:
+        ax.text(pos[node][0], pos[node][1], node, 
+                 fontsize=8, ha='center', va='center', zorder=3)
+    
+    # Dessiner les arêtes
+    for src, dst in edges:
+        ax.plot([pos[src][0], pos[dst][0]], 
+                 [pos[src][1], pos[dst][1]], 
+                 'gray', alpha=0.5, zorder=1)
+    
+    # Surligner les anomalies
+    for src, dst in anomaly_edges:
+        ax.plot([pos[src][0], pos[dst][0]], 
+                 [pos[src][1], pos[dst][1]], 
+                 'red', linewidth=2, alpha=0.7, zorder=4)
+    
+    ax.set_title(title)
+    ax.axis('off')
+    fig.tight_layout()
+    fig.savefig(path, dpi=300, bbox_inches='tight')
 
-# Générer des noms de fichiers uniques basés sur la date et l'heure
-def generate_filename(prefix: str, ext: str = 'png') -> str:
-    """Génère un nom de fichier unique basé sur la date et l'heure."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return f"static/{prefix}_{timestamp}.{ext}"
+# Circuits de démonstration: (position, porte, couleur, qubits)
+DEMO_CIRCUIT_GATES = [
+    (0.5, 'H', 'blue', [0, 1, 2, 3]),
+    (1.5, 'CNOT', 'green', [0]),
+    (1.5, 'CNOT', 'green', [2]),
+    (2.5, 'M', 'red', [0, 1, 2, 3])
+]
+QML_CIRCUIT_GATES = [
+    (0.5, 'H', 'blue', [0, 1, 2, 3]),
+    (1.5, 'RZ', 'purple', [0, 1, 2, 3]),
+    (2.5, 'M', 'red', [0, 1, 2, 3])
+]
 
 # Statut du service QML
 qml_status = {
@@ -100,41 +188,12 @@ def ibm_connect():
 @app.route('/api/quantum/circuit/demo', methods=['GET'])
 def circuit_demo():
     """Génère un circuit quantique de démonstration."""
-    # Générer des images pour la démo
-    circuit_image = generate_filename("circuit")
-    
-    # Créer une image de circuit simple
-    plt.figure(figsize=(8, 6))
-    plt.plot([0, 1, 2, 3], [0, 0, 0, 0], 'k-', linewidth=2)
-    plt.plot([0, 1, 2, 3], [1, 1, 1, 1], 'k-', linewidth=2)
-    plt.plot([0, 1, 2, 3], [2, 2, 2, 2], 'k-', linewidth=2)
-    plt.plot([0, 1, 2, 3], [3, 3, 3, 3], 'k-', linewidth=2)
+    # Générer des images pour la démo (réutilisée si déjà rendue)
+    circuit_image = render_cached(
+        "circuit", {"gates": DEMO_CIRCUIT_GATES},
+        lambda path: draw_gate_circuit(path, DEMO_CIRCUIT_GATES, "Circuit Quantique de Démonstration")
+    )
     
-    # Ajouter des symboles pour les portes
-    plt.text(0.5, 0, 'H', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='blue'))
-    plt.text(0.5, 1, 'H', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='blue'))
-    plt.text(0.5, 2, 'H', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='blue'))
-    plt.text(0.5, 3, 'H', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='blue'))
-    
-    plt.text(1.5, 0, 'CNOT', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='green'))
-    plt.plot([1.5, 1.5], [0, 1], 'g-', linewidth=2)
-    
-    plt.text(1.5, 2, 'CNOT', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='green'))
-    plt.plot([1.5, 1.5], [2, 3], 'g-', linewidth=2)
-    
-    plt.text(2.5, 0, 'M', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='red'))
-    plt.text(2.5, 1, 'M', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='red'))
-    plt.text(2.5, 2, 'M', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='red'))
-    plt.text(2.5, 3, 'M', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='red'))
-    
-    plt.title("Circuit Quantique de Démonstration")
-    plt.axis('off')
-    plt.tight_layout()
-    plt.savefig(circuit_image)
-    plt.close()
-    
-    # Créer un histogramme de résultats simulés
-    hist_image = generate_filename("histogram")
     # Simuler des résultats de circuit quantique
     states = ['0000', '0001', '0010', '0011', '0100', '0101', '0110', '0111', 
              '1000', '1001', '1010', '1011', '1100', '1101', '1110', '1111']
@@ -153,15 +212,19 @@ def circuit_demo():
     counts_dict = {state: count for state, count in zip(states, counts) if count > 0}
     
     # Dessiner l'histogramme
-    plt.figure(figsize=(12, 6))
-    bars = plt.bar(counts_dict.keys(), counts_dict.values())
-    plt.xlabel('Etats de Base')
-    plt.ylabel('Nombre')
-    plt.title('Résultats de Mesure')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(hist_image)
-    plt.close()
+    def draw_histogram(path):
+        fig = new_figure((12, 6))
+        ax = fig.add_subplot(111)
+        ax.bar(counts_dict.keys(), counts_dict.values())
+        ax.set_xlabel('Etats de Base')
+        ax.set_ylabel('Nombre')
+        ax.set_title('Résultats de Mesure')
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        fig.savefig(path)
+    
+    hist_image = render_cached("histogram", {"counts": sorted((k, int(v)) for k, v in counts_dict.items())},
+                               draw_histogram)
     
     # Créer une liste de comptages pour l'API
     counts_list = [{"state": state, "count": int(count)} for state, count in counts_dict.items()]
@@ -185,10 +248,6 @@ def network_graph():
     else:
         data = data['connections']
     
-    # Générer une image de graphe
-    graph_image = generate_filename("network_graph")
-    plt.figure(figsize=(10, 8))
-    
     # Créer des nœuds et des arêtes pour la visualisation
     nodes = set()
     edges = []
@@ -201,33 +260,17 @@ def network_graph():
     
     # Positionner les nœuds
     pos = {}
-    nodes = list(nodes)
+    nodes = sorted(nodes)
     n = len(nodes)
     for i, node in enumerate(nodes):
         angle = 2 * np.pi * i / n
         pos[node] = (np.cos(angle), np.sin(angle))
     
-    # Dessiner les nœuds
-    plt.scatter([pos[node][0] for node in nodes], 
-                [pos[node][1] for node in nodes], 
-                s=500, color='skyblue', edgecolors='black', zorder=2)
-    
-    # Ajouter les étiquettes
-    for node in nodes:
-        plt.text(pos[node][0], pos[node][1], node, 
-                 fontsize=8, ha='center', va='center', zorder=3)
-    
-    # Dessiner les arêtes
-    for src, dst in edges:
-        plt.plot([pos[src][0], pos[dst][0]], 
-                 [pos[src][1], pos[dst][1]], 
-                 'gray', alpha=0.5, zorder=1)
-    
-    plt.title("Graphe de Réseau")
-    plt.axis('off')
-    plt.tight_layout()
-    plt.savefig(graph_image, dpi=300, bbox_inches='tight')
-    plt.close()
+    # Générer une image de graphe (réutilisée si déjà rendue)
+    graph_image = render_cached(
+        "network_graph", {"nodes": nodes, "edges": edges, "title": "Graphe de Réseau"},
+        lambda path: draw_network(path, nodes, edges, pos, "Graphe de Réseau")
+    )
     
     # Simuler des métriques de graphe
     metrics = {
@@ -257,14 +300,6 @@ def detect_anomalies():
     else:
         network_data = data['connections']
     
-    # Générer des images pour la visualisation
-    graph_image = generate_filename("network_graph")
-    circuit_image = generate_filename("circuit")
-    hist_image = generate_filename("histogram")
-    
-    # Simuler une analyse de graphe
-    plt.figure(figsize=(10, 8))
-    
     # Créer des nœuds et des arêtes pour la visualisation
     nodes = set()
     edges = []
@@ -277,82 +312,41 @@ def detect_anomalies():
     
     # Positionner les nœuds
     pos = {}
-    nodes = list(nodes)
+    nodes = sorted(nodes)
     n = len(nodes)
     for i, node in enumerate(nodes):
         angle = 2 * np.pi * i / n
         pos[node] = (np.cos(angle), np.sin(angle))
     
-    # Dessiner les nœuds
-    plt.scatter([pos[node][0] for node in nodes], 
-                [pos[node][1] for node in nodes], 
-                s=500, color='skyblue', edgecolors='black', zorder=2)
-    
-    # Ajouter les étiquettes
-    for node in nodes:
-        plt.text(pos[node][0], pos[node][1], node, 
-                 fontsize=8, ha='center', va='center', zorder=3)
-    
-    # Dessiner les arêtes
-    for src, dst in edges:
-        plt.plot([pos[src][0], pos[dst][0]], 
-                 [pos[src][1], pos[dst][1]], 
-                 'gray', alpha=0.5, zorder=1)
-    
     # Surligner quelques anomalies
     anomaly_edges = random.sample(edges, min(3, len(edges)))
-    for src, dst in anomaly_edges:
-        plt.plot([pos[src][0], pos[dst][0]], 
-                 [pos[src][1], pos[dst][1]], 
-                 'red', linewidth=2, alpha=0.7, zorder=4)
-    
-    plt.title("Détection d'Anomalies Réseau")
-    plt.axis('off')
-    plt.tight_layout()
-    plt.savefig(graph_image, dpi=300, bbox_inches='tight')
-    plt.close()
     
-    # Simuler un circuit quantique
-    plt.figure(figsize=(8, 6))
-    plt.plot([0, 1, 2, 3], [0, 0, 0, 0], 'k-', linewidth=2)
-    plt.plot([0, 1, 2, 3], [1, 1, 1, 1], 'k-', linewidth=2)
-    plt.plot([0, 1, 2, 3], [2, 2, 2, 2], 'k-', linewidth=2)
-    plt.plot([0, 1, 2, 3], [3, 3, 3, 3], 'k-', linewidth=2)
-    
-    # Ajouter des symboles pour les portes
-    plt.text(0.5, 0, 'H', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='blue'))
-    plt.text(0.5, 1, 'H', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='blue'))
-    plt.text(0.5, 2, 'H', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='blue'))
-    plt.text(0.5, 3, 'H', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='blue'))
-    
-    plt.text(1.5, 0, 'RZ', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='purple'))
-    plt.text(1.5, 1, 'RZ', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='purple'))
-    plt.text(1.5, 2, 'RZ', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='purple'))
-    plt.text(1.5, 3, 'RZ', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='purple'))
-    
-    plt.text(2.5, 0, 'M', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='red'))
-    plt.text(2.5, 1, 'M', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='red'))
-    plt.text(2.5, 2, 'M', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='red'))
-    plt.text(2.5, 3, 'M', fontsize=12, ha='center', va='center', bbox=dict(facecolor='white', edgecolor='red'))
-    
-    plt.title("Circuit QML - Détection d'Anomalies")
-    plt.axis('off')
-    plt.tight_layout()
-    plt.savefig(circuit_image)
-    plt.close()
+    # Générer les images (réutilisées si déjà rendues)
+    title = "Détection d'Anomalies Réseau"
+    graph_image = render_cached(
+        "network_graph", {"nodes": nodes, "edges": edges, "anomalies": anomaly_edges, "title": title},
+        lambda path: draw_network(path, nodes, edges, pos, title, anomaly_edges)
+    )
+    circuit_image = render_cached(
+        "circuit", {"gates": QML_CIRCUIT_GATES},
+        lambda path: draw_gate_circuit(path, QML_CIRCUIT_GATES, "Circuit QML - Détection d'Anomalies")
+    )
     
     # Simuler un histogramme de résultats
     states = ['Normal', 'Anomalie']
     values = [47, 3]  # 3 anomalies sur 50 connexions
     
-    plt.figure(figsize=(8, 6))
-    plt.bar(states, values, color=['green', 'red'])
-    plt.title("Résultats de Détection")
-    plt.xlabel("Classe")
-    plt.ylabel("Nombre de connexions")
-    plt.tight_layout()
-    plt.savefig(hist_image)
-    plt.close()
+    def draw_results(path):
+        fig = new_figure((8, 6))
+        ax = fig.add_subplot(111)
+        ax.bar(states, values, color=['green', 'red'])
+        ax.set_title("Résultats de Détection")
+        ax.set_xlabel("Classe")
+        ax.set_ylabel("Nombre de connexions")
+        fig.tight_layout()
+        fig.savefig(path)
+    
+    hist_image = render_cached("detection_results", {"states": states, "values": values}, draw_results)
     
     # Simuler des métriques
     metrics = {
@@ -407,7 +401,7 @@ def get_demo_data():
 @app.route('/static/<path:path>', methods=['GET'])
 def serve_static(path):
     """Sert les fichiers statiques."""
-    return send_from_directory('static', path)
+    return send_from_directory(STATIC_DIR, path)
 
 # Démarrer le serveur
 if __name__ == '__main__':
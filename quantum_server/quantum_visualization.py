@@ -6,29 +6,24 @@ pour les circuits quantiques, les histogrammes de résultats et autres représen
 graphiques liées au quantum machine learning.
 """
 
-import matplotlib.pyplot as plt
 import numpy as np
-from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
-from qiskit.visualization import plot_histogram
 import networkx as nx
 import io
 import base64
-from matplotlib.figure import Figure
 import random
 import os
+from functools import lru_cache
 
-# Fixer le style Matplotlib
-plt.style.use('seaborn-v0_8-whitegrid')
-plt.rcParams['figure.figsize'] = (10, 6)
-plt.rcParams['font.family'] = 'sans-serif'
-plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans']
-plt.rcParams['axes.titlesize'] = 14
-plt.rcParams['axes.labelsize'] = 12
-plt.rcParams['xtick.labelsize'] = 10
-plt.rcParams['ytick.labelsize'] = 10
+from artifact_cache import STATIC_DIR
+from graph_layout import layout_engine
+from graph_lod import level_of_detail
+from figures import new_figure, style_whitegrid, draw_circuit
+
+# Matplotlib et Qiskit sont importés au premier rendu, pas au chargement du module.
+# Chaque rendu dessine sur sa propre Figure (voir figures): les fonctions de ce
+# module peuvent être appelées depuis plusieurs threads à la fois.
 
 # Constantes
-STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
 if not os.path.exists(STATIC_DIR):
     os.makedirs(STATIC_DIR)
 
@@ -54,6 +49,16 @@ def create_feature_map_circuit(num_qubits=4, feature_map="zz", data_points=None)
         # Générer des données aléatoires si aucune donnée n'est fournie
         data_points = np.random.random(num_qubits)
     
+    circuit, x = _feature_map_template(num_qubits, feature_map.lower())
+    return circuit.assign_parameters({x[i]: data_points[i % len(data_points)] for i in range(num_qubits)})
+
+@lru_cache(maxsize=32)
+def _feature_map_template(num_qubits, feature_map):
+    """Construit une seule fois le circuit paramétré de create_feature_map_circuit."""
+    from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
+    from qiskit.circuit import ParameterVector
+    
+    x = ParameterVector('x', num_qubits)
     qr = QuantumRegister(num_qubits, 'q')
     cr = ClassicalRegister(num_qubits, 'c')
     circuit = QuantumCircuit(qr, cr)
@@ -61,20 +66,20 @@ def create_feature_map_circuit(num_qubits=4, feature_map="zz", data_points=None)
     # Première rotation
     for i in range(num_qubits):
         circuit.h(qr[i])
-        circuit.rz(data_points[i % len(data_points)], qr[i])
+        circuit.rz(x[i], qr[i])
     
     # Entanglement (pour ZZ)
-    if feature_map.lower() == "zz":
+    if feature_map == "zz":
         for i in range(num_qubits-1):
             circuit.cx(qr[i], qr[i+1])
-            circuit.rz(data_points[i % len(data_points)] * data_points[(i+1) % len(data_points)], qr[i+1])
+            circuit.rz(x[i] * x[i+1], qr[i+1])
             circuit.cx(qr[i], qr[i+1])
     
     # Mesures
     circuit.barrier()
     circuit.measure(qr, cr)
     
-    return circuit
+    return circuit, x
 
 def create_variational_circuit(num_qubits=4, ansatz="realamplitudes", depth=2):
     """
@@ -88,6 +93,8 @@ def create_variational_circuit(num_qubits=4, ansatz="realamplitudes", depth=2):
     Returns:
         Le circuit quantique créé
     """
+    from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
+    
     qr = QuantumRegister(num_qubits, 'q')
     cr = ClassicalRegister(num_qubits, 'c')
     circuit = QuantumCircuit(qr, cr)
@@ -136,6 +143,22 @@ def create_anomaly_detection_circuit(num_qubits=4, feature_map="zz", ansatz="rea
         # Générer des données aléatoires si aucune donnée n'est fournie
         data_points = np.random.random(num_qubits)
     
+    # Paramètres aléatoires de l'ansatz pour la visualisation
+    params = np.random.random(num_qubits + 1)
+    
+    circuit, x, theta = _anomaly_detection_template(num_qubits, feature_map.lower(), ansatz.lower())
+    values = {x[i]: data_points[i % len(data_points)] for i in range(num_qubits)}
+    values.update(zip(theta, params))
+    return circuit.assign_parameters(values)
+
+@lru_cache(maxsize=32)
+def _anomaly_detection_template(num_qubits, feature_map, ansatz):
+    """Construit une seule fois le circuit paramétré de create_anomaly_detection_circuit."""
+    from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
+    from qiskit.circuit import ParameterVector
+    
+    x = ParameterVector('x', num_qubits)
+    theta = ParameterVector('θ', num_qubits + 1)
     qr = QuantumRegister(num_qubits, 'q')
     cr = ClassicalRegister(num_qubits, 'c')
     circuit = QuantumCircuit(qr, cr)
@@ -147,30 +170,27 @@ def create_anomaly_detection_circuit(num_qubits=4, feature_map="zz", ansatz="rea
     
     # Encodage des données
     for i in range(num_qubits):
-        circuit.rz(data_points[i % len(data_points)] * np.pi, qr[i])
+        circuit.rz(x[i] * np.pi, qr[i])
     
     # Entanglement pour ZZ feature map
-    if feature_map.lower() == "zz":
+    if feature_map == "zz":
         for i in range(num_qubits-1):
             circuit.cx(qr[i], qr[i+1])
-            circuit.rz(data_points[i % len(data_points)] * data_points[(i+1) % len(data_points)] * np.pi, qr[i+1])
+            circuit.rz(x[i] * x[i+1] * np.pi, qr[i+1])
             circuit.cx(qr[i], qr[i+1])
     
     circuit.barrier()
     
     # Deuxième partie: Ansatz variationnel
-    # Paramètres aléatoires pour la visualisation
-    params = np.random.random(num_qubits * 3)
-    
     # Rotations paramétrées
     for i in range(num_qubits):
-        circuit.rx(params[i % len(params)] * np.pi, qr[i])
+        circuit.rx(theta[i] * np.pi, qr[i])
     
     for i in range(num_qubits):
-        circuit.ry(params[(i+1) % len(params)] * np.pi, qr[i])
+        circuit.ry(theta[i+1] * np.pi, qr[i])
     
     # Entanglement
-    if ansatz.lower() in ["realamplitudes", "real"]:
+    if ansatz in ["realamplitudes", "real"]:
         for i in range(num_qubits-1):
             circuit.cx(qr[i], qr[i+1])
         if num_qubits > 2:
@@ -181,7 +201,7 @@ def create_anomaly_detection_circuit(num_qubits=4, feature_map="zz", ansatz="rea
     # Mesures
     circuit.measure(qr, cr)
     
-    return circuit
+    return circuit, x, theta
 
 def visualize_quantum_circuit(circuit, style='mpl', filename=None):
     """
@@ -200,18 +220,13 @@ def visualize_quantum_circuit(circuit, style='mpl', filename=None):
     
     filepath = os.path.join(STATIC_DIR, filename)
     
-    fig = plt.figure(figsize=(12, 8))
-    ax = fig.add_subplot(111)
-    
+    title = 'Circuit Quantique pour la Détection d\'Anomalies'
     if style == 'latex':
-        circuit_drawing = circuit.draw('latex')
-    else:
-        circuit_drawing = circuit.draw('mpl', ax=ax)
+        circuit.draw('latex', filename=filepath)
+        return filepath
     
-    plt.title('Circuit Quantique pour la Détection d\'Anomalies', fontsize=16)
-    plt.tight_layout()
-    plt.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig = draw_circuit(circuit, title=title, width=12)
+    fig.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white')
     
     return filepath
 
@@ -285,8 +300,9 @@ def visualize_histogram(counts, filename=None, title='Distribution des Mesures Q
     
     filepath = os.path.join(STATIC_DIR, filename)
     
-    fig = plt.figure(figsize=(12, 8))
+    fig = new_figure((12, 8))
     ax = fig.add_subplot(111)
+    style_whitegrid(ax)
     
     # Trier les états par valeur (nombre d'occurrences)
     sorted_counts = dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
@@ -309,14 +325,13 @@ def visualize_histogram(counts, filename=None, title='Distribution des Mesures Q
                     f'{height}',
                     ha='center', va='bottom', fontsize=9)
     
-    plt.title(title, fontsize=16)
-    plt.xlabel('États quantiques', fontsize=12)
-    plt.ylabel('Nombre d\'occurrences', fontsize=12)
-    plt.xticks(rotation=45, fontsize=9)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.tight_layout()
-    plt.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    ax.set_title(title, fontsize=16)
+    ax.set_xlabel('États quantiques', fontsize=12)
+    ax.set_ylabel('Nombre d\'occurrences', fontsize=12)
+    ax.tick_params(axis='x', labelrotation=45, labelsize=9)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    fig.tight_layout()
+    fig.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white')
     
     return filepath
 
@@ -353,11 +368,14 @@ def generate_network_graph_visualization(nodes, edges, filename=None, anomalies=
     """
     Génère une visualisation d'un graphe de réseau avec mise en évidence des anomalies.
     
+    Au-delà du budget d'affichage (graph_lod), les IPs sont regroupées en
+    sous-réseaux; les extrémités des anomalies restent détaillées.
+    
     Args:
         nodes: Liste des nœuds
         edges: Liste des arêtes
         filename: Nom du fichier pour sauvegarder l'image
-        anomalies: Liste des arêtes représentant des anomalies
+        anomalies: Liste des arêtes représentant des anomalies, par priorité décroissante
         
     Returns:
         Chemin vers l'image sauvegardée
@@ -371,15 +389,21 @@ def generate_network_graph_visualization(nodes, edges, filename=None, anomalies=
     G = nx.Graph()
     G.add_nodes_from(nodes)
     G.add_edges_from(edges)
+    # Séquence ordonnée (pas un ensemble): les extrémités conservées ne dépendent pas du hachage
+    G, _ = level_of_detail(G, keep=list(dict.fromkeys(node for edge in anomalies or () for node in edge[:2])))
     
     # Configuration de la figure
-    plt.figure(figsize=(12, 8))
+    fig = new_figure((12, 8))
+    ax = fig.add_subplot(111)
     
-    # Définir le layout
-    pos = nx.spring_layout(G, seed=42)
+    # Définir le layout (démarré à partir des positions du rendu précédent)
+    pos = layout_engine.layout(G)
     
-    # Dessiner les nœuds
-    nx.draw_networkx_nodes(G, pos, node_color='lightblue', node_size=300, alpha=0.8)
+    # Dessiner les nœuds (super-nœuds de sous-réseau grisés, à la taille du groupe)
+    nodes = G.nodes(data=True)
+    nx.draw_networkx_nodes(G, pos, ax=ax,
+                           node_color=['lightgray' if d.get('type') == 'subnet' else 'lightblue' for _, d in nodes],
+                           node_size=[300 * (1 + np.log2(d.get('members', 1))) for _, d in nodes], alpha=0.8)
     
     # Coloration des arêtes
     edge_colors = []
@@ -399,16 +423,15 @@ def generate_network_graph_visualization(nodes, edges, filename=None, anomalies=
         edge_widths = [1.0] * len(G.edges())
     
     # Dessiner les arêtes
-    nx.draw_networkx_edges(G, pos, edge_color=edge_colors, width=edge_widths, alpha=0.7)
+    nx.draw_networkx_edges(G, pos, ax=ax, edge_color=edge_colors, width=edge_widths, alpha=0.7)
     
     # Dessiner les labels des nœuds
-    nx.draw_networkx_labels(G, pos, font_size=8, font_family='sans-serif')
+    nx.draw_networkx_labels(G, pos, ax=ax, font_size=8, font_family='sans-serif')
     
-    plt.title('Graphe de Connexions Réseau avec Anomalies', fontsize=16)
-    plt.axis('off')
-    plt.tight_layout()
-    plt.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
+    ax.set_title('Graphe de Connexions Réseau avec Anomalies', fontsize=16)
+    ax.axis('off')
+    fig.tight_layout()
+    fig.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white')
     
     return filepath
 
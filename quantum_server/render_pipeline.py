@@ -0,0 +1,301 @@
+"""
+QuantumEyes - Pipeline de rendu asynchrone
+
+Ce module exécute le rendu des images (graphes, circuits, histogrammes) dans
+un pool de workers en arrière-plan. Les endpoints d'analyse renvoient leur
+résultat JSON immédiatement, avec des artefacts en attente que le client
+peut interroger ou attendre. Les artefacts sont adressés par contenu: un
+rendu identique déjà présent sur le disque ou en cours est réutilisé.
+
+Chaque requête peut choisir le format et la résolution de ses images, ainsi
+que leur destination: un fichier de static/, ou un tampon en mémoire servi
+directement par l'API (sans écriture sur le disque).
+"""
+
+import os
+import io
+import time
+import base64
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from artifact_cache import STATIC_DIR, ArtifactCache, MemoryArtifactStore
+from server_metrics import observe_stage
+
+# Nombre de workers de rendu (chaque rendu dessine sur sa propre Figure, voir figures)
+DEFAULT_RENDER_WORKERS = int(os.environ.get('QUANTUM_RENDER_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Nombre maximal de tâches conservées dans le registre
+MAX_TRACKED_JOBS = 1000
+
+# Formats d'image proposés et leur type MIME. JPEG est exclu: son export par
+# Matplotlib modifie les rcParams globaux, ce qui n'est pas sûr entre workers de rendu
+IMAGE_FORMATS = {"png": "image/png", "webp": "image/webp", "svg": "image/svg+xml"}
+
+# Résolutions acceptées pour une image demandée par requête
+MIN_IMAGE_DPI = 50
+MAX_IMAGE_DPI = 300
+
+# Destination des rendus: "file" (répertoire static/) ou "memory" (tampons servis par l'API)
+IMAGE_STORAGES = ("file", "memory")
+DEFAULT_IMAGE_STORAGE = os.environ.get('QUANTUM_IMAGE_STORAGE', 'file')
+
+
+@dataclass(frozen=True)
+class ImageOptions:
+    """Format, résolution (None: celle du style du rendu) et destination d'une image."""
+
+    format: str = "png"
+    dpi: Optional[int] = None
+    storage: str = DEFAULT_IMAGE_STORAGE
+
+    def __post_init__(self):
+        if self.format not in IMAGE_FORMATS:
+            raise ValueError(f"Format d'image non supporté: {self.format} ({', '.join(IMAGE_FORMATS)})")
+        if self.dpi is not None and not MIN_IMAGE_DPI <= self.dpi <= MAX_IMAGE_DPI:
+            raise ValueError(f"La résolution doit être comprise entre {MIN_IMAGE_DPI} et {MAX_IMAGE_DPI} dpi")
+        if self.storage not in IMAGE_STORAGES:
+            raise ValueError(f"Destination d'image inconnue: {self.storage} ({', '.join(IMAGE_STORAGES)})")
+
+    @property
+    def in_memory(self) -> bool:
+        return self.storage == "memory"
+
+    @property
+    def mimetype(self) -> str:
+        return IMAGE_FORMATS[self.format]
+
+    def render_kwargs(self) -> Dict[str, Any]:
+        """Arguments de format et de résolution passés aux fonctions de rendu."""
+        kwargs: Dict[str, Any] = {"fmt": self.format}
+        if self.dpi is not None:
+            kwargs["dpi"] = self.dpi
+        return kwargs
+
+
+def image_mimetype(name: str) -> str:
+    """Retourne le type MIME d'une image d'après l'extension de son nom."""
+    return IMAGE_FORMATS.get(os.path.splitext(name)[1].lstrip('.'), "application/octet-stream")
+
+
+class RenderJob:
+    """Tâche de rendu d'un artefact image."""
+
+    def __init__(self, kind: str, filename: str, future, cached: bool = False,
+                 image: Optional[ImageOptions] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.filename = filename
+        self.future = future
+        self.cached = cached
+        self.image = image if image is not None else ImageOptions(storage="file")
+        self.created_at = datetime.now().isoformat()
+
+    @property
+    def name(self) -> str:
+        """Nom de l'artefact (condensé de ses entrées), utilisé aussi comme ETag."""
+        return os.path.basename(self.filename)
+
+    @property
+    def url(self) -> str:
+        """URL de l'image: fichier statique, ou endpoint des images en mémoire."""
+        if self.image.in_memory:
+            return f"/api/quantum/images/{self.name}"
+        return f"/{self.filename}"
+
+    @property
+    def status(self) -> str:
+        if not self.future.done():
+            return "running" if self.future.running() else "pending"
+        return "error" if self.future.exception() is not None else "done"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Retourne la description JSON de la tâche."""
+        result = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "url": self.url,
+            "status_url": f"/api/quantum/artifacts/{self.id}",
+            "image_url": f"/api/quantum/artifacts/{self.id}/image",
+            "format": self.image.format,
+            "storage": self.image.storage,
+            "cached": self.cached,
+            "created_at": self.created_at
+        }
+        if result["status"] == "error":
+            result["message"] = str(self.future.exception())
+        return result
+
+
+class RenderPipeline:
+    """Pool de workers qui exécute les fonctions de rendu en arrière-plan."""
+
+    def __init__(self, max_workers: int = DEFAULT_RENDER_WORKERS, max_jobs: int = MAX_TRACKED_JOBS,
+                 cache: Optional[ArtifactCache] = None, memory: Optional[MemoryArtifactStore] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        self._jobs: "OrderedDict[str, RenderJob]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], RenderJob] = {}
+        self._lock = threading.Lock()
+        self.max_jobs = max_jobs
+        self.cache = cache if cache is not None else ArtifactCache(STATIC_DIR)
+        self.memory = memory if memory is not None else MemoryArtifactStore()
+
+    def submit_cached(self, kind: str, prefix: str, inputs: Any, render: Callable[..., Any], *args,
+                      image: Optional[ImageOptions] = None, **kwargs) -> RenderJob:
+        """
+        Planifie le rendu d'un artefact nommé par le condensé de ses entrées.
+
+        Si l'image existe déjà, la tâche retournée est terminée sans aucun rendu;
+        si un rendu identique est en cours, sa tâche est partagée. Le format et
+        la résolution font partie du condensé: chaque variante a son propre nom.
+
+        Args:
+            kind: Type d'artefact (graph, circuit, histogram)
+            prefix: Préfixe du nom de fichier
+            inputs: Entrées déterminant l'image (données, structure, style)
+            render: Fonction de rendu appelée avec la destination (chemin ou tampon),
+                    puis fmt et dpi
+            *args, **kwargs: Arguments supplémentaires de la fonction de rendu
+            image: Format, résolution et destination (par défaut PNG, destination DEFAULT_IMAGE_STORAGE)
+
+        Returns:
+            La tâche de rendu
+        """
+        image = image if image is not None else ImageOptions()
+        filename = self.cache.filename(prefix, kind, [inputs, image.format, image.dpi], ext=image.format)
+        key = (filename, image.storage)
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None:
+                return job
+
+            if image.in_memory:
+                cached = self.memory.get(os.path.basename(filename)) is not None
+            else:
+                cached = self.cache.lookup(filename)
+            if cached:
+                future = Future()
+                future.set_result(None)
+                job = RenderJob(kind, filename, future, cached=True, image=image)
+            else:
+                # Enregistré sous le verrou: le callback de fin ne peut pas passer avant
+                target = self._render_memory if image.in_memory else self._render_atomic
+                future = self._executor.submit(target, kind, render, filename, *args,
+                                               **kwargs, **image.render_kwargs())
+                job = RenderJob(kind, filename, future, image=image)
+                self._inflight[key] = job
+
+        if not job.cached:
+            future.add_done_callback(lambda _: self._finish(key))
+        return self._track(job)
+
+    def _render_atomic(self, kind: str, render: Callable[..., Any], filename: str, *args, **kwargs) -> None:
+        """Rend dans un fichier temporaire puis le renomme, pour ne jamais servir d'image partielle."""
+        path = self.cache.path(filename)
+        tmp_path = self.cache.temporary_path(filename)
+        started = time.perf_counter()
+        try:
+            render(tmp_path, *args, **kwargs)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            # Durée du rendu en arrière-plan, par type d'artefact
+            observe_stage("render", kind, time.perf_counter() - started)
+        self.cache.enforce_limit(keep=filename)
+
+    def _render_memory(self, kind: str, render: Callable[..., Any], filename: str, *args, **kwargs) -> None:
+        """Rend dans un tampon en mémoire, publié une fois l'image complète."""
+        buffer = io.BytesIO()
+        started = time.perf_counter()
+        try:
+            render(buffer, *args, **kwargs)
+        finally:
+            observe_stage("render", kind, time.perf_counter() - started)
+        self.memory.put(os.path.basename(filename), buffer.getvalue())
+
+    def _finish(self, key: Tuple[str, str]) -> None:
+        """Retire un rendu terminé des rendus en cours."""
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _track(self, job: RenderJob) -> RenderJob:
+        """Enregistre une tâche dans le registre."""
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def _prune(self) -> None:
+        """Oublie les tâches terminées les plus anciennes au-delà de max_jobs."""
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].future.done():
+                del self._jobs[job_id]
+                excess -= 1
+
+    def get(self, job_id: str) -> Optional[RenderJob]:
+        """Retourne une tâche par identifiant."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[RenderJob]:
+        """
+        Attend la fin d'une tâche (au plus timeout secondes).
+
+        Returns:
+            La tâche, ou None si elle est inconnue
+        """
+        job = self.get(job_id)
+        if job is not None:
+            try:
+                job.future.result(timeout=timeout)
+            except FutureTimeoutError:
+                pass
+            except Exception:
+                # L'erreur est rapportée par le statut de la tâche
+                pass
+        return job
+
+    def read(self, job: RenderJob) -> Optional[bytes]:
+        """
+        Retourne le contenu de l'image d'une tâche terminée.
+
+        Returns:
+            Les octets de l'image, ou None si elle a été évincée entre-temps
+        """
+        if job.image.in_memory:
+            return self.memory.get(job.name)
+        try:
+            with open(self.cache.path(job.filename), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def data_url(self, job: RenderJob) -> Optional[str]:
+        """Retourne l'image d'une tâche terminée sous forme de data URL (réponse JSON autonome)."""
+        data = self.read(job) if job.status == "done" else None
+        if data is None:
+            return None
+        return f"data:{job.image.mimetype};base64,{base64.b64encode(data).decode('ascii')}"
+
+    def stats(self) -> Dict[str, int]:
+        """Retourne le nombre de tâches suivies par statut."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts: Dict[str, int] = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+
+# Instancier le pipeline partagé
+render_pipeline = RenderPipeline()
@@ -0,0 +1,157 @@
+"""
+QuantumEyes - Exécution groupée des circuits
+
+Ce module soumet les circuits d'une requête (ou d'une fenêtre de temps)
+sous forme de PUBs (circuit + matrice de paramètres) dans un minimum de jobs
+de la primitive Sampler, au lieu d'un job par circuit. Les résultats sont
+relus directement en NumPy: une matrice (B, 2^n) de quasi-distributions
+par PUB, sans dictionnaire de comptages intermédiaire.
+"""
+
+import os
+import threading
+import numpy as np
+from typing import Any, List, Optional, Sequence, Tuple
+
+# Nombre maximal de jeux de paramètres par job Sampler
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get('QUANTUM_SAMPLER_BATCH_SIZE', 1024))
+
+
+def create_sampler():
+    """Crée la primitive Sampler locale: Aer (statevector) si disponible, sinon celle de Qiskit."""
+    try:
+        from qiskit_aer.primitives import SamplerV2
+        return SamplerV2(options={"backend_options": {"method": "statevector"}})
+    except ImportError:
+        pass
+    try:
+        from qiskit.primitives import StatevectorSampler
+        return StatevectorSampler()
+    except ImportError:
+        from qiskit.primitives import Sampler
+        return Sampler()
+
+
+def _is_sampler_v2(sampler: Any) -> bool:
+    try:
+        from qiskit.primitives import BaseSamplerV2
+    except ImportError:
+        return False
+    return isinstance(sampler, BaseSamplerV2)
+
+
+def bit_array_to_distributions(bits) -> np.ndarray:
+    """
+    Convertit les mesures d'un PUB (BitArray) en quasi-distributions.
+
+    Args:
+        bits: BitArray de forme (..., shots) sur num_bits bits
+
+    Returns:
+        Matrice (B, 2^num_bits) des fréquences de chaque état de base
+    """
+    array = bits.array
+    flat = array.reshape(-1, array.shape[-2], array.shape[-1])
+    batch, shots, num_bytes = flat.shape
+
+    # Octets gros-boutistes -> indice entier de l'état mesuré
+    byte_weights = 256 ** np.arange(num_bytes - 1, -1, -1, dtype=np.int64)
+    outcomes = flat.astype(np.int64) @ byte_weights
+
+    dim = 2 ** bits.num_bits
+    offsets = outcomes + np.arange(batch, dtype=np.int64)[:, None] * dim
+    counts = np.bincount(offsets.ravel(), minlength=batch * dim).reshape(batch, dim)
+    return counts / shots
+
+
+def _quasi_dists_to_distributions(quasi_dists: Sequence[dict], num_bits: int) -> np.ndarray:
+    """Convertit les quasi-distributions d'un Sampler V1 en matrice (B, 2^num_bits)."""
+    distributions = np.zeros((len(quasi_dists), 2 ** num_bits))
+    for row, quasi in enumerate(quasi_dists):
+        distributions[row, list(quasi.keys())] = list(quasi.values())
+    return distributions
+
+
+class BatchedSampler:
+    """Exécute des PUBs en jobs groupés d'au plus max_batch_size jeux de paramètres."""
+
+    def __init__(self, sampler: Any = None, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        self._sampler = sampler
+        self.max_batch_size = max_batch_size
+        self.jobs_submitted = 0
+        self.parameter_sets = 0
+        self._lock = threading.Lock()
+
+    @property
+    def sampler(self):
+        """Primitive Sampler, créée à la première utilisation."""
+        with self._lock:
+            if self._sampler is None:
+                self._sampler = create_sampler()
+            return self._sampler
+
+    def _split(self, pubs: Sequence[Tuple[Any, Optional[np.ndarray]]]) -> List[List[Tuple[int, Any, np.ndarray]]]:
+        """Découpe les PUBs en morceaux et les regroupe en jobs d'au plus max_batch_size lignes."""
+        chunks = []
+        for index, (circuit, values) in enumerate(pubs):
+            if values is None or circuit.num_parameters == 0:
+                values = np.empty((1, 0))
+            values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+            for start in range(0, len(values), self.max_batch_size):
+                chunks.append((index, circuit, values[start:start + self.max_batch_size]))
+
+        jobs, current, rows = [], [], 0
+        for chunk in chunks:
+            if current and rows + len(chunk[2]) > self.max_batch_size:
+                jobs.append(current)
+                current, rows = [], 0
+            current.append(chunk)
+            rows += len(chunk[2])
+        if current:
+            jobs.append(current)
+        return jobs
+
+    def _run_job(self, job: List[Tuple[int, Any, np.ndarray]], shots: int) -> List[np.ndarray]:
+        sampler = self.sampler
+        if _is_sampler_v2(sampler):
+            pubs = [(circuit, values) if values.shape[1] else (circuit,) for _, circuit, values in job]
+            results = sampler.run(pubs, shots=shots).result()
+            return [bit_array_to_distributions(result.join_data()) for result in results]
+
+        # Sampler V1: un circuit par jeu de paramètres, quasi-distributions en dictionnaires
+        circuits = [circuit for _, circuit, values in job for _ in range(len(values))]
+        parameter_values = [row.tolist() for _, _, values in job for row in values]
+        quasi_dists = sampler.run(circuits, parameter_values, shots=shots).result().quasi_dists
+        distributions, start = [], 0
+        for _, circuit, values in job:
+            distributions.append(_quasi_dists_to_distributions(quasi_dists[start:start + len(values)], circuit.num_clbits))
+            start += len(values)
+        return distributions
+
+    def run(self, pubs: Sequence[Tuple[Any, Optional[np.ndarray]]], shots: int = 1024) -> List[np.ndarray]:
+        """
+        Exécute des PUBs (circuit, matrice de paramètres) en un minimum de jobs.
+
+        Args:
+            pubs: Liste de (circuit, valeurs (B, P) ou None pour un circuit sans paramètres)
+            shots: Nombre de mesures par jeu de paramètres
+
+        Returns:
+            Pour chaque PUB, la matrice (B, 2^num_clbits) des quasi-distributions
+        """
+        parts: List[List[np.ndarray]] = [[] for _ in pubs]
+        for job in self._split(pubs):
+            for (index, _, values), distributions in zip(job, self._run_job(job, shots)):
+                parts[index].append(distributions)
+            with self._lock:
+                self.jobs_submitted += 1
+                self.parameter_sets += sum(len(values) for _, _, values in job)
+        return [np.concatenate(part) for part in parts]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "jobs_submitted": self.jobs_submitted,
+                "parameter_sets": self.parameter_sets
+            }
@@ -0,0 +1,199 @@
+"""
+QuantumEyes - Scoring réparti sur plusieurs processus
+
+Ce module découpe les grands lots de connexions en tranches scorées par un
+pool de processus, hors du GIL du serveur Flask. Les états de référence du
+noyau sont publiés une seule fois en mémoire partagée par modèle; les angles
+d'entrée et les scores de sortie d'un appel sont eux aussi en mémoire
+partagée, de sorte qu'une tâche ne transmet que ses bornes (début, fin).
+Chaque tranche écrit ses scores à sa position: l'ordre des connexions est
+conservé sans fusion.
+"""
+
+import os
+import atexit
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Optional, Tuple
+
+from quantum_kernel import QuantumKernelScorer
+
+# Nombre de processus de scoring (0: scoring dans le thread de la requête)
+DEFAULT_SCORING_WORKERS = int(os.environ.get('QUANTUM_SCORING_WORKERS', 0))
+
+# Nombre minimal de vecteurs à scorer pour passer par le pool
+DEFAULT_MIN_POOL_ROWS = int(os.environ.get('QUANTUM_SCORING_MIN_ROWS', 50_000))
+
+# Tranches par processus (équilibrage) et taille minimale d'une tranche
+SHARDS_PER_WORKER = 4
+MIN_SHARD_SIZE = 4096
+
+
+# --- Côté processus de scoring ---
+
+# Modèle attaché par le processus, réutilisé tant que son nom ne change pas
+_attached: Dict[str, Any] = {"model": None, "scorer": None}
+
+
+def _init_worker() -> None:
+    """Limite chaque processus à un thread BLAS (les processus se partagent les cœurs)."""
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+
+def _worker_scorer(model: Dict[str, Any]) -> QuantumKernelScorer:
+    """Scorer du processus, reconstruit seulement quand un nouveau modèle est publié."""
+    if _attached["model"] is None or _attached["model"]["name"] != model["name"]:
+        if _attached["model"] is not None:
+            # La vue du scorer doit disparaître avant de fermer l'ancien bloc
+            old_block = _attached["model"]["block"]
+            _attached["model"] = _attached["scorer"] = None
+            old_block.close()
+        block = SharedMemory(name=model["name"])
+        scorer = QuantumKernelScorer(model["num_qubits"], model["reps"], model["feature_map"],
+                                     batch_size=model["batch_size"], top_k=model["top_k"])
+        scorer.reference_states = np.ndarray(model["shape"], dtype=np.complex128, buffer=block.buf)
+        _attached["model"] = {"name": model["name"], "block": block}
+        _attached["scorer"] = scorer
+    return _attached["scorer"]
+
+
+def _score_shard(model: Dict[str, Any], input_name: str, output_name: str,
+                 shape: Tuple[int, int], start: int, stop: int) -> int:
+    """Score les lignes [start, stop) du tampon d'entrée et les écrit dans le tampon de sortie."""
+    scorer = _worker_scorer(model)
+    input_block = SharedMemory(name=input_name)
+    output_block = SharedMemory(name=output_name)
+    try:
+        angles = np.ndarray(shape, dtype=np.float64, buffer=input_block.buf)
+        scores = np.ndarray(shape[0], dtype=np.float64, buffer=output_block.buf)
+        scores[start:stop], _ = scorer.score(angles[start:stop])
+        # Les vues doivent disparaître avant de fermer les blocs
+        del angles, scores
+    finally:
+        input_block.close()
+        output_block.close()
+    return stop - start
+
+
+# --- Côté serveur ---
+
+class ShardedScorer:
+    """Pool de processus scorant les grands lots avec des références en mémoire partagée."""
+
+    def __init__(self, workers: int = DEFAULT_SCORING_WORKERS, min_rows: int = DEFAULT_MIN_POOL_ROWS):
+        self.workers = workers
+        self.min_rows = min_rows
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._model: Optional[Dict[str, Any]] = None
+        self._model_block: Optional[SharedMemory] = None
+        self._model_owner: Optional[QuantumKernelScorer] = None
+        self._lock = threading.Lock()
+
+    def enabled_for(self, rows: int) -> bool:
+        """Indique si un lot de rows vecteurs passe par le pool."""
+        return self.workers > 1 and rows >= self.min_rows
+
+    def resize(self, workers: int) -> None:
+        """Change le nombre de processus (le pool est recréé au prochain appel)."""
+        with self._lock:
+            if workers != self.workers and self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+            self.workers = workers
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: pas de fork d'un serveur multi-thread
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"),
+                                             initializer=_init_worker)
+        return self._pool
+
+    def _publish(self, scorer: QuantumKernelScorer) -> Dict[str, Any]:
+        """Copie les états de référence en mémoire partagée, une fois par scorer ajusté."""
+        if self._model_owner is scorer:
+            return self._model
+
+        reference = scorer.reference_states
+        block = SharedMemory(create=True, size=reference.nbytes)
+        np.ndarray(reference.shape, dtype=np.complex128, buffer=block.buf)[:] = reference
+        encoder = scorer.encoder
+        model = {
+            "name": block.name,
+            "shape": reference.shape,
+            "num_qubits": encoder.num_qubits,
+            "reps": encoder.reps,
+            "feature_map": encoder.feature_map,
+            "batch_size": scorer.batch_size,
+            "top_k": scorer.top_k
+        }
+
+        # Les processus gardent l'ancien bloc attaché jusqu'à leur prochaine tâche;
+        # le nom est retiré ici, la mémoire est libérée à leur détachement
+        if self._model_block is not None:
+            self._model_block.close()
+            self._model_block.unlink()
+        self._model, self._model_block, self._model_owner = model, block, scorer
+        return model
+
+    def score(self, scorer: QuantumKernelScorer, angles: np.ndarray) -> np.ndarray:
+        """
+        Calcule les scores d'anomalie d'un lot en le répartissant sur le pool.
+
+        Args:
+            scorer: Scorer ajusté (états de référence publiés au premier appel)
+            angles: Matrice (M, num_qubits) de caractéristiques encodées
+
+        Returns:
+            Scores (M,), dans l'ordre des lignes d'entrée
+        """
+        angles = np.ascontiguousarray(angles, dtype=np.float64)
+        rows = len(angles)
+
+        # Un lot occupe déjà tout le pool: les appels concurrents passent l'un après l'autre,
+        # ce qui garantit aussi qu'aucune tranche n'utilise un modèle remplacé entre-temps
+        with self._lock:
+            model = self._publish(scorer)
+            pool = self._get_pool()
+            input_block = SharedMemory(create=True, size=max(angles.nbytes, 1))
+            output_block = SharedMemory(create=True, size=max(rows * 8, 1))
+            try:
+                np.ndarray(angles.shape, dtype=np.float64, buffer=input_block.buf)[:] = angles
+                shard = max(MIN_SHARD_SIZE, -(-rows // (self.workers * SHARDS_PER_WORKER)))
+                futures = [
+                    pool.submit(_score_shard, model, input_block.name, output_block.name, angles.shape,
+                                start, min(start + shard, rows))
+                    for start in range(0, rows, shard)
+                ]
+                for future in futures:
+                    future.result()
+                return np.ndarray(rows, dtype=np.float64, buffer=output_block.buf).copy()
+            finally:
+                for block in (input_block, output_block):
+                    block.close()
+                    block.unlink()
+
+    def shutdown(self) -> None:
+        """Arrête le pool et libère le bloc des états de référence."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+            if self._model_block is not None:
+                self._model_block.close()
+                self._model_block.unlink()
+            self._model = self._model_block = self._model_owner = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "min_rows": self.min_rows, "running": self._pool is not None}
+
+
+# Pool partagé par le service
+sharded_scorer = ShardedScorer()
+atexit.register(sharded_scorer.shutdown)
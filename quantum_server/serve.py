@@ -0,0 +1,310 @@
+"""
+QuantumEyes - Serveur de production préchargé
+
+run.py et app.py démarrent le serveur de développement de Flask (un seul
+processus, rechargement du code). Ce module est le point d'entrée de
+production: le processus maître importe l'application et construit une fois
+les modèles de la configuration courante (circuit paramétré, noyau de
+scoring, unitaire d'ansatz, imports lourds), puis crée N processus par fork
+qui partagent ces structures en copie sur écriture. Chaque processus sert
+l'API avec un pool de threads borné sur la socket d'écoute commune.
+
+Usage (depuis la racine du dépôt):
+    python quantum_server/serve.py --workers 4 --threads 8
+
+Signaux du processus maître:
+    SIGHUP           redémarrage progressif: les processus sont remplacés un
+                     par un, à partir de l'état préchauffé du maître
+    SIGTERM, SIGINT  arrêt: les requêtes en cours se terminent (au plus
+                     --graceful-timeout secondes)
+
+Chaque processus a son propre état en mémoire: caches de scores et
+métriques (agrégés par processus), mais aussi configuration, registre des
+rendus, images en mémoire et graphe vivant. Une requête qui s'appuie sur une
+précédente atteindrait le plus souvent un autre processus; avec plus d'un
+processus, l'API refuse donc (409) les routes qui modifient ou lisent cet
+état (configuration, connexion IBM, graphe vivant, rechargement du modèle,
+suivi des rendus, images en mémoire) et attend la fin des rendus avant de
+répondre, les images étant des fichiers servis par n'importe quel processus.
+La configuration est alors fixée au démarrage (--config, fichier JSON
+appliqué par le maître avant le préchargement), le modèle rechargé par SIGHUP.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import signal
+import socket
+import argparse
+import threading
+import traceback
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+# Nombre de processus servant l'API
+DEFAULT_SERVE_WORKERS = int(os.environ.get('QUANTUM_SERVE_WORKERS', os.cpu_count() or 1))
+
+# Nombre de requêtes traitées simultanément par processus
+DEFAULT_SERVE_THREADS = int(os.environ.get('QUANTUM_SERVE_THREADS', 8))
+
+# Délai (secondes) laissé aux requêtes en cours lors d'un arrêt ou d'un redémarrage
+DEFAULT_GRACEFUL_TIMEOUT = float(os.environ.get('QUANTUM_GRACEFUL_TIMEOUT', 30))
+
+# Inactivité maximale (secondes) d'une connexion keep-alive avant fermeture
+KEEPALIVE_TIMEOUT = 5.0
+
+# Période (secondes) de la boucle de supervision du maître
+MASTER_TICK = 0.2
+
+# Délai (secondes) avant de remplacer un processus arrêté de lui-même
+RESPAWN_DELAY = 1.0
+
+# File d'attente des connexions de la socket d'écoute
+LISTEN_BACKLOG = 1024
+
+
+def _log(message: str) -> None:
+    print(f"[{os.getpid()}] {message}", file=sys.stderr, flush=True)
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """HTTP/1.1 (réponses en flux, keep-alive), avec fermeture des connexions inactives."""
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Serveur WSGI de werkzeug dont les requêtes sont traitées par un pool de threads borné."""
+
+    multithread = True
+
+    def __init__(self, host: str, port: int, app, threads: int, fd: int, master_pid: int):
+        super().__init__(host, port, app, handler=KeepAliveRequestHandler, fd=fd)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="http")
+        self._master_pid = master_pid
+        self._stopping = False
+
+    def process_request(self, request, client_address) -> None:
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def stop(self) -> None:
+        """Arrête la boucle d'acceptation (appelable depuis un gestionnaire de signal)."""
+        if not self._stopping:
+            self._stopping = True
+            # shutdown() attend la fin de serve_forever: il doit tourner dans un autre thread
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def service_actions(self) -> None:
+        # Le processus s'arrête si son maître a disparu
+        if os.getppid() != self._master_pid:
+            self.stop()
+
+    def drain(self) -> None:
+        """Ferme la socket puis attend la fin des requêtes en cours."""
+        self.server_close()
+        self._executor.shutdown(wait=True)
+
+
+class PreforkServer:
+    """Processus maître: précharge l'application, crée et supervise les processus de service."""
+
+    def __init__(self, app, host: str, port: int, workers: int = DEFAULT_SERVE_WORKERS,
+                 threads: int = DEFAULT_SERVE_THREADS, graceful_timeout: float = DEFAULT_GRACEFUL_TIMEOUT):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        # Hérité par les processus: l'API refuse les routes à état propre à un processus
+        app.config['SERVE_WORKERS'] = self.workers
+        self.threads = max(1, threads)
+        self.graceful_timeout = graceful_timeout
+        self._socket = None
+        self._children: Dict[int, float] = {}
+        self._signals: List[int] = []
+        self._next_spawn = 0.0
+
+    def _listen(self) -> socket.socket:
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(LISTEN_BACKLOG)
+        return sock
+
+    def _spawn(self) -> int:
+        master_pid = os.getpid()
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                self._serve_child(master_pid)
+                status = 0
+            except BaseException:
+                _log(f"Arrêt du processus sur erreur:\n{traceback.format_exc()}")
+            finally:
+                # Ne jamais revenir dans la boucle du maître
+                os._exit(status)
+        self._children[pid] = time.time()
+        return pid
+
+    def _serve_child(self, master_pid: int) -> None:
+        for signum in (signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        # Chaque processus a ses propres graines (données de démonstration)
+        random.seed()
+        np.random.seed()
+
+        server = PooledWSGIServer(self.host, self.port, self.app, self.threads, self._socket.fileno(), master_pid)
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+        _log(f"Processus de service prêt ({self.threads} threads)")
+        try:
+            server.serve_forever()
+        finally:
+            server.drain()
+            from scoring_pool import sharded_scorer
+            sharded_scorer.shutdown()
+
+    def _wait_child(self, pid: int, timeout: float) -> bool:
+        """Attend la fin d'un processus; retourne False si le délai est dépassé."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                    return True
+            except ChildProcessError:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def _stop_child(self, pid: int) -> None:
+        """Arrêt gracieux d'un processus, forcé après graceful_timeout."""
+        self._children.pop(pid, None)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        if not self._wait_child(pid, self.graceful_timeout):
+            _log(f"Processus {pid} toujours actif après {self.graceful_timeout:.0f} s: arrêt forcé")
+            os.kill(pid, signal.SIGKILL)
+            self._wait_child(pid, self.graceful_timeout)
+
+    def _reap(self) -> None:
+        """Récupère les processus terminés et remplace ceux qui se sont arrêtés d'eux-mêmes."""
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if self._children.pop(pid, None) is not None:
+                _log(f"Processus {pid} arrêté (statut {status}): remplacement")
+                # Pas de boucle de redémarrage serrée si les processus échouent au démarrage
+                self._next_spawn = time.monotonic() + RESPAWN_DELAY
+        if time.monotonic() < self._next_spawn:
+            return
+        while len(self._children) < self.workers:
+            self._spawn()
+
+    def reload(self) -> None:
+        """
+        Remplace les processus un par un; le service reste disponible pendant le redémarrage.
+
+        Le modèle entraîné est rechargé dans le maître d'abord: les nouveaux
+        processus héritent de sa projection en mémoire.
+        """
+        from qml_service import quantum_service
+        from model_checkpoint import DEFAULT_MODEL_PATH
+
+        if os.path.exists(DEFAULT_MODEL_PATH):
+            result = quantum_service.load_model()
+            _log(result["message"])
+            if result["status"] == "success":
+                quantum_service.warm_up()
+        _log("Redémarrage progressif des processus de service")
+        for pid in list(self._children):
+            self._spawn()
+            self._stop_child(pid)
+
+    def stop(self) -> None:
+        _log("Arrêt des processus de service")
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self._children):
+            if not self._wait_child(pid, self.graceful_timeout):
+                _log(f"Processus {pid} toujours actif après {self.graceful_timeout:.0f} s: arrêt forcé")
+                os.kill(pid, signal.SIGKILL)
+                self._wait_child(pid, self.graceful_timeout)
+        self._children.clear()
+
+    def run(self) -> None:
+        """Précharge, crée les processus, puis supervise jusqu'à SIGTERM ou SIGINT."""
+        from qml_service import quantum_service
+
+        timings = quantum_service.warm_up()
+        _log(f"Modèles préchargés en {timings['total']:.2f} s")
+
+        self._socket = self._listen()
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda signum, frame: self._signals.append(signum))
+
+        _log(f"Serveur API QML sur {self.host}:{self.port} ({self.workers} processus x {self.threads} threads)")
+        try:
+            while True:
+                self._reap()
+                if self._signals:
+                    signum = self._signals.pop(0)
+                    if signum == signal.SIGHUP:
+                        self.reload()
+                    else:
+                        break
+                time.sleep(MASTER_TICK)
+        finally:
+            self.stop()
+            self._socket.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur de production préchargé de l'API QML")
+    parser.add_argument('--host', default=os.environ.get('QUANTUM_API_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('QUANTUM_API_PORT', 5001)))
+    parser.add_argument('--workers', type=int, default=DEFAULT_SERVE_WORKERS)
+    parser.add_argument('--threads', type=int, default=DEFAULT_SERVE_THREADS)
+    parser.add_argument('--graceful-timeout', type=float, default=DEFAULT_GRACEFUL_TIMEOUT)
+    parser.add_argument('--config', help="Fichier JSON de configuration du service, appliqué avant le préchargement")
+    args = parser.parse_args()
+
+    # Rendu sans affichage, fixé avant tout import de pyplot
+    import matplotlib
+    matplotlib.use('Agg')
+
+    from app import app
+
+    if args.config:
+        from qml_service import quantum_service
+
+        with open(args.config) as f:
+            result = quantum_service.configure(json.load(f))
+        if result["status"] != "success":
+            _log(result["message"])
+            sys.exit(1)
+
+    PreforkServer(app, args.host, args.port, args.workers, args.threads, args.graceful_timeout).run()
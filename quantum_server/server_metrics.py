@@ -0,0 +1,136 @@
+"""
+QuantumEyes - Métriques du serveur
+
+Ce module mesure la durée réelle de chaque étape d'une requête (analyse JSON,
+construction du graphe, mise en page, rendu, exécution des circuits, scoring)
+et l'agrège en histogrammes, avec les compteurs de requêtes et les jauges de
+requêtes en cours. L'ensemble est exposé au format texte de Prometheus.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Bornes (secondes) des histogrammes de durée
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Noms des métriques exposées
+STAGE_DURATION = "quantumeyes_stage_duration_seconds"
+REQUEST_DURATION = "quantumeyes_request_duration_seconds"
+REQUESTS_TOTAL = "quantumeyes_requests_total"
+REQUESTS_IN_FLIGHT = "quantumeyes_requests_in_flight"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in (labels or {}).items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    """Compteurs, jauges et histogrammes étiquetés, rendus au format Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict] = {}
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Déclare une métrique (kind: counter, gauge ou histogram)."""
+        with self._lock:
+            self._metrics.setdefault(name, {"kind": kind, "help": help_text, "buckets": buckets, "series": {}})
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, value: float = 1.0) -> None:
+        """Incrémente un compteur ou une jauge (value négatif pour une jauge)."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._metrics[name]["series"]
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        """Ajoute une observation à un histogramme."""
+        key = _label_key(labels)
+        with self._lock:
+            metric = self._metrics[name]
+            state = metric["series"].get(key)
+            if state is None:
+                state = metric["series"][key] = {"buckets": [0] * len(metric["buckets"]), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(metric["buckets"]):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self) -> str:
+        """Retourne toutes les métriques au format texte de Prometheus (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, metric in self._metrics.items():
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['kind']}")
+                for key, state in sorted(metric["series"].items()):
+                    if metric["kind"] != "histogram":
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(state)}")
+                        continue
+                    for bound, count in zip(metric["buckets"], state["buckets"]):
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', repr(float(bound))))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {state['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(state['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {state['count']}")
+        return "\n".join(lines) + "\n"
+
+
+# Registre partagé par le service, le pipeline de rendu et l'API
+registry = MetricsRegistry()
+registry.describe(STAGE_DURATION, "histogram", "Durée de chaque étape d'une opération QML")
+registry.describe(REQUEST_DURATION, "histogram", "Durée des requêtes HTTP par route")
+registry.describe(REQUESTS_TOTAL, "counter", "Nombre de requêtes HTTP par route et code de statut")
+registry.describe(REQUESTS_IN_FLIGHT, "gauge", "Nombre de requêtes HTTP en cours par route")
+
+
+def observe_stage(operation: str, stage: str, seconds: float) -> None:
+    """Enregistre la durée d'une étape dans l'histogramme des étapes."""
+    registry.observe(STAGE_DURATION, seconds, {"operation": operation, "stage": stage})
+
+
+class StageTimer:
+    """
+    Chronomètre les étapes d'une opération, pour la réponse et pour les histogrammes.
+    
+    Les durées d'une même étape s'additionnent; chaque étape est enregistrée
+    une seule fois par opération, à l'appel de finish().
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.timings: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Mesure le bloc comme étape name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def finish(self) -> Dict[str, float]:
+        """Clôt l'opération et retourne les durées par étape, total compris (secondes)."""
+        total = time.perf_counter() - self._started
+        for name, value in self.timings.items():
+            observe_stage(self.operation, name, value)
+        observe_stage(self.operation, "total", total)
+        return {**{name: round(value, 6) for name, value in self.timings.items()}, "total": round(total, 6)}
@@ -0,0 +1,114 @@
+"""
+QuantumEyes - Configuration versionnée du service QML
+
+La configuration du service est un instantané immuable: configure() crée une
+nouvelle version et la publie par un simple échange de référence. Une requête
+lit l'instantané une seule fois au départ et le transmet à chaque étape; elle
+garde donc une configuration cohérente (qubits, feature map, ansatz, mesures)
+même si une autre requête reconfigure le service pendant son exécution.
+"""
+
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Optional, Tuple
+
+from statevector_execution import EXACT_MAX_QUBITS_LIMIT
+
+# Modes d'exécution des circuits: vecteurs d'état NumPy ou Sampler Aer
+EXECUTION_MODES = ("exact", "sampler")
+
+# Nombre maximal de qubits: le scorer à noyau encode des lots d'états de 2^n amplitudes
+MAX_NUM_QUBITS = EXACT_MAX_QUBITS_LIMIT
+
+
+@dataclass(frozen=True)
+class ServiceConfig:
+    """Instantané immuable de la configuration du service QML."""
+
+    version: int = 1
+    num_qubits: int = 4
+    model_type: str = "qsvc"
+    optimizer: str = "cobyla"
+    feature_map: str = "zz"
+    ansatz: str = "real"
+    reps: int = 2
+    shots: int = 1024
+    # "exact": vecteurs d'état NumPy jusqu'à exact_executor.max_qubits, "sampler": Sampler Aer
+    execution_mode: str = "exact"
+    shot_noise: bool = False
+    # Backend cible des circuits (None: portes génériques)
+    backend: Any = field(default=None, compare=False, repr=False)
+
+    @property
+    def model_key(self) -> Tuple[int, int, str]:
+        """Paramètres dont dépendent le noyau de scoring et les clés du cache de scores."""
+        return (self.num_qubits, self.reps, self.feature_map)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "num_qubits": self.num_qubits,
+            "model_type": self.model_type,
+            "feature_map": self.feature_map,
+            "ansatz": self.ansatz,
+            "reps": self.reps,
+            "shots": self.shots,
+            "optimizer": self.optimizer,
+            "execution_mode": self.execution_mode,
+            "shot_noise": self.shot_noise,
+            "backend": getattr(self.backend, "name", None)
+        }
+
+
+def _positive_int(name: str, value: Any, maximum: Optional[int] = None) -> int:
+    number = int(value)
+    if number < 1:
+        raise ValueError(f"{name} doit être un entier positif")
+    if maximum is not None and number > maximum:
+        raise ValueError(f"{name} doit être au plus {maximum}")
+    return number
+
+
+class ConfigStore:
+    """Publie les versions successives de la configuration; la lecture ne prend aucun verrou."""
+
+    def __init__(self, initial: ServiceConfig = ServiceConfig()):
+        self._current = initial
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> ServiceConfig:
+        return self._current
+
+    def update(self, changes: Dict[str, Any]) -> ServiceConfig:
+        """
+        Valide les modifications et publie la version suivante.
+
+        Args:
+            changes: Paramètres modifiés (num_qubits, feature_map, ansatz, reps,
+                     shots, model_type, optimizer, execution_mode, shot_noise, backend)
+
+        Returns:
+            Le nouvel instantané (l'instantané courant reste inchangé en cas d'erreur)
+        """
+        values: Dict[str, Any] = {}
+        if 'num_qubits' in changes:
+            values['num_qubits'] = _positive_int('num_qubits', changes['num_qubits'], MAX_NUM_QUBITS)
+        if 'reps' in changes:
+            values['reps'] = _positive_int('reps', changes['reps'])
+        if 'shots' in changes:
+            values['shots'] = _positive_int('shots', changes['shots'])
+        # Les noms inconnus de feature map ou d'ansatz retombent sur 'zz' et 'real' (circuit_templates)
+        for name in ('feature_map', 'ansatz', 'execution_mode', 'model_type', 'optimizer'):
+            if name in changes:
+                values[name] = str(changes[name])
+        if values.get('execution_mode', EXECUTION_MODES[0]) not in EXECUTION_MODES:
+            raise ValueError(f"execution_mode doit valoir {' ou '.join(EXECUTION_MODES)}")
+        if 'shot_noise' in changes:
+            values['shot_noise'] = bool(changes['shot_noise'])
+        if 'backend' in changes:
+            values['backend'] = changes['backend']
+
+        with self._lock:
+            self._current = replace(self._current, version=self._current.version + 1, **values)
+            return self._current
@@ -0,0 +1,121 @@
+"""
+QuantumEyes - Benchmark du temps de démarrage
+
+Ce script mesure, dans des interpréteurs neufs, le temps d'import de app,
+qml_service et quantum_visualization, et vérifie que /api/quantum/status
+répond sans charger qiskit, qiskit_ibm_runtime, matplotlib ni sklearn.
+Il échoue (code de sortie 1) si un budget d'import est dépassé ou si une
+dépendance lourde est chargée trop tôt.
+
+Usage:
+    python quantum_server/startup_benchmark.py [--runs 5] [--budget-scale 1.0] [--json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, Any
+
+# Budget d'import par module (secondes, médiane sur plusieurs interpréteurs neufs)
+IMPORT_BUDGETS = {
+    "app": 1.0,
+    "qml_service": 0.8,
+    "quantum_visualization": 0.5
+}
+
+# Dépendances qui ne doivent être chargées qu'à leur première utilisation
+DEFERRED_MODULES = ("qiskit", "qiskit_ibm_runtime", "matplotlib.pyplot", "sklearn")
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Exécuté dans un interpréteur neuf: import chronométré puis, pour app, appel de /api/quantum/status
+_PROBE = """
+import sys, time, json, importlib
+sys.path.insert(0, {server_dir!r})
+started = time.perf_counter()
+module = importlib.import_module({module!r})
+elapsed = time.perf_counter() - started
+result = {{"seconds": elapsed}}
+if {module!r} == "app":
+    response = module.app.test_client().get("/api/quantum/status")
+    result["status_code"] = response.status_code
+result["deferred_loaded"] = [name for name in {deferred!r} if name in sys.modules]
+print(json.dumps(result))
+"""
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """
+    Importe un module dans un interpréteur neuf.
+
+    Args:
+        module: Nom du module de quantum_server
+
+    Returns:
+        Durée d'import, modules lourds chargés et, pour app, code HTTP de /api/quantum/status
+    """
+    code = _PROBE.format(server_dir=SERVER_DIR, module=module, deferred=DEFERRED_MODULES)
+    # Même répertoire de travail que run.py (racine du dépôt)
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.dirname(SERVER_DIR),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(runs: int = 5, budget_scale: float = 1.0) -> Dict[str, Any]:
+    """
+    Mesure chaque module plusieurs fois et compare la médiane à son budget.
+
+    Args:
+        runs: Nombre d'interpréteurs neufs par module
+        budget_scale: Facteur appliqué aux budgets (machines lentes)
+
+    Returns:
+        Résultats par module et verdict global
+    """
+    results = {}
+    for module, budget in IMPORT_BUDGETS.items():
+        samples = [measure_import(module) for _ in range(runs)]
+        median = statistics.median(sample["seconds"] for sample in samples)
+        deferred_loaded = sorted({name for sample in samples for name in sample["deferred_loaded"]})
+        entry = {
+            "median_seconds": round(median, 4),
+            "min_seconds": round(min(sample["seconds"] for sample in samples), 4),
+            "budget_seconds": budget * budget_scale,
+            "deferred_loaded": deferred_loaded,
+            "passed": median <= budget * budget_scale and not deferred_loaded
+        }
+        if "status_code" in samples[0]:
+            entry["status_code"] = samples[0]["status_code"]
+            entry["passed"] = entry["passed"] and entry["status_code"] == 200
+        results[module] = entry
+
+    return {
+        "runs": runs,
+        "modules": results,
+        "passed": all(entry["passed"] for entry in results.values())
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark du temps de démarrage de QuantumEyes")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-scale', type=float, default=1.0)
+    parser.add_argument('--json', action='store_true', help="Sortie JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.runs, args.budget_scale)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for module, entry in report["modules"].items():
+            verdict = "OK" if entry["passed"] else "ÉCHEC"
+            line = f"{module:<24} {entry['median_seconds']:.3f} s (budget {entry['budget_seconds']:.2f} s) {verdict}"
+            if entry["deferred_loaded"]:
+                line += f" - chargés trop tôt: {', '.join(entry['deferred_loaded'])}"
+            print(line)
+    sys.exit(0 if report["passed"] else 1)
@@ -0,0 +1,84 @@
+"""Tests de l'API Flask."""
+
+import pytest
+
+from app import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.fixture
+def multiprocess_client(client):
+    app.config['SERVE_WORKERS'] = 2
+    yield client
+    app.config['SERVE_WORKERS'] = 1
+
+
+@pytest.mark.parametrize("method, url", [
+    ("post", "/api/quantum/configure"),
+    ("get", "/api/quantum/live-graph"),
+    ("post", "/api/quantum/live-graph"),
+    ("get", "/api/quantum/artifacts/0123"),
+    ("get", "/api/quantum/images/graph.png"),
+    ("post", "/api/quantum/model/reload"),
+])
+def test_process_local_routes_are_refused_with_several_workers(multiprocess_client, method, url):
+    response = getattr(multiprocess_client, method)(url, json={})
+    assert response.status_code == 409
+    assert response.get_json()["status"] == "error"
+
+
+def test_memory_storage_is_refused_with_several_workers(multiprocess_client):
+    response = multiprocess_client.post('/api/quantum/network-graph?storage=memory', json=[])
+    assert response.status_code == 400
+
+
+def test_renders_are_finished_before_responding_with_several_workers(multiprocess_client):
+    result = multiprocess_client.post('/api/quantum/network-graph', json=[]).get_json()
+    artifact = result["artifacts"]["graph"]
+    assert artifact["status"] == "done"
+    assert "status_url" not in artifact
+    assert multiprocess_client.get(artifact["url"]).status_code == 200
+
+
+def test_process_local_routes_are_served_by_a_single_worker(client):
+    assert client.get('/api/quantum/live-graph').status_code == 200
+
+
+@pytest.mark.parametrize("batch_size", ["abc", "0", "-3"])
+def test_invalid_stream_batch_size_is_refused(client, batch_size):
+    response = client.post(f'/api/quantum/detect-anomalies/stream?batch_size={batch_size}', data="")
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+@pytest.mark.parametrize("url", ["/api/quantum/artifacts/0123", "/api/quantum/artifacts/0123/image"])
+@pytest.mark.parametrize("wait", ["abc", "-1", "nan"])
+def test_invalid_artifact_wait_is_refused(client, url, wait):
+    response = client.get(f"{url}?wait={wait}")
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+def test_invalid_expire_before_is_refused(client):
+    response = client.post('/api/quantum/live-graph?expire_before=yesterday', json=[])
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+def test_renders_are_written_where_the_app_serves_static_files():
+    import os
+
+    from render_pipeline import render_pipeline
+
+    assert render_pipeline.cache.directory == os.path.join(app.root_path, 'static')
+
+
+@pytest.mark.parametrize("config", [{"num_qubits": 30}, {"execution_mode": "gpu"}])
+def test_invalid_configuration_is_refused(client, config):
+    response = client.post('/api/quantum/configure', json=config)
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
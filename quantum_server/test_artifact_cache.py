@@ -0,0 +1,27 @@
+"""Tests du cache d'artefacts adressé par contenu."""
+
+import os
+
+from artifact_cache import ArtifactCache
+
+
+def write(path, size, mtime):
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_enforce_limit_evicts_lru_but_never_temporary_files(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_mb=2500 / (1024 * 1024))
+    old, recent = cache.filename("graph", "graph", 1), cache.filename("graph", "graph", 2)
+    write(cache.path(old), 1000, 1)
+    write(cache.path(recent), 1000, 3)
+    # Rendu en cours d'un autre processus, plus ancien que tous les artefacts
+    in_flight = cache.temporary_path(cache.filename("graph", "graph", 3))
+    write(in_flight, 1000, 0)
+    write(cache.path(cache.filename("graph", "graph", 4)), 1000, 2)
+
+    cache.enforce_limit()
+    assert not os.path.exists(cache.path(old))
+    assert os.path.exists(cache.path(recent)) and os.path.exists(in_flight)
+    assert cache.evictions == 1
@@ -0,0 +1,21 @@
+"""Tests du lot de connexions en colonnes."""
+
+from connection_batch import ConnectionBatch
+
+
+def connection(source, destination, protocol="TCP", timestamp=0.0):
+    return {"source_ip": source, "destination_ip": destination, "protocol": protocol,
+            "source_port": 50000, "destination_port": 80, "timestamp": timestamp, "packet_size": 100}
+
+
+def test_shared_tables_concat_take_and_compact():
+    first = ConnectionBatch.from_records([connection("10.0.0.1", "10.0.0.2"), connection("10.0.0.3", "10.0.0.2")])
+    records = [connection("10.0.0.2", "10.0.0.4", "GRE", 1.0), connection("10.0.0.1", "10.0.0.5", timestamp=2.0)]
+    second = ConnectionBatch.from_records(records, ips=first.ips, protocols=first.protocols)
+    assert second.ips is first.ips and first.ips[:3] == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+
+    joined = ConnectionBatch.concat([first, second])
+    tail = joined.take(slice(-2, None)).compacted()
+    assert tail.to_records() == records
+    assert sorted(tail.ips) == ["10.0.0.1", "10.0.0.2", "10.0.0.4", "10.0.0.5"]
+    assert tail.ips is not first.ips and tail.protocols is not first.protocols
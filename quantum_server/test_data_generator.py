@@ -0,0 +1,52 @@
+"""Tests du générateur de données et de l'extracteur de caractéristiques en flux."""
+
+import numpy as np
+import pytest
+
+from data_generator import NetworkDataGenerator, StreamingFeatureExtractor
+
+
+def connection(timestamp, source="10.0.0.1", destination="10.0.0.2", port=80, size=100):
+    return {"timestamp": timestamp, "source_ip": source, "destination_ip": destination,
+            "destination_port": port, "packet_size": size}
+
+
+def sorted_rows(features):
+    return features[np.lexsort(features.T[::-1])] if len(features) else features
+
+
+def test_windows_match_the_batch_extractor():
+    rng = np.random.default_rng(0)
+    connections = [connection(float(t), f"10.0.0.{s}", f"10.0.1.{d}", int(p), int(size))
+                   for t, s, d, p, size in zip(np.sort(rng.uniform(0, 600, 400)), rng.integers(0, 8, 400),
+                                               rng.integers(0, 5, 400), rng.choice([22, 80, 443], 400),
+                                               rng.integers(64, 1500, 400))]
+    extractor = StreamingFeatureExtractor()
+    extractor.add_many(connections)
+
+    batch_features = NetworkDataGenerator().extract_features_for_classical_ml
+    for window in extractor.windows:
+        active = [c for c in connections if c["timestamp"] > extractor.watermark - window]
+        assert np.allclose(sorted_rows(extractor.extract_features(window)), sorted_rows(batch_features(active)))
+
+
+def test_late_connections_are_clamped_to_the_watermark():
+    extractor = StreamingFeatureExtractor(windows=(10, 60))
+    extractor.add(connection(100.0))
+    extractor.add(connection(95.0, port=443))   # En retard, encore dans les deux fenêtres
+    extractor.add(connection(30.0, port=22))    # Déjà sorti des deux fenêtres
+    assert extractor.watermark == 100.0
+    assert extractor.late_events == 2
+    assert extractor.extract_features(10).tolist() == [[2, 1, 2, 100, 1]]
+
+    # La connexion en retard expire avec le watermark, sans bloquer les suivantes
+    extractor.advance(109.0)
+    assert extractor.extract_features(10)[0, 0] == 2
+    extractor.advance(111.0)
+    assert len(extractor.extract_features(10)) == 0
+    assert extractor.extract_features(60)[0, 0] == 2
+
+
+def test_invalid_timestamps_are_refused():
+    with pytest.raises(ValueError):
+        StreamingFeatureExtractor().add(connection(float("nan")))
@@ -0,0 +1,31 @@
+"""Tests de la sérialisation en colonnes des graphes mis en page."""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from graph_export import layout_payload, quantize
+
+
+def test_quantize_keeps_the_aspect_ratio():
+    coords = np.array([[0.0, 0.0], [2.0, 1.0], [1.0, 0.5]])
+    grid = quantize(coords, 8)
+    assert grid.tolist() == [[0, 0], [255, 128], [128, 64]]
+    with pytest.raises(ValueError):
+        quantize(coords, 0)
+
+
+def test_layout_payload_columns_describe_the_graph():
+    G = nx.Graph()
+    G.add_edge("10.0.0.1", "10.0.0.2", protocol="TCP", port=80)
+    G.add_edge("10.0.0.2", "192.168.1.5", protocol="UDP", port=53)
+    G.add_edge("172.16.0.1", "172.16.0.2", protocol="TCP", port=22)
+    pos = {node: np.array([i, -i], dtype=float) for i, node in enumerate(G.nodes())}
+
+    payload = layout_payload(G, pos)
+    nodes, edges = payload["nodes"], payload["edges"]
+    assert nodes["id"] == list(G.nodes())
+    assert nodes["degree"] == [1, 2, 1, 1, 1]
+    assert nodes["component"] == [0, 0, 0, 1, 1]
+    assert [(nodes["id"][s], nodes["id"][t]) for s, t in zip(edges["source"], edges["target"])] == list(G.edges())
+    assert edges["port"] == [80, 53, 22]
@@ -0,0 +1,73 @@
+"""Tests du niveau de détail des graphes de réseau."""
+
+import networkx as nx
+import pytest
+
+from graph_lod import collapse_subnets, level_of_detail, within_budget
+
+
+def subnet_graph(subnets=20, hosts=30):
+    """Graphe de subnets x hosts IPs, chaque hôte relié aux hôtes de même rang des sous-réseaux suivants."""
+    G = nx.Graph()
+    for s in range(subnets):
+        for h in range(hosts):
+            for t in range(s + 1, min(s + 4, subnets)):
+                G.add_edge(f"10.0.{s}.{h + 1}", f"10.0.{t}.{h + 1}", protocol="TCP", port=80, count=2, bytes=100)
+    return G
+
+
+def test_small_graph_is_shown_as_is():
+    G = subnet_graph(subnets=3, hosts=3)
+    view, prefix = level_of_detail(G)
+    assert view is G and prefix is None
+
+
+def test_collapse_subnets_sums_merged_edges():
+    G = subnet_graph(subnets=3, hosts=5)
+    view = collapse_subnets(G)
+    assert view.number_of_nodes() == 3
+    assert view.nodes["10.0.0.0/24"]["members"] == 5
+    assert view.edges["10.0.0.0/24", "10.0.1.0/24"]["count"] == 10
+    assert sum(d["count"] for _, _, d in view.edges(data=True)) == sum(d["count"] for _, _, d in G.edges(data=True))
+
+
+def test_keep_is_capped_by_priority_to_fit_the_budget():
+    G = subnet_graph()
+    keep = sorted(G.nodes())
+    view, prefix = level_of_detail(G, keep, node_budget=60, edge_budget=400)
+    assert prefix == 24
+    assert within_budget(view, 60, 400)
+    expanded = [node for node in keep if node in view]
+    # Les nœuds gardés sont les premiers de keep
+    assert expanded == keep[:len(expanded)]
+
+
+@pytest.mark.parametrize("node_budget, edge_budget", [(10, 20), (60, 400), (200, 1000)])
+def test_view_fits_the_budget_whatever_keep(node_budget, edge_budget):
+    G = subnet_graph()
+    view, prefix = level_of_detail(G, list(G.nodes()), node_budget, edge_budget)
+    assert within_budget(view, node_budget, edge_budget)
+    assert prefix is not None
+
+
+def test_prefix_is_none_when_nothing_is_collapsed():
+    # Une IP par sous-réseau: l'agrégation ne regroupe rien
+    G = nx.star_graph([f"10.{i}.0.1" for i in range(30)])
+    view, prefix = level_of_detail(G, node_budget=10, edge_budget=10)
+    assert view is G and prefix is None
+
+
+def test_visualization_keeps_anomaly_nodes_in_priority_order(monkeypatch):
+    import quantum_visualization
+
+    captured = {}
+
+    def capture(G, keep=()):
+        captured["keep"] = keep
+        raise StopIteration
+
+    monkeypatch.setattr(quantum_visualization, "level_of_detail", capture)
+    anomalies = [("10.0.3.1", "10.0.1.1"), ("10.0.1.1", "10.0.2.1"), ("10.0.0.1", "10.0.3.1")]
+    with pytest.raises(StopIteration):
+        quantum_visualization.generate_network_graph_visualization([], anomalies, "unused.png", anomalies)
+    assert captured["keep"] == ["10.0.3.1", "10.0.1.1", "10.0.2.1", "10.0.0.1"]
@@ -0,0 +1,63 @@
+"""Tests des métriques de graphe incrémentales (comparées à networkx)."""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from connection_batch import ConnectionBatch
+from graph_metrics import IncrementalGraph
+
+
+def random_batch(rng, num_ips=60, size=40):
+    """Lot de connexions aléatoires entre num_ips adresses (quelques boucles comprises)."""
+    return ConnectionBatch.from_records([
+        {"source_ip": f"10.0.0.{s}", "destination_ip": f"10.0.0.{d}", "protocol": "TCP",
+         "source_port": 50000, "destination_port": 80, "packet_size": 100}
+        for s, d in rng.integers(0, num_ips, (size, 2)).tolist()
+    ])
+
+
+def assert_matches_networkx(graph):
+    G = graph.to_networkx()
+    metrics = graph.metrics()
+    n = G.number_of_nodes()
+    assert metrics["nodes"] == n
+    assert metrics["edges"] == G.number_of_edges()
+    assert metrics["connected_components"] == (nx.number_connected_components(G) if n else 0)
+    assert metrics["density"] == pytest.approx(nx.density(G) if n > 1 else 0)
+    assert metrics["avg_degree"] == pytest.approx(sum(d for _, d in G.degree()) / n if n else 0)
+    assert metrics["avg_clustering"] == pytest.approx(nx.average_clustering(G) if n > 1 else 0)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_metrics_match_networkx_under_expiration(seed):
+    rng = np.random.default_rng(seed)
+    graph = IncrementalGraph(retention=3)
+    for step in range(30):
+        # Peu de connexions par lot: les composantes se scindent à l'expiration
+        graph.add_batch(random_batch(rng, size=int(rng.integers(1, 30))), timestamp=float(step))
+        assert_matches_networkx(graph)
+
+
+def test_max_batches_and_expire():
+    rng = np.random.default_rng(7)
+    graph = IncrementalGraph(max_batches=2)
+    for step in range(6):
+        graph.add_batch(random_batch(rng), timestamp=float(step))
+        assert graph.num_batches <= 2
+        assert_matches_networkx(graph)
+    assert graph.expire(10.0) == 2
+    assert graph.metrics()["nodes"] == 0
+    assert_matches_networkx(graph)
+
+
+def test_identifiers_are_reused_after_expiration():
+    """Les IPs expirées libèrent leur identifiant: la table ne grandit pas avec le renouvellement des IPs."""
+    graph = IncrementalGraph(max_batches=1)
+    for step in range(50):
+        graph.add_batch(ConnectionBatch.from_records([
+            {"source_ip": f"10.{step}.0.1", "destination_ip": f"10.{step}.0.2", "protocol": "TCP",
+             "source_port": 50000, "destination_port": 80, "packet_size": 100}
+        ]), timestamp=float(step))
+    assert len(graph._ids) == 2
+    assert len(graph._names) <= 4
@@ -0,0 +1,41 @@
+"""Tests du fichier de modèle entraîné."""
+
+import numpy as np
+import pytest
+
+from model_checkpoint import ALIGNMENT, load_checkpoint, save_checkpoint
+
+
+def test_round_trip_maps_aligned_read_only_arrays(tmp_path):
+    path = str(tmp_path / "model.qmodel")
+    arrays = {
+        "weights": np.linspace(0, 1, 7),
+        "support": np.arange(12, dtype=np.int32).reshape(3, 4),
+        "empty": np.zeros((0, 4)),
+        "states": np.array([1 + 2j, 3 - 4j])
+    }
+    save_checkpoint(path, {"model_type": "vqc", "config": {"num_qubits": 4}}, arrays)
+
+    metadata, loaded = load_checkpoint(path)
+    assert metadata == {"model_type": "vqc", "config": {"num_qubits": 4}}
+    for name, array in arrays.items():
+        assert loaded[name].dtype == array.dtype
+        assert np.array_equal(loaded[name], array)
+        assert not loaded[name].flags.writeable
+    assert loaded["weights"].ctypes.data % ALIGNMENT == 0
+
+
+def test_invalid_files_are_refused(tmp_path):
+    path = tmp_path / "model.qmodel"
+    path.write_bytes(b"not a model")
+    with pytest.raises(ValueError):
+        load_checkpoint(str(path))
+
+
+def test_save_replaces_the_file_without_leaving_temporary_files(tmp_path):
+    path = str(tmp_path / "model.qmodel")
+    save_checkpoint(path, {"model_version": 1}, {"w": np.zeros(3)})
+    save_checkpoint(path, {"model_version": 2}, {"w": np.ones(3)})
+    metadata, arrays = load_checkpoint(path)
+    assert metadata["model_version"] == 2 and arrays["w"].tolist() == [1, 1, 1]
+    assert [p.name for p in tmp_path.iterdir()] == ["model.qmodel"]
@@ -0,0 +1,81 @@
+"""Tests de l'entraînement et du chargement des modèles QSVC et VQC."""
+
+import random
+
+import numpy as np
+import pytest
+
+from data_generator import NetworkDataGenerator
+from model_training import ADAM, COBYLA, SPSA, FittedScaler, TrainedModel
+from qml_service import QuantumService
+from statevector_execution import exact_executor
+
+
+@pytest.fixture
+def labelled():
+    random.seed(3)
+    data, labels = NetworkDataGenerator().generate_mixed_dataset(300, 60)
+    return data, np.array(labels, dtype=bool)
+
+
+@pytest.mark.parametrize("optimizer", [COBYLA(maxiter=200), SPSA(maxiter=200, seed=0), ADAM(maxiter=200, lr=0.1)])
+def test_optimizers_minimize_a_quadratic(optimizer):
+    result = optimizer.minimize(lambda x: float(np.sum((x - 1.0) ** 2)), np.zeros(3))
+    assert result.fun < 0.05
+    assert result.nfev > 0
+
+
+def test_fitted_scaler_matches_standard_scaler():
+    from sklearn.preprocessing import StandardScaler
+
+    features = np.random.default_rng(0).normal(3, 2, (50, 4))
+    features[:, 3] = 1.0
+    expected = StandardScaler().fit(features).transform(features)
+    assert np.allclose(FittedScaler.fit(features).transform(features), expected)
+
+
+def test_trained_qsvc_is_checkpointed_and_loaded(tmp_path, labelled):
+    path = str(tmp_path / "qsvc.qmodel")
+    trainer = QuantumService()
+    result = trainer.train_model(path=path)
+    assert result["status"] == "success"
+    assert result["model"]["training"]["accuracy"] > 0.9
+
+    service = QuantumService()
+    assert service.load_model(path)["status"] == "success"
+    assert service.model_info()["model_id"] == "qsvc-v1"
+    data, labels = labelled
+    _, _, mask = service.score_connections(data)
+    assert (mask == labels).mean() > 0.9
+
+
+def test_vqc_training_does_not_fill_the_unitary_cache(tmp_path):
+    service = QuantumService()
+    service.configure({"model_type": "vqc", "optimizer": "spsa"})
+    exact_executor.clear()
+    result = service.train_model(maxiter=10, path=str(tmp_path / "vqc.qmodel"))
+    assert result["status"] == "success"
+    # Seul l'unitaire des poids retenus est conservé (évaluation de l'exactitude)
+    assert len(exact_executor._unitaries) == 1
+
+
+def test_reload_rekeys_the_score_cache(tmp_path, labelled):
+    path = str(tmp_path / "qsvc.qmodel")
+    service = QuantumService()
+    data, _ = labelled
+    kernel_scores = service.score_connections(data)[1]
+    service.train_model(path=path)
+    assert service.score_cache.stats()["entries"] == 0
+    assert not np.allclose(service.score_connections(data)[1], kernel_scores)
+
+
+def test_load_failure_is_reported_in_model_info(tmp_path):
+    service = QuantumService()
+    result = service.load_model(str(tmp_path / "missing.qmodel"))
+    assert result["status"] == "error"
+    assert service.model_info()["error"] == result["message"]
+
+
+def test_trained_model_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        TrainedModel({"config": {"num_qubits": 4, "reps": 2, "feature_map": "zz", "ansatz": "real"}})
@@ -0,0 +1,88 @@
+"""Tests du service QML: caractéristiques et scoring des connexions."""
+
+import io
+import json
+import random
+import warnings
+
+import numpy as np
+import pytest
+
+from data_generator import NetworkDataGenerator
+from qml_service import QuantumService, extract_connection_features, render_network_graph
+
+
+@pytest.fixture(scope="module")
+def service():
+    return QuantumService()
+
+
+@pytest.fixture
+def generator():
+    random.seed(1)
+    return NetworkDataGenerator()
+
+
+@pytest.mark.parametrize("batch_size", [5, 100, 1000, 5000])
+def test_false_positive_rate_does_not_depend_on_batch_size(service, generator, batch_size):
+    """Le trafic normal garde le taux de faux positifs de la référence quelle que soit la taille du lot."""
+    flagged = []
+    for _ in range(max(1, 2000 // batch_size)):
+        _, _, mask = service.score_connections(generator.generate_normal_traffic(batch_size))
+        flagged.append(mask)
+    assert np.concatenate(flagged).mean() < 0.05
+
+
+def test_mixed_dataset_detects_anomalies(service, generator):
+    data, labels = generator.generate_mixed_dataset(900, 99)
+    labels = np.array(labels, dtype=bool)
+    _, _, mask = service.score_connections(data)
+    assert mask[labels].mean() > 0.9
+    assert mask[~labels].mean() < 0.05
+
+
+def test_repeated_connections_are_not_a_port_scan(generator):
+    connection = generator.generate_normal_traffic(1)[0]
+    features = extract_connection_features([dict(connection) for _ in range(5)])
+    assert np.all(features[:, 1] == 0)
+
+
+def test_aggregate_features_use_fixed_windows(generator):
+    """Un balayage compte ses ports dans sa fenêtre, pas ceux des connexions d'autres fenêtres."""
+    scan = generator.generate_anomalous_traffic(20, "port_scan")
+    for i, connection in enumerate(scan):
+        connection["timestamp"] = 1_700_000_000.0 + 3600 * i
+    assert np.all(extract_connection_features(scan)[:, 1] == 0)
+
+
+def test_stream_context_matches_full_batch_scoring(service, generator):
+    """Avec un contexte couvrant tout le flux, le dernier micro-lot est scoré comme le lot complet."""
+    data, _ = generator.generate_mixed_dataset(180, 20)
+    lines = [json.dumps(conn) for conn in data]
+    events = list(service.detect_anomalies_stream(lines, batch_size=50, context_size=len(data)))
+    assert events[-1]["batches"] == 4 and events[-1]["connections_analyzed"] == len(data)
+
+    _, _, mask = service.score_connections(data)
+    streamed = [e["connection_id"] for e in events if e["type"] == "anomaly" and e["connection_id"] >= 150]
+    assert streamed == (np.flatnonzero(mask[150:]) + 150).tolist()
+
+
+@pytest.mark.parametrize("invalid", [{"exact_max_qubits": 16}, {"scoring_workers": "abc"}, {"score_cache_mb": -1},
+                                     {"max_batch_size": 0}, {"num_qubits": 0}, {"num_qubits": 30},
+                                     {"execution_mode": "gpu"}])
+def test_invalid_configuration_publishes_nothing(invalid):
+    service = QuantumService()
+    before = service.config
+    result = service.configure({"num_qubits": 3, **invalid})
+    assert result["status"] == "error"
+    assert service.config is before
+
+
+def test_network_graph_renders_without_layout_warnings():
+    import networkx as nx
+
+    buffer = io.BytesIO()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        render_network_graph(buffer, nx.path_graph(["10.0.0.1", "10.0.0.2", "10.0.0.3"]))
+    assert buffer.getvalue().startswith(b"\x89PNG")
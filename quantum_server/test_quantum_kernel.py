@@ -0,0 +1,33 @@
+"""Tests du noyau quantique vectorisé (encodeur comparé à Qiskit)."""
+
+import numpy as np
+import pytest
+
+from quantum_kernel import FeatureMapEncoder, QuantumKernelScorer
+
+pytest.importorskip("qiskit")
+from qiskit.quantum_info import Statevector
+
+from circuit_templates import template_cache
+
+
+@pytest.mark.parametrize("num_qubits, reps, feature_map", [(2, 1, "zz"), (2, 2, "zz"), (3, 2, "pauli"), (4, 3, "zz")])
+def test_encoder_matches_qiskit_feature_map(num_qubits, reps, feature_map):
+    features = np.random.default_rng(num_qubits).uniform(0, 2 * np.pi, (4, num_qubits))
+    states = FeatureMapEncoder(num_qubits, reps, feature_map).encode(features)
+
+    circuit = template_cache.get(num_qubits, reps, feature_map, "real").feature_map
+    for row, state in zip(features, states):
+        expected = Statevector(circuit.assign_parameters(dict(zip(circuit.parameters, row))))
+        # Égalité à une phase globale près
+        assert abs(np.vdot(expected.data, state)) == pytest.approx(1.0, abs=1e-10)
+
+
+def test_scorer_threshold_flags_the_reference_quantile():
+    reference = np.random.default_rng(0).normal(1.0, 0.1, (200, 3))
+    scorer = QuantumKernelScorer(num_qubits=3, threshold_quantile=0.95).fit(reference)
+    _, mask = scorer.score(reference)
+    # Diagonale comprise, la référence est plus proche d'elle-même qu'à la calibration
+    assert mask.mean() <= 0.05
+    _, far = scorer.score(reference + np.pi / 2)
+    assert far.all()
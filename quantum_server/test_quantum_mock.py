@@ -0,0 +1,42 @@
+"""Tests du simulateur d'API QML."""
+
+import os
+
+import pytest
+
+import quantum_mock
+from artifact_cache import ArtifactCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ArtifactCache(str(tmp_path))
+    monkeypatch.setattr(quantum_mock, "artifact_cache", cache)
+    return cache
+
+
+def test_static_directory_does_not_depend_on_the_cwd():
+    assert quantum_mock.artifact_cache.directory == os.path.join(quantum_mock.app.root_path, "static")
+
+
+def test_render_cached_publishes_only_complete_files(cache, tmp_path):
+    def draw(path):
+        # Le nom final n'existe pas tant que le rendu n'est pas terminé
+        assert os.listdir(tmp_path) == []
+        with open(path, "wb") as f:
+            f.write(b"png")
+
+    filename = quantum_mock.render_cached("circuit", {"gates": 1}, draw)
+    assert os.listdir(tmp_path) == [os.path.basename(filename)]
+    assert quantum_mock.render_cached("circuit", {"gates": 1}, None) == filename
+
+
+def test_failed_render_leaves_no_file(cache, tmp_path):
+    def draw(path):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        raise RuntimeError("rendu interrompu")
+
+    with pytest.raises(RuntimeError):
+        quantum_mock.render_cached("circuit", {"gates": 2}, draw)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,22 @@
+"""Tests de la configuration versionnée du service."""
+
+import pytest
+
+from service_config import EXECUTION_MODES, MAX_NUM_QUBITS, ConfigStore
+
+
+def test_update_accepts_supported_values():
+    store = ConfigStore()
+    for mode in EXECUTION_MODES:
+        snapshot = store.update({"execution_mode": mode, "num_qubits": MAX_NUM_QUBITS})
+        assert (snapshot.execution_mode, snapshot.num_qubits) == (mode, MAX_NUM_QUBITS)
+
+
+@pytest.mark.parametrize("changes", [{"num_qubits": MAX_NUM_QUBITS + 1}, {"execution_mode": "gpu"},
+                                     {"num_qubits": 3, "execution_mode": "Exact"}])
+def test_update_refuses_unsupported_values(changes):
+    store = ConfigStore()
+    before = store.current
+    with pytest.raises(ValueError):
+        store.update(changes)
+    assert store.current is before
@@ -0,0 +1,41 @@
+"""Tests de l'exécution exacte par vecteurs d'état (comparée à Qiskit)."""
+
+import numpy as np
+import pytest
+
+from circuit_templates import template_cache
+from statevector_execution import ExactStatevectorExecutor, sample_counts
+
+pytest.importorskip("qiskit")
+from qiskit.quantum_info import Statevector
+
+
+@pytest.mark.parametrize("num_qubits, feature_map, ansatz", [(2, "zz", "real"), (3, "zz", "efficient"), (4, "pauli", "real")])
+def test_probabilities_match_qiskit_statevector(num_qubits, feature_map, ansatz):
+    rng = np.random.default_rng(num_qubits)
+    template = template_cache.get(num_qubits, 2, feature_map, ansatz)
+    features = rng.uniform(0, 2 * np.pi, (5, num_qubits))
+    weights = rng.uniform(-np.pi, np.pi, template.num_weights)
+
+    probabilities = ExactStatevectorExecutor().probabilities(template, features, weights)
+
+    circuit = template.feature_map.compose(template.ansatz)
+    for row, expected in zip(features, probabilities):
+        values = dict(zip(template.feature_map.parameters, row))
+        values.update(zip(template.ansatz.parameters, weights))
+        assert np.allclose(Statevector(circuit.assign_parameters(values)).probabilities(), expected, atol=1e-10)
+
+
+def test_unsupported_configurations_are_refused():
+    executor = ExactStatevectorExecutor(max_qubits=3)
+    template = template_cache.get(4, 1, "zz", "real")
+    assert not executor.supports(4)
+    assert not executor.supports(3, np.zeros((2, 8)))
+    with pytest.raises(ValueError):
+        executor.probabilities(template, np.zeros((1, 4)))
+
+
+def test_sample_counts_sum_to_shots():
+    counts = sample_counts(np.array([[0.5, 0.5, 0.0, 0.0], [0.1, 0.2, 0.3, 0.4]]), 1000, seed=0)
+    assert counts.sum(axis=1).tolist() == [1000, 1000]
+    assert counts[0, 2:].sum() == 0
@@ -0,0 +1,325 @@
+"""
+QuantumEyes - Worker Python résident
+
+Ce module remplace le lancement d'un interpréteur `python3 -c` à chaque appel
+du serveur Node.js. Le worker précharge networkx, matplotlib et qiskit une
+seule fois, puis sert des requêtes JSON délimitées par des lignes sur
+stdin/stdout (ou sur une socket Unix avec --socket).
+
+Requête:  {"id": "...", "op": "network_graph", "params": {...}}
+Réponse:  {"id": "...", "ok": true, "result": {...}}
+          {"id": "...", "ok": false, "error": "..."}
+
+Plusieurs requêtes peuvent être en cours simultanément: les réponses sont
+renvoyées dans l'ordre de fin, associées par leur identifiant. Une requête
+en erreur produit une réponse d'erreur sans arrêter le worker.
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import base64
+import argparse
+import threading
+import traceback
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, TextIO
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.figure  # noqa: F401 (préchargé; les rendus passent par figures.new_figure)
+import networkx as nx
+
+from qiskit import QuantumCircuit
+from qiskit_aer import AerSimulator
+from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2
+from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
+
+from graph_layout import layout_engine
+from figures import new_figure
+
+# Nombre de requêtes traitées simultanément
+DEFAULT_WORKER_THREADS = int(os.environ.get('QUANTUM_WORKER_THREADS', 4))
+
+# Canal IBM Quantum par défaut
+DEFAULT_IBM_CHANNEL = 'ibm_cloud'
+
+# Connexions IBM Quantum réutilisées entre les requêtes, par (canal, token)
+_runtime_services: Dict[tuple, QiskitRuntimeService] = {}
+_runtime_lock = threading.Lock()
+
+
+def _log(message: str) -> None:
+    """Journalise sur stderr (stdout est réservé au protocole)."""
+    print(message, file=sys.stderr, flush=True)
+
+
+def _is_internal(ip: str) -> bool:
+    return ip.startswith('192.168.') or ip.startswith('10.')
+
+
+def network_graph(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Dessine le graphe orienté des connexions et calcule ses métriques.
+
+    Args:
+        params: {"connections": [...]} au format de NetworkConnection
+
+    Returns:
+        {"image": PNG en base64, "metrics": {...}}
+    """
+    G = nx.DiGraph()
+    for conn in params.get('connections', []):
+        G.add_edge(conn['source_ip'], conn['destination_ip'],
+                   protocol=conn.get('protocol', 'TCP'), anomalous=conn.get('isAnomaly', False))
+
+    node_colors = ['skyblue' if _is_internal(node) else 'lightcoral' for node in G.nodes()]
+    edge_colors = ['red' if data.get('anomalous', False) else 'gray' for _, _, data in G.edges(data=True)]
+
+    num_nodes = G.number_of_nodes()
+    num_edges = G.number_of_edges()
+    avg_degree = sum(dict(G.degree()).values()) / num_nodes if num_nodes > 0 else 0
+    density = nx.density(G) if num_nodes > 0 else 0
+    connected_components = nx.number_weakly_connected_components(G) if num_nodes > 0 else 0
+    try:
+        avg_clustering = nx.average_clustering(G)
+    except Exception:
+        avg_clustering = 0
+
+    # Mise en page démarrée à partir des positions de l'appel précédent
+    pos = layout_engine.layout(G)
+
+    # Figure propre à la requête: plusieurs rendus peuvent s'exécuter en parallèle
+    fig = new_figure((10, 8))
+    ax = fig.add_subplot(111)
+    nx.draw_networkx_nodes(G, pos, ax=ax, node_color=node_colors, node_size=300, alpha=0.8)
+    nx.draw_networkx_edges(G, pos, ax=ax, edge_color=edge_colors, width=1.5, arrowstyle='->', arrowsize=15, alpha=0.7)
+    nx.draw_networkx_labels(G, pos, ax=ax, font_size=8, font_family='sans-serif')
+    ax.set_title(f"Network Connections Analysis\n{num_nodes} nodes, {num_edges} edges")
+    fig.text(0.02, 0.02, f"Density: {density:.3f}\nAvg. Degree: {avg_degree:.2f}\nComponents: {connected_components}", fontsize=9)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=100)
+
+    return {
+        'image': base64.b64encode(buffer.getvalue()).decode('utf-8'),
+        'metrics': {
+            'nodes': num_nodes,
+            'edges': num_edges,
+            'density': density,
+            'avg_degree': avg_degree,
+            'connected_components': connected_components,
+            'avg_clustering': avg_clustering
+        }
+    }
+
+
+def _runtime_service(params: Dict[str, Any]) -> QiskitRuntimeService:
+    """Retourne (en la créant au besoin) la connexion IBM Quantum des paramètres."""
+    channel = params.get('channel', DEFAULT_IBM_CHANNEL)
+    token = params.get('token') or os.environ.get('IBM_QUANTUM_API_KEY')
+    if not token:
+        raise ValueError("Aucune clé API IBM Quantum fournie")
+
+    with _runtime_lock:
+        service = _runtime_services.get((channel, token))
+        if service is None:
+            service = QiskitRuntimeService(channel=channel, token=token)
+            _runtime_services[(channel, token)] = service
+        return service
+
+
+def ibm_connect(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Se connecte à IBM Quantum et liste les backends disponibles.
+
+    Args:
+        params: {"channel": ..., "token": ...} (token par défaut: IBM_QUANTUM_API_KEY)
+
+    Returns:
+        {"success", "user_id", "backends", "connected"} ou {"success": False, "error"}
+    """
+    try:
+        service = _runtime_service(params)
+    except Exception as e:
+        _log(f"Erreur fatale lors de la connexion: {e}")
+        return {"success": False, "error": str(e)}
+
+    try:
+        backends = [
+            {
+                "name": backend.name,
+                "status": "active" if backend.status().operational else "maintenance",
+                "is_simulator": backend.simulator
+            }
+            for backend in service.backends()
+        ]
+    except Exception as e:
+        _log(f"Erreur lors de la récupération des backends: {e}")
+        backends = [
+            {"name": "simulator_statevector", "status": "active", "is_simulator": True},
+            {"name": "ibmq_qasm_simulator", "status": "active", "is_simulator": True}
+        ]
+
+    user_id = "quantum_user"
+    try:
+        instances = service.instances()
+        if instances:
+            instance = instances[0]
+            if isinstance(instance, dict) or hasattr(instance, 'get'):
+                user_id = instance.get('id', 'quantum_user')
+            else:
+                user_id = 'quantum_user_' + str(instance)
+    except Exception as e:
+        _log(f"Erreur lors de la récupération de l'ID utilisateur: {e}")
+
+    return {
+        "success": True,
+        "user_id": user_id,
+        "backends": backends,
+        "connected": True
+    }
+
+
+def execute_qasm(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Exécute un circuit QASM sur IBM Quantum, ou sur le simulateur Aer en repli.
+
+    Args:
+        params: {"qasm", "backend", "shots", "channel", "token"}
+
+    Returns:
+        {"counts", "status", "success", "date", "backend_name"}
+    """
+    circuit = QuantumCircuit.from_qasm_str(params['qasm'])
+    shots = int(params.get('shots', 1024))
+
+    try:
+        service = _runtime_service(params)
+        available = [b.name for b in service.backends()]
+        backend_name = params.get('backend', 'ibmq_qasm_simulator')
+        if backend_name not in available:
+            backend_name = available[0] if available else None
+        if backend_name is None:
+            raise ValueError("Aucun backend disponible")
+
+        backend = service.backend(backend_name)
+        isa_circuit = generate_preset_pass_manager(backend=backend, optimization_level=1).run(circuit)
+        result = SamplerV2(mode=backend).run([isa_circuit], shots=shots).result()
+        counts = result[0].join_data().get_counts()
+    except Exception as e:
+        # Simulation locale si IBM Quantum est indisponible
+        _log(f"Erreur lors de l'exécution sur IBM Quantum: {e}")
+        backend_name = "local_simulator"
+        counts = AerSimulator().run(circuit, shots=shots).result().get_counts(circuit)
+
+    return {
+        "counts": counts,
+        "status": "COMPLETED",
+        "success": True,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "backend_name": backend_name
+    }
+
+
+def ping(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Vérifie que le worker répond."""
+    return {"pid": os.getpid()}
+
+
+# Opérations servies par le worker
+OPERATIONS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "ping": ping,
+    "network_graph": network_graph,
+    "ibm_connect": ibm_connect,
+    "execute_qasm": execute_qasm
+}
+
+
+class WorkerServer:
+    """Traite des requêtes JSON ligne par ligne dans un pool de threads."""
+
+    def __init__(self, max_workers: int = DEFAULT_WORKER_THREADS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="worker")
+
+    def handle(self, line: str) -> Optional[Dict[str, Any]]:
+        """
+        Exécute une requête et retourne sa réponse.
+
+        Args:
+            line: Requête JSON
+
+        Returns:
+            La réponse, ou None pour une ligne vide
+        """
+        if not line.strip():
+            return None
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            operation = OPERATIONS.get(request.get('op'))
+            if operation is None:
+                raise ValueError(f"Opération inconnue: {request.get('op')}")
+            return {"id": request_id, "ok": True, "result": operation(request.get('params') or {})}
+        except Exception as e:
+            _log(traceback.format_exc())
+            return {"id": request_id, "ok": False, "error": str(e)}
+
+    def serve(self, reader: TextIO, writer: TextIO) -> None:
+        """Lit les requêtes jusqu'à la fin du flux et écrit chaque réponse dès qu'elle est prête."""
+        write_lock = threading.Lock()
+
+        def respond(line: str) -> None:
+            response = self.handle(line)
+            if response is None:
+                return
+            payload = json.dumps(response, default=str)
+            with write_lock:
+                writer.write(payload + "\n")
+                writer.flush()
+
+        # Seules les requêtes en cours sont conservées, pour les attendre en fin de flux
+        pending = set()
+        for line in reader:
+            future = self._executor.submit(respond, line)
+            pending.add(future)
+            future.add_done_callback(pending.discard)
+        for future in list(pending):
+            future.result()
+
+
+def serve_unix_socket(server: WorkerServer, path: str) -> None:
+    """Sert le même protocole sur une socket Unix, une connexion par client."""
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            reader = io.TextIOWrapper(self.rfile, encoding='utf-8')
+            writer = io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True)
+            server.serve(reader, writer)
+
+    if os.path.exists(path):
+        os.remove(path)
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as unix_server:
+        _log(f"Worker QuantumEyes en écoute sur {path}")
+        unix_server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker Python résident de QuantumEyes")
+    parser.add_argument('--socket', help="Chemin d'une socket Unix (par défaut: stdin/stdout)")
+    parser.add_argument('--threads', type=int, default=DEFAULT_WORKER_THREADS)
+    args = parser.parse_args()
+
+    worker = WorkerServer(max_workers=args.threads)
+    if args.socket:
+        serve_unix_socket(worker, args.socket)
+    else:
+        # Toute sortie parasite (print des bibliothèques) est redirigée vers stderr
+        protocol_out = sys.stdout
+        sys.stdout = sys.stderr
+        _log("Worker QuantumEyes prêt")
+        worker.serve(sys.stdin, protocol_out)
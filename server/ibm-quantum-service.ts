@@ -1,4 +1,4 @@
-import { spawn } from 'child_process';
+import { getPythonWorker } from './python-worker';
 
 // Nous utilisons directement Qiskit et Python pour communiquer avec IBM Quantum
 
@@ -35,87 +35,12 @@ export class IBMQuantumService {
       // Stocker le token pour une utilisation ultérieure
       this.accessToken = this.apiKey;
       
-      // Utiliser Python/Qiskit pour initialiser la connexion
-      const result = await this.runPythonScript(`
-import os
-import sys
-import json
-import traceback
-from qiskit_ibm_runtime import QiskitRuntimeService
-
-print("Initialisation du script Python pour IBM Quantum...", file=sys.stderr)
-print(f"Canal utilisé: ${this.channel}", file=sys.stderr)
-print(f"Instance utilisée: ${this.instance}", file=sys.stderr)
-print(f"Longueur de la clé API: {len('${this.apiKey}')}", file=sys.stderr)
-
-try:
-    print("Tentative de connexion à IBM Quantum...", file=sys.stderr)
-    # Utiliser le canal et l'instance spécifiés avec le token API fourni
-    service = QiskitRuntimeService(
-        channel="${this.channel}",
-        token="${this.apiKey}"
-    )
-    
-    print("Connexion réussie! Récupération des backends...", file=sys.stderr)
-    
-    # Récupérer des informations de base
-    backends = []
-    try:
-        for backend in service.backends():
-            backends.append({
-                "name": backend.name,
-                "status": "active" if backend.status().operational else "maintenance",
-                "is_simulator": backend.simulator
-            })
-        print(f"Backends récupérés: {len(backends)}", file=sys.stderr)
-    except Exception as e:
-        error_details = traceback.format_exc()
-        print(f"Erreur lors de la récupération des backends: {e}", file=sys.stderr)
-        print(error_details, file=sys.stderr)
-        backends = [
-            {"name": "simulator_statevector", "status": "active", "is_simulator": True},
-            {"name": "ibmq_qasm_simulator", "status": "active", "is_simulator": True}
-        ]
-    
-    # Obtenir l'ID utilisateur si disponible
-    user_id = "quantum_user"
-    try:
-        instances = service.instances()
-        print(f"Instances disponibles: {len(instances) if instances else 0}", file=sys.stderr)
-        # Gestion des instances qui peuvent être des objets ou des chaînes
-        if instances and len(instances) > 0:
-            instance = instances[0]
-            if isinstance(instance, dict):
-                user_id = instance.get('id', 'quantum_user')
-            elif hasattr(instance, 'get'):
-                user_id = instance.get('id', 'quantum_user')
-            else:
-                user_id = 'quantum_user_' + str(instance)
-        else:
-            user_id = 'quantum_user'
-        print(f"ID utilisateur récupéré: {user_id}", file=sys.stderr)
-    except Exception as e:
-        error_details = traceback.format_exc()
-        print(f"Erreur lors de la récupération de l'ID utilisateur: {e}", file=sys.stderr)
-        print(error_details, file=sys.stderr)
-    
-    print(json.dumps({
-        "success": True,
-        "user_id": user_id,
-        "backends": backends,
-        "connected": True
-    }))
-except Exception as e:
-    error_details = traceback.format_exc()
-    print(f"Erreur fatale lors de la connexion: {e}", file=sys.stderr)
-    print(error_details, file=sys.stderr)
-    print(json.dumps({
-        "success": False,
-        "error": str(e)
-    }))
-      `);
-      
-      const data = JSON.parse(result);
+      // Utiliser Python/Qiskit (worker résident) pour initialiser la connexion
+      console.log(`Instance utilisée: ${this.instance}`);
+      const data = await this.runWorker('ibm_connect', {
+        channel: this.channel,
+        token: this.apiKey
+      });
       
       if (!data.success) {
         console.error('Échec de la connexion via Qiskit:', data.error);
@@ -144,59 +69,20 @@ except Exception as e:
   }
   
   /**
-   * Exécuter un script Python et retourner le résultat
+   * Exécuter une opération du worker Python et retourner le résultat
    */
-  private async runPythonScript(script: string): Promise<string> {
-    return new Promise((resolve, reject) => {
-      const pythonProcess = spawn('python3', ['-c', script], {
-        env: {
-          ...process.env,
-          // Assurez-vous que la clé API est disponible dans l'environnement Python
-          IBM_QUANTUM_API_KEY: this.apiKey
-        }
-      });
-      
-      let result = '';
-      let errorData = '';
-      
-      pythonProcess.stdout.on('data', (data) => {
-        result += data.toString();
-      });
-      
-      pythonProcess.stderr.on('data', (data) => {
-        errorData += data.toString();
-        console.log(`Python stderr: ${data.toString()}`);
-      });
+  private async runWorker(op: string, params: Record<string, any>): Promise<any> {
+    try {
+      return await getPythonWorker().request(op, params);
+    } catch (error: any) {
+      console.log(`Erreur du worker Python (${op}):`, error);
       
-      pythonProcess.on('close', (code) => {
-        if (code !== 0) {
-          console.log(`Python script exited with code ${code}`);
-          console.log(`Stderr: ${errorData}`);
-          
-          // Résultat de repli en cas d'erreur (format JSON valide)
-          return resolve(JSON.stringify({
-            success: false,
-            error: `Erreur d'exécution Python (code ${code}): ${errorData}`
-          }));
-        }
-        
-        try {
-          // Vérifier que le résultat est du JSON valide
-          JSON.parse(result);
-          resolve(result);
-        } catch (error) {
-          console.log('Erreur de parsing JSON:', error);
-          console.log('Réponse brute:', result);
-          
-          // Résultat de repli en cas d'erreur de parsing
-          resolve(JSON.stringify({
-            success: false,
-            error: 'Erreur de format dans la réponse Python',
-            raw: result
-          }));
-        }
-      });
-    });
+      // Résultat de repli en cas d'erreur
+      return {
+        success: false,
+        error: `Erreur d'exécution Python: ${error.message}`
+      };
+    }
   }
   
   /**
@@ -219,101 +105,14 @@ except Exception as e:
     }
     
     try {
-      // Échapper les guillemets dans le QASM pour éviter les problèmes avec le script Python
-      const escapedQasm = qasm.replace(/"/g, '\\"');
-      
-      // Utiliser Qiskit via Python pour exécuter le circuit
-      const result = await this.runPythonScript(`
-import os
-import json
-import time
-from qiskit import QuantumCircuit
-from qiskit.circuit import QuantumCircuit
-from qiskit_aer import AerSimulator
-from qiskit_ibm_runtime import QiskitRuntimeService, Sampler
-
-# QASM fourni par le service Node.js
-qasm_str = """${escapedQasm}"""
-
-try:
-    # Création du circuit à partir du QASM
-    circuit = QuantumCircuit.from_qasm_str(qasm_str)
-    
-    # Tenter d'exécuter sur IBM Quantum
-    ibm_results = None
-    try:
-        # Se connecter au service IBM Quantum
-        service = QiskitRuntimeService(
-            channel="${this.channel}",
-            token="${this.apiKey}"
-        )
-        
-        # Obtenir le backend
-        backend_name = "${backend}"
-        
-        # Vérifier si le backend est disponible
-        available_backends = [b.name for b in service.backends()]
-        if backend_name not in available_backends:
-            backend_name = "ibmq_qasm_simulator"  # Fallback au simulateur
-            if backend_name not in available_backends:
-                # Si même le simulateur n'est pas disponible, utiliser un backend disponible
-                backend_name = available_backends[0] if available_backends else None
-        
-        if backend_name:
-            # Utiliser le nouveau Sampler
-            sampler = Sampler(session=service.session(backend=backend_name))
-            job = sampler.run(circuits=[circuit], shots=${shots})
-            result = job.result()
-            
-            # Formater les résultats dans un format compatible avec l'ancien format
-            counts = {}
-            for quasi, count in result.quasi_dists[0].items():
-                # Convertir l'entier en chaîne binaire pour simuler le format de l'ancien API
-                binary = format(int(quasi), f'0{circuit.num_qubits}b')
-                counts[binary] = int(count * ${shots})
-            
-            ibm_results = {
-                "counts": counts,
-                "status": "COMPLETED",
-                "success": True,
-                "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-                "backend_name": backend_name
-            }
-        else:
-            raise ValueError("Aucun backend disponible")
-    except Exception as e:
-        print(f"Erreur lors de l'exécution sur IBM Quantum: {e}")
-        # Aucune erreur n'est remontée ici, nous passerons à la simulation locale
-    
-    # Si nous n'avons pas pu exécuter sur IBM Quantum, simuler localement
-    if ibm_results is None:
-        # Créer un simulateur local
-        simulator = AerSimulator()
-        
-        # Exécuter le circuit
-        job = simulator.run(circuit, shots=${shots})
-        result = job.result()
-        
-        # Extraire les décomptes
-        counts = result.get_counts(circuit)
-        
-        ibm_results = {
-            "counts": counts,
-            "status": "COMPLETED",
-            "success": True,
-            "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            "backend_name": "local_simulator"
-        }
-    
-    print(json.dumps(ibm_results))
-except Exception as e:
-    print(json.dumps({
-        "success": False,
-        "error": str(e)
-    }))
-      `);
-      
-      return JSON.parse(result);
+      // Utiliser Qiskit via le worker Python pour exécuter le circuit
+      return await this.runWorker('execute_qasm', {
+        qasm,
+        backend,
+        shots,
+        channel: this.channel,
+        token: this.apiKey
+      });
     } catch (error: any) {
       console.error('Erreur lors de l\'exécution du circuit:', error);
       
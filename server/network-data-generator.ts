@@ -3,7 +3,7 @@
  * Permet de générer des données réseau aléatoires pour la simulation
  */
 import { v4 as uuidv4 } from 'uuid';
-import { spawn } from 'child_process';
+import { getPythonWorker } from './python-worker';
 
 // Type pour les connexions générées - compatible avec le schéma de base de données
 export type NetworkConnection = {
@@ -232,198 +232,26 @@ export function generateNetworkGraph(connections: NetworkConnection[]): {
 
 /**
  * Génère un graphe réseau avec Python pour une meilleure visualisation
+ * (rendu par le worker Python résident, sans relancer d'interpréteur)
  */
 export async function generateNetworkGraphPython(connections: NetworkConnection[]): Promise<string> {
-  return new Promise((resolve, reject) => {
-    try {
-      // Préparer les données pour Python
-      const data = JSON.stringify(connections);
-      
-      const pythonScript = `
-import sys
-import json
-import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib
-import io
-import base64
-from collections import defaultdict
-
-# Utiliser un backend non-interactif
-matplotlib.use('Agg')
-
-# Lire les données depuis stdin
-data = json.loads(sys.stdin.read())
-
-# Créer un graphe dirigé
-G = nx.DiGraph()
-
-# Ajouter les nœuds et les arêtes
-for conn in data:
-    source = conn['source_ip']
-    target = conn['destination_ip']
-    
-    # Vérifier si les nœuds existent déjà et ajouter si nécessaire
-    if not G.has_node(source):
-        G.add_node(source)
-    if not G.has_node(target):
-        G.add_node(target)
-    
-    # Paramètres de la connexion
-    is_anomalous = conn.get('isAnomaly', False)
-    protocol = conn.get('protocol', 'TCP')
+  try {
+    const result = await getPythonWorker().request('network_graph', { connections });
+    return JSON.stringify(result);
+  } catch (error) {
+    console.error('Error generating network graph:', error);
     
-    # Ajouter l'arête avec des attributs
-    G.add_edge(source, target, protocol=protocol, anomalous=is_anomalous)
-
-# Préparer les couleurs des nœuds
-node_colors = []
-for node in G.nodes():
-    if node.startswith('192.168.') or node.startswith('10.'):
-        node_colors.append('skyblue')
-    else:
-        node_colors.append('lightcoral')
-
-# Préparer les couleurs des arêtes
-edge_colors = []
-for _, _, data in G.edges(data=True):
-    if data.get('anomalous', False):
-        edge_colors.append('red')
-    else:
-        edge_colors.append('gray')
-
-# Préparer le style de ligne des arêtes
-edge_styles = []
-for _, _, data in G.edges(data=True):
-    if data.get('protocol') == 'UDP':
-        edge_styles.append('dotted')
-    else:
-        edge_styles.append('solid')
-
-# Calculer la disposition des nœuds
-pos = nx.spring_layout(G, seed=42)
-
-# Créer la figure et tracer le graphe
-plt.figure(figsize=(10, 8))
-nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=300, alpha=0.8)
-nx.draw_networkx_edges(G, pos, edge_color=edge_colors, width=1.5, arrowstyle='->', arrowsize=15, alpha=0.7)
-nx.draw_networkx_labels(G, pos, font_size=8, font_family='sans-serif')
-
-# Analyser le graphe et ajouter des statistiques
-num_nodes = G.number_of_nodes()
-num_edges = G.number_of_edges()
-avg_degree = sum(dict(G.degree()).values()) / num_nodes if num_nodes > 0 else 0
-density = nx.density(G)
-connected_components = 1 if nx.is_weakly_connected(G) else nx.number_weakly_connected_components(G)
-
-try:
-    avg_clustering = nx.average_clustering(G)
-except:
-    avg_clustering = 0
-
-# Annoter avec des statistiques
-plt.title(f"Network Connections Analysis\\n{num_nodes} nodes, {num_edges} edges")
-plt.figtext(0.02, 0.02, f"Density: {density:.3f}\\nAvg. Degree: {avg_degree:.2f}\\nComponents: {connected_components}", fontsize=9)
-
-# Rétréindre les marges pour maximiser l'espace
-plt.tight_layout()
-
-# Sauvegarder l'image en mémoire
-buffer = io.BytesIO()
-plt.savefig(buffer, format='png', dpi=100)
-plt.close()
-
-# Convertir en base64
-buffer.seek(0)
-image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-
-# Retourner les données d'image et les statistiques
-result = {
-    'image': image_base64,
-    'metrics': {
-        'nodes': num_nodes,
-        'edges': num_edges,
-        'density': density,
-        'avg_degree': avg_degree,
-        'connected_components': connected_components,
-        'avg_clustering': avg_clustering
-    }
+    // Retourner un format de repli en cas d'erreur
+    return JSON.stringify({
+      image: '',
+      metrics: {
+        nodes: connections.length * 2,
+        edges: connections.length,
+        density: 0.1,
+        avg_degree: 2,
+        connected_components: 1,
+        avg_clustering: 0.3
+      }
+    });
+  }
 }
-
-print(json.dumps(result))
-      `;
-      
-      // Exécuter Python pour générer le graphe
-      const pythonProcess = spawn('python3', ['-c', pythonScript]);
-      
-      let result = '';
-      let errorData = '';
-      
-      // Fournir les données à Python via stdin
-      pythonProcess.stdin.write(data);
-      pythonProcess.stdin.end();
-      
-      // Collecter la sortie de Python
-      pythonProcess.stdout.on('data', (data) => {
-        result += data.toString();
-      });
-      
-      pythonProcess.stderr.on('data', (data) => {
-        errorData += data.toString();
-        console.error(`Python stderr: ${data.toString()}`);
-      });
-      
-      pythonProcess.on('close', (code) => {
-        if (code !== 0) {
-          console.error(`Python script exited with code ${code}`);
-          console.error(`Error: ${errorData}`);
-          
-          // Retourner un format de repli en cas d'erreur
-          resolve(JSON.stringify({
-            image: '',
-            metrics: {
-              nodes: connections.length * 2,
-              edges: connections.length,
-              density: 0.1,
-              avg_degree: 2,
-              connected_components: 1,
-              avg_clustering: 0.3
-            }
-          }));
-        } else {
-          try {
-            const parsedResult = JSON.parse(result);
-            resolve(JSON.stringify(parsedResult));
-          } catch (error) {
-            console.error('Error parsing Python output:', error);
-            console.error('Raw output:', result);
-            resolve(JSON.stringify({
-              image: '',
-              metrics: {
-                nodes: connections.length * 2,
-                edges: connections.length,
-                density: 0.1,
-                avg_degree: 2,
-                connected_components: 1,
-                avg_clustering: 0.3
-              }
-            }));
-          }
-        }
-      });
-    } catch (error) {
-      console.error('Error generating network graph:', error);
-      resolve(JSON.stringify({
-        image: '',
-        metrics: {
-          nodes: connections.length * 2,
-          edges: connections.length,
-          density: 0.1,
-          avg_degree: 2,
-          connected_components: 1,
-          avg_clustering: 0.3
-        }
-      }));
-    }
-  });
-}
\ No newline at end of file
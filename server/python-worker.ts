@@ -0,0 +1,145 @@
+/**
+ * Client du worker Python résident (quantum_server/worker.py)
+ * Évite de lancer un interpréteur `python3 -c` (et de réimporter networkx,
+ * matplotlib et qiskit) à chaque appel: un seul processus est démarré et
+ * reçoit des requêtes JSON délimitées par des lignes.
+ */
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import path from 'path';
+
+// Script du worker (relatif au répertoire de lancement du serveur)
+const WORKER_SCRIPT = process.env.QUANTUM_WORKER_SCRIPT || path.join(process.cwd(), 'quantum_server', 'worker.py');
+
+// Délai maximal par requête
+const DEFAULT_TIMEOUT_MS = 120000;
+
+type PendingRequest = {
+  resolve: (result: any) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+};
+
+/**
+ * Processus Python résident servant plusieurs requêtes simultanées
+ */
+export class PythonWorker {
+  private process: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<string, PendingRequest>();
+  private nextId = 0;
+  private buffer = '';
+
+  constructor(private env: NodeJS.ProcessEnv = process.env) {}
+
+  /**
+   * Démarre le worker s'il ne tourne pas déjà
+   */
+  private ensureStarted(): ChildProcessWithoutNullStreams {
+    if (this.process) {
+      return this.process;
+    }
+
+    const worker = spawn('python3', [WORKER_SCRIPT], { env: this.env });
+    this.process = worker;
+    this.buffer = '';
+
+    worker.stdout.on('data', (data) => {
+      this.buffer += data.toString();
+      let newline = this.buffer.indexOf('\n');
+      while (newline >= 0) {
+        const line = this.buffer.slice(0, newline).trim();
+        this.buffer = this.buffer.slice(newline + 1);
+        if (line) {
+          this.handleResponse(line);
+        }
+        newline = this.buffer.indexOf('\n');
+      }
+    });
+
+    worker.stderr.on('data', (data) => {
+      console.log(`Python worker stderr: ${data.toString()}`);
+    });
+
+    const onExit = (reason: string) => {
+      if (this.process !== worker) {
+        return;
+      }
+      // Le prochain appel redémarre le worker; les requêtes en cours échouent
+      this.process = null;
+      this.pending.forEach(({ reject, timer }) => {
+        clearTimeout(timer);
+        reject(new Error(reason));
+      });
+      this.pending.clear();
+    };
+    worker.on('exit', (code) => onExit(`Worker Python arrêté (code ${code})`));
+    worker.on('error', (error) => onExit(`Erreur du worker Python: ${error.message}`));
+
+    return worker;
+  }
+
+  /**
+   * Associe une réponse à sa requête
+   */
+  private handleResponse(line: string) {
+    let response: any;
+    try {
+      response = JSON.parse(line);
+    } catch (error) {
+      console.error('Réponse du worker Python illisible:', line);
+      return;
+    }
+
+    const request = this.pending.get(response.id);
+    if (!request) {
+      return;
+    }
+    this.pending.delete(response.id);
+    clearTimeout(request.timer);
+
+    if (response.ok) {
+      request.resolve(response.result);
+    } else {
+      request.reject(new Error(response.error));
+    }
+  }
+
+  /**
+   * Envoie une requête au worker et attend sa réponse
+   */
+  request<T = any>(op: string, params: Record<string, any> = {}, timeoutMs: number = DEFAULT_TIMEOUT_MS): Promise<T> {
+    return new Promise((resolve, reject) => {
+      const worker = this.ensureStarted();
+      const id = String(++this.nextId);
+
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`Délai dépassé pour l'opération ${op}`));
+      }, timeoutMs);
+
+      this.pending.set(id, { resolve, reject, timer });
+      worker.stdin.write(JSON.stringify({ id, op, params }) + '\n');
+    });
+  }
+
+  /**
+   * Arrête le worker
+   */
+  stop() {
+    if (this.process) {
+      this.process.stdin.end();
+      this.process = null;
+    }
+  }
+}
+
+let sharedWorker: PythonWorker | null = null;
+
+/**
+ * Retourne le worker Python partagé par les services
+ */
+export function getPythonWorker(): PythonWorker {
+  if (!sharedWorker) {
+    sharedWorker = new PythonWorker();
+  }
+  return sharedWorker;
+}